@@ -0,0 +1,269 @@
+import argparse
+import json
+import os
+import platform
+import random
+import signal
+import sys
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+
+import src.instrument as instrument
+from solver import solve_ids
+from src.instance import read_instance
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+STRESS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stress")
+SIZES = [100, 200, 500, 1000]
+DENSITY = 10                # Synthetic constraints per wizard, as in the 50-wizard inputs.
+ITERATIONS = 30000          # Move budget of local search and annealing, fixed so times compare.
+BUDGET = 10                 # Seconds of backtracking before it falls back to local search.
+THRESHOLD = 0.25            # Relative growth of time, memory or CNF size reported as a regression.
+MIN_TIME = 0.1              # Seconds, and megabytes, below which growth is noise.
+MIN_RSS = 10
+RATIO_TOLERANCE = 0.01      # Drop in the satisfied ratio reported as a regression.
+
+# (name, solve_ids options, largest synthetic instance run by default). The
+# caps keep a default run in minutes: full transitivity writes n^3 clauses, and
+# lazy refinement and backtracking need many rounds on large random instances.
+ENGINES = [
+    ('sat', {'engine': 'sat'}, 100),
+    ('sat-pair', {'engine': 'sat', 'encoding': 'pair'}, 100),
+    ('sat-lazy', {'engine': 'sat', 'lazy': True}, 0),
+    ('backtrack', {'engine': 'backtrack', 'time_limit': BUDGET, 'iterations': ITERATIONS}, 0),
+    ('local', {'engine': 'local', 'iterations': ITERATIONS}, 1000),
+    ('anneal', {'engine': 'anneal', 'iterations': ITERATIONS, 'workers': 1}, 1000),
+]
+
+def synthetic_instance(num_wizards, num_constraints, seed):
+    """
+    Random constraints that hold for a hidden random ordering, so every instance
+    is satisfiable.
+    :return: list of integer triples
+    """
+    rng = random.Random(seed)
+    hidden = list(range(num_wizards))
+    rng.shuffle(hidden)
+    constraints = []
+    for _ in range(num_constraints):
+        p, q, r = sorted(rng.sample(range(num_wizards), 3))
+        a, b, c = (q, r, p) if rng.random() < 0.5 else (p, q, r)
+        if rng.random() < 0.5:
+            a, b = b, a
+        constraints.append((hidden[a], hidden[b], hidden[c]))
+    return constraints
+
+def measure(num_wizards, constraints, options):
+    """
+    Solve once with the profiler on, without memory tracing so times are not inflated.
+    :return: dict with the time, CNF size and satisfied counts
+    """
+    profiler = instrument.enable(memory=False)
+    stats = {}
+    start = time.time()
+    solve_ids(num_wizards, constraints, stats=stats, **options)
+    elapsed = time.time() - start
+    instrument.disable()
+    return {'time': elapsed, 'clauses': profiler.counters.get('clauses', 0),
+            'satisfied': stats['satisfied'], 'total': len(constraints)}
+
+def run_isolated(num_wizards, constraints, options, timeout):
+    """
+    Run `measure` in a forked child, so its peak resident memory is its own and a
+    runaway run can be killed.
+    :return: result dict of `measure` plus 'rss' in megabytes, or {'status': 'timeout'}
+    """
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(read_end)
+            try:
+                result = measure(num_wizards, constraints, options)
+                result['status'] = 'ok'
+            except Exception as e:
+                result = {'status': 'error', 'error': "{0}: {1}".format(type(e).__name__, e)}
+            with os.fdopen(write_end, "w") as f:
+                json.dump(result, f)
+        finally:
+            os._exit(0)
+
+    os.close(write_end)
+    timer = None
+    if timeout is not None:
+        # SIGALRM is not used by the solver, and interrupts the read below.
+        def expire(signum, frame):
+            os.kill(pid, signal.SIGKILL)
+        timer = signal.signal(signal.SIGALRM, expire)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        with os.fdopen(read_end) as f:
+            text = f.read()
+    finally:
+        if timeout is not None:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, timer)
+    _, _, usage = os.wait4(pid, 0)
+    try:
+        result = json.loads(text)
+    except ValueError:
+        result = {'status': 'timeout'}     # Killed before, or while, it answered.
+    result['rss'] = usage.ru_maxrss / 1024.0     # Kilobytes on Linux.
+    return result
+
+def phase2_sets(root, prefix="phase2"):
+    """
+    :return: list of (set name, list of .in paths) for each directory under `root`
+    """
+    sets = []
+    for name in sorted(os.listdir(root)):
+        directory = os.path.join(root, name)
+        if os.path.isdir(directory):
+            paths = [os.path.join(directory, f) for f in sorted(os.listdir(directory))
+                     if f.endswith(".in")]
+            if paths:
+                sets.append((prefix + "/" + name, paths))
+    return sets
+
+def combine(results):
+    """
+    One row for a set of instances: summed time, clauses and counts, largest memory.
+    """
+    row = {'time': 0.0, 'clauses': 0, 'satisfied': 0, 'total': 0, 'rss': 0.0, 'status': 'ok'}
+    for result in results:
+        if result['status'] != 'ok':
+            row['status'] = result['status']
+            continue
+        for key in ('time', 'clauses', 'satisfied', 'total'):
+            row[key] += result[key]
+        row['rss'] = max(row['rss'], result['rss'])
+    row['ratio'] = float(row['satisfied']) / row['total'] if row['total'] else 0.0
+    return row
+
+def run_suite(engines, inputs_root, sizes, density=DENSITY, all_sizes=False, timeout=None,
+              repeat=1, log=None, stress_root=None):
+    """
+    :param engines: list of ENGINES entries
+    :param inputs_root: directory of phase2 input sets, or None to skip them
+    :param stress_root: directory of sets written by `input_generator.py --hard`, or None
+    :param sizes: synthetic instance sizes
+    :param all_sizes: ignore the per-engine synthetic size caps
+    :param repeat: runs per instance; the fastest counts
+    :param log: optional function called with each key and row as they finish
+    :return: dict of "set/engine" -> row, see `combine`
+    """
+    suites = []
+    # Generated files list the hidden ordering before the constraints.
+    for root, prefix, with_ordering in ((inputs_root, "phase2", False),
+                                        (stress_root, "stress", True)):
+        if root is None:
+            continue
+        for name, paths in phase2_sets(root, prefix):
+            instances = []
+            for path in paths:
+                _, names, constraints = read_instance(path, with_ordering=with_ordering)
+                instances.append((len(names), [tuple(c) for c in constraints.tolist()]))
+            suites.append((name, None, instances))
+    for n in sizes:
+        suites.append(("synthetic/{0}".format(n), n,
+                       [(n, synthetic_instance(n, density * n, seed=n))]))
+
+    rows = {}
+    for name, size, instances in suites:
+        for engine, options, cap in engines:
+            if name.startswith("synthetic/") and size > cap and not all_sizes:
+                continue
+            results = []
+            for num_wizards, constraints in instances:
+                runs = [run_isolated(num_wizards, constraints, options, timeout)
+                        for _ in range(repeat)]
+                results.append(min(runs, key=lambda r: r.get('time', float('inf'))))
+            key = "{0}/{1}".format(name, engine)
+            rows[key] = combine(results)
+            if log is not None:
+                log(key, rows[key])
+    return rows
+
+def compare(rows, baseline, threshold=THRESHOLD):
+    """
+    :param rows: results of `run_suite`
+    :param baseline: rows of an earlier run
+    :return: list of (key, message) for every regression beyond `threshold`
+    """
+    regressions = []
+    for key, row in sorted(rows.items()):
+        old = baseline.get(key)
+        if old is None:
+            continue
+        if row['status'] != 'ok':
+            if old['status'] == 'ok':
+                regressions.append((key, "status {0}, was ok".format(row['status'])))
+            continue
+        for field, floor in (('time', MIN_TIME), ('rss', MIN_RSS), ('clauses', 0)):
+            if row[field] > old[field] * (1 + threshold) and row[field] - old[field] > floor:
+                regressions.append((key, "{0} {1:.3f}, was {2:.3f}".format(field, row[field],
+                                                                            old[field])))
+        if row['ratio'] < old['ratio'] - RATIO_TOLERANCE:
+            regressions.append((key, "satisfied ratio {0:.4f}, was {1:.4f}".format(row['ratio'],
+                                                                                    old['ratio'])))
+    return regressions
+
+def print_row(key, row):
+    print("{0:<32} {1:>9.3f} {2:>9.1f} {3:>10} {4:>8.4f} {5}".format(
+        key, row['time'], row['rss'], row['clauses'], row['ratio'], row['status']))
+    sys.stdout.flush()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Time, memory, CNF size and satisfied ratio of every engine, "
+                                                   "compared against a baseline.")
+    parser.add_argument("--inputs", default = "phase2_inputs",
+                        help = "directory of input sets, '' to skip them")
+    parser.add_argument("--stress", default = STRESS,
+                        help = "directory of stress sets from input_generator.py --hard, "
+                               "skipped if missing")
+    parser.add_argument("--sizes", type = int, nargs = "*", default = SIZES,
+                        help = "synthetic instance sizes")
+    parser.add_argument("--density", type = int, default = DENSITY,
+                        help = "synthetic constraints per wizard")
+    parser.add_argument("--engines", nargs = "*", default = [name for name, _, _ in ENGINES],
+                        choices = [name for name, _, _ in ENGINES])
+    parser.add_argument("--all-sizes", action = "store_true",
+                        help = "run every engine on every synthetic size")
+    parser.add_argument("--timeout", type = float, default = 300,
+                        help = "seconds before one run is killed")
+    parser.add_argument("--repeat", type = int, default = 1,
+                        help = "runs per instance, the fastest counts")
+    parser.add_argument("--baseline", default = BASELINE)
+    parser.add_argument("--threshold", type = float, default = THRESHOLD,
+                        help = "relative growth of time, memory or clauses that fails the run")
+    parser.add_argument("--update-baseline", action = "store_true",
+                        help = "store this run as the baseline instead of comparing")
+    args = parser.parse_args()
+
+    engines = [entry for entry in ENGINES if entry[0] in args.engines]
+    print("{0:<32} {1:>9} {2:>9} {3:>10} {4:>8} {5}".format(
+        "run", "time", "rss MB", "clauses", "ratio", "status"))
+    rows = run_suite(engines, args.inputs or None, args.sizes, args.density, args.all_sizes,
+                     args.timeout, args.repeat, log=print_row,
+                     stress_root=args.stress if os.path.isdir(args.stress) else None)
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)['results']
+        baseline.update(rows)
+        with open(args.baseline, "w") as f:
+            json.dump({'platform': platform.platform(), 'python': platform.python_version(),
+                       'results': baseline}, f, indent=1, sort_keys=True)
+        print("Baseline written to {0}".format(args.baseline))
+    elif not os.path.exists(args.baseline):
+        print("No baseline at {0}; run with --update-baseline to store one".format(args.baseline))
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(rows, baseline, args.threshold)
+        for key, message in regressions:
+            print("REGRESSION {0}: {1}".format(key, message))
+        print("{0} regressions against {1}".format(len(regressions), args.baseline))
+        sys.exit(1 if regressions else 0)
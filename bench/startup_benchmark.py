@@ -0,0 +1,67 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir))
+
+def import_times(statement="import solver"):
+    """
+    Run `statement` in a fresh interpreter under `python -X importtime`.
+    :return: list of (module, self microseconds, cumulative microseconds), in
+             the order the imports finished
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=ROOT,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                            universal_newlines=True, check=True)
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, module = line[len("import time:"):].split("|")
+        times.append((module.strip(), int(own), int(cumulative)))
+    return times
+
+def cumulative_time(module, statement="import solver", runs=3):
+    """
+    :return: fastest cumulative import time of `module` over `runs` cold starts, in microseconds
+    """
+    best = None
+    for _ in range(runs):
+        for name, _, cumulative in import_times(statement):
+            if name == module and (best is None or cumulative < best):
+                best = cumulative
+    return best
+
+def wall_time(args, runs=5):
+    """
+    :return: median wall-clock seconds of running `python args...` in the repo root
+    """
+    times = []
+    for _ in range(runs):
+        start = time.time()
+        subprocess.run([sys.executable] + args, cwd=ROOT, stdout=subprocess.DEVNULL, check=True)
+        times.append(time.time() - start)
+    return sorted(times)[len(times) // 2]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Measure solver.py start-up cost.")
+    parser.add_argument("input_file", nargs = "?", default = "phase2_inputs/inputs20/input20_0.in")
+    parser.add_argument("--top", type = int, default = 15,
+                        help = "number of slowest imports to list")
+    parser.add_argument("--runs", type = int, default = 5)
+    args = parser.parse_args()
+
+    times = import_times()
+    print("{0:<40} {1:>10} {2:>12}".format("import solver", "self [us]", "cumulative"))
+    for module, own, cumulative in sorted(times, key=lambda t: -t[2])[:args.top]:
+        print("{0:<40} {1:>10} {2:>12}".format(module, own, cumulative))
+
+    with tempfile.NamedTemporaryFile(suffix=".out") as out:
+        interpreter = wall_time(["-c", "pass"], args.runs)
+        imported = wall_time(["-c", "import solver"], args.runs)
+        solved = wall_time(["solver.py", args.input_file, out.name], args.runs)
+    print("\ninterpreter {0:.3f}s, import solver {1:.3f}s, solve {2} {3:.3f}s".format(
+        interpreter, imported, os.path.basename(args.input_file), solved))
@@ -0,0 +1,95 @@
+import argparse
+import os
+import random
+import sys
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+
+import src.sat_reduce as sr
+from src.instance import intern_constraints
+from src.preprocess import canonicalize_constraints
+from solver import read_input, pycosatSolve
+
+def sat_time(num_wizards, constraints, encoding, symmetry):
+    """
+    :return: tuple (seconds to reduce and solve, True if satisfiable)
+    """
+    start = time.time()
+    if encoding == 'pair':
+        cnf = sr.reduce_pycosat_pairs(constraints, sr.PairTranslator(num_wizards), symmetry)
+    else:
+        cnf = sr.reduce_pycosat(constraints, sr.LiteralTranslator(num_wizards), symmetry=symmetry)
+    solution = sr.solve_pycosat(cnf)
+    return time.time() - start, solution != "UNSAT"
+
+def make_unsat(num_wizards, constraints, extra, seed):
+    """
+    Add `extra` random constraints, which leaves the dense phase2 inputs unsatisfiable.
+    """
+    rng = random.Random(seed)
+    extended = list(constraints)
+    for _ in range(extra):
+        extended.append(tuple(rng.sample(range(num_wizards), 3)))
+    return canonicalize_constraints(extended)[0]
+
+def enumeration_time(constraints, limit, symmetry):
+    """
+    :return: tuple (seconds to enumerate `limit` models, number of them that
+             are distinct up to reversal)
+    """
+    start = time.time()
+    models = pycosatSolve(constraints, limit, symmetry)
+    elapsed = time.time() - start
+    distinct = set()
+    for model in models:
+        mirror = [(y, x) for x, y in model]
+        distinct.add(min(tuple(sorted(model)), tuple(sorted(mirror))))
+    return elapsed, len(distinct)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Time SAT solving with and without symmetry breaking.")
+    parser.add_argument("inputs", nargs = "*", default = ["phase2_inputs/inputs35", "phase2_inputs/inputs50"])
+    parser.add_argument("--extra", type = int, default = 40,
+                        help = "random constraints added to make the unsatisfiable variants")
+    parser.add_argument("--limit", type = int, default = 1000,
+                        help = "models enumerated by pycosatSolve")
+    args = parser.parse_args()
+
+    files = []
+    for path in args.inputs:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, f) for f in sorted(os.listdir(path)) if f.endswith(".in"))
+        else:
+            files.append(path)
+
+    print("{0:<16} {1:<8} {2:<6} {3:>9} {4:>9} {5:>7}".format(
+        "input", "encoding", "sat", "plain", "symmetry", "speedup"))
+    totals = {}
+    for filename in files:
+        _, _, wizards, constraints = read_input(filename)
+        names, int_constraints = intern_constraints(constraints, wizards)
+        int_constraints = canonicalize_constraints(int_constraints)[0]
+        n = len(names)
+        variants = [int_constraints, make_unsat(n, int_constraints, args.extra, 0)]
+        for variant in variants:
+            for encoding in ('literal', 'pair'):
+                plain, sat = sat_time(n, variant, encoding, False)
+                broken, sat2 = sat_time(n, variant, encoding, True)
+                assert sat == sat2
+                key = (encoding, sat)
+                totals[key] = [t + d for t, d in zip(totals.get(key, [0, 0]), (plain, broken))]
+                print("{0:<16} {1:<8} {2:<6} {3:>9.3f} {4:>9.3f} {5:>7.2f}".format(
+                    os.path.basename(filename), encoding, "SAT" if sat else "UNSAT",
+                    plain, broken, plain / broken))
+    for (encoding, sat), (plain, broken) in sorted(totals.items()):
+        print("total {0:<10} {1:<6} {2:>9.3f} {3:>9.3f} {4:>7.2f}".format(
+            encoding, "SAT" if sat else "UNSAT", plain, broken, plain / broken))
+
+    print("\n{0:<16} {1:>9} {2:>9} {3:>9} {4:>9}".format(
+        "enumeration", "plain", "distinct", "symmetry", "distinct"))
+    for filename in files[:3]:
+        constraints = read_input(filename)[3]
+        plain, count = enumeration_time(constraints, args.limit, False)
+        broken, count2 = enumeration_time(constraints, args.limit, True)
+        print("{0:<16} {1:>9.3f} {2:>9} {3:>9.3f} {4:>9}".format(
+            os.path.basename(filename), plain, count, broken, count2))
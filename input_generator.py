@@ -1,29 +1,130 @@
+import argparse
+import json
+import os
+import random
+
 from instance_validator import main as check
+from solver import ENGINES
 from src import utils
-from src.all_constraints import *
+from src.all_constraints import sample_constraints, sample_duplicates
+import src.hardness as hardness
 
 DUPLICATE_FRACTION = 0.02       # Fraction of total constraints to be duplicate
 NUM_CONSTRAINTS = 500           # Total number of constraints
+SIZES = [20, 35, 50]            # Numbers of wizards the staff validator accepts
 
-def main():
-    num_main_constraints = int(NUM_CONSTRAINTS * (1 - DUPLICATE_FRACTION))
-    num_dup_constraints = NUM_CONSTRAINTS - num_main_constraints
-    for lst_length in [20, 35, 50]:
-        names, _ = utils.name_gen([], lst_length)
+def generate(num_wizards, num_constraints, duplicate_fraction, seed, filename):
+    """
+    Write an instance whose constraints hold for a random ordering of random
+    names. Constraints are sampled without listing all O(n^3) of them, see
+    `sample_constraints`, and streamed to `filename`.
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    random.seed(seed)
+    num_main_constraints = int(num_constraints * (1 - duplicate_fraction))
+    num_dup_constraints = num_constraints - num_main_constraints
+
+    names, _ = utils.name_gen([], num_wizards)
+    constraints = sample_constraints(num_wizards, num_main_constraints, rng)
+    constraints = sample_duplicates(constraints, num_dup_constraints, rng)
+
+    assert(len(constraints) == num_constraints)
+    utils.stream_to_file(names, constraints, filename)
 
-        all_possibilities = generate_all_constraints(names)
-        constraints = randomly_select_constraints(all_possibilities, num_main_constraints)
-        while (not all_wizards(constraints, lst_length)):
-            constraints = randomly_select_constraints(all_possibilities, num_main_constraints)
+def generate_hard(num_wizards, num_constraints, mode, seed, filename, steps, counts=None,
+                  node_limit=hardness.NODE_LIMIT, engines=hardness.ENGINES):
+    """
+    Write a stress instance: the hardest constraint set for backtracking that
+    `hardness.harden` finds in `steps` steps with `mode` as the objective, or
+    for mode 'unique' a minimal set pinning down the hidden ordering. Its
+    metrics go to a JSON file next to it, with the extension replaced.
+    :param counts: constraint counts to scan first; the search starts from the hardest
+    :param engines: engines timed by `hardness.measure`
+    :return: the metrics
+    """
+    import numpy as np
 
-        constraints = insert_duplicates(constraints, num_dup_constraints)
+    rng = random.Random(seed)
+    random.seed(seed)
+    objective = 'nodes' if mode == 'unique' else mode
+    record = {'mode': mode, 'seed': seed, 'node_limit': node_limit, 'seeds': hardness.SEEDS}
+    if counts:
+        results = hardness.scan(num_wizards, counts, rng, node_limit, engines=engines)
+        record['scan'] = [[m, metrics] for m, _, metrics in results]
+        num_constraints, constraints, _ = max(results, key=lambda r: r[2][objective])
+    else:
+        constraints = hardness.planted_instance(num_wizards, num_constraints, rng)
+
+    if mode == 'unique':
+        constraints = hardness.pin_down(num_wizards, constraints, rng)
+        metrics = hardness.measure(num_wizards, constraints, node_limit, engines=engines)
+    else:
+        constraints, metrics = hardness.harden(num_wizards, constraints, rng, steps, objective,
+                                               node_limit=node_limit, engines=engines)
+        record['steps'] = steps
+    record.update(metrics)
+    record['wizards'] = num_wizards
+    record['constraints'] = len(constraints)
+    record['unique'] = hardness.UniquenessChecker(range(num_wizards)).other(constraints) is None
+
+    names, _ = utils.name_gen([], num_wizards)
+    utils.stream_to_file(names, np.array(constraints), filename)
+    with open(os.path.splitext(filename)[0] + ".json", "w") as f:
+        json.dump(record, f, indent=1, sort_keys=True)
+    return record
+
+def main():
+    parser = argparse.ArgumentParser(description = "Generate satisfiable instances.")
+    parser.add_argument("sizes", type = int, nargs = "*", default = SIZES,
+                        help = "numbers of wizards, one instance each")
+    parser.add_argument("--constraints", type = int, default = NUM_CONSTRAINTS,
+                        help = "constraints per instance")
+    parser.add_argument("--duplicates", type = float, default = DUPLICATE_FRACTION,
+                        help = "fraction of the constraints that are degenerate copies")
+    parser.add_argument("--seed", type = int, default = None)
+    parser.add_argument("--output", default = None,
+                        help = "output file, input<size>.in by default; only for a single size")
+    parser.add_argument("--no-check", action = "store_true",
+                        help = "skip validating the written files")
+    parser.add_argument("--hard", choices = hardness.OBJECTIVES + ['unique'], default = None,
+                        help = "search for constraints maximizing backtracking nodes or time, or "
+                               "a minimal set with a unique solution; writes a metrics .json "
+                               "and adds no duplicates")
+    parser.add_argument("--steps", type = int, default = 50,
+                        help = "hill climbing steps of --hard nodes and --hard time")
+    parser.add_argument("--scan", type = int, nargs = "+", default = None,
+                        help = "with --hard, constraint counts to try first; the hardest is kept")
+    parser.add_argument("--node-limit", type = int, default = hardness.NODE_LIMIT,
+                        help = "backtracking nodes per run when measuring hardness")
+    parser.add_argument("--engines", nargs = "+", choices = ENGINES, default = hardness.ENGINES,
+                        help = "engines timed when measuring hardness; --hard time maximizes "
+                               "their total time")
+    args = parser.parse_args()
+    if args.output is not None and len(args.sizes) != 1:
+        parser.error("--output needs exactly one size")
 
-        assert(len(constraints) == NUM_CONSTRAINTS)
-        filename = "input" + str(lst_length) + ".in"
-        utils.output_to_file(names, constraints, filename)
-        check([filename, lst_length]) # Checks each input file in correct form according to spec.
+    for lst_length in args.sizes:
+        filename = args.output or "input" + str(lst_length) + ".in"
+        if args.hard is None:
+            generate(lst_length, args.constraints, args.duplicates, args.seed, filename)
+            num_constraints = args.constraints
+        else:
+            record = generate_hard(lst_length, args.constraints, args.hard, args.seed, filename,
+                                   args.steps, args.scan, args.node_limit, args.engines)
+            print("{0}: {1} constraints, {2:.0f} nodes, unique: {3}".format(
+                filename, record['constraints'], record['nodes'], record['unique']))
+            # --scan and --hard unique choose their own count.
+            num_constraints = record['constraints']
+        if not args.no_check:
+            # Checks each input file in correct form according to spec.
+            if lst_length in SIZES and num_constraints <= NUM_CONSTRAINTS:
+                check([filename, lst_length])
+            else:
+                check([filename, "any"])
 
     print("All output files written!")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,10 +1,14 @@
 # Released to students
 
 import sys
+from src.instance import InstanceError, read_instance
 
 def main(argv):
     if len(argv) != 2:
-        print("Usage: python instance_validator.py [path_to_input_file] [20, 35 or 50]")
+        print("Usage: python instance_validator.py [path_to_input_file] [20, 35, 50 or any]")
+        return
+    if argv[1] == "any":
+        print(processLargeInput(argv[0]))
         return
     if (int(argv[1]) not in [20, 35, 50]):
         print("The final argument must be 20, 35 or 50.")
@@ -72,5 +76,42 @@ def processInput(s, max_nodes):
 
     return("Success!")
 
+
+def processLargeInput(s):
+    """
+    `processInput` without the limits on the numbers of wizards and constraints,
+    for generated instances: the file is mapped and parsed in bulk, and the
+    constraints are checked against the ordering all at once.
+    """
+    import numpy as np
+
+    try:
+        N, names, constraints = read_instance(s, use_mmap=True, with_ordering=True)
+    except InstanceError as e:
+        return "Invalid instance: {0}".format(e)
+    if N < 1:
+        return "N must be a positive integer."
+    if len(constraints) < 1:
+        return "You must have heard at least 1 age constraint at the party."
+
+    # Makes sure wizard names are alnum and < 10 characters long
+    for wizard in names:
+        if not wizard.isalnum() or len(wizard) > 10:
+            return "Wizards' names must be alphanumeric, and at most 10 characters long."
+
+    # Ids past N are names that are not in the ordering; wizard i sits at position i.
+    unknown = (constraints >= N).any(axis=1)
+    wiz_a, wiz_b, wiz_mid = constraints[:, 0], constraints[:, 1], constraints[:, 2]
+    between = ((wiz_a < wiz_mid) & (wiz_mid < wiz_b)) | ((wiz_b < wiz_mid) & (wiz_mid < wiz_a))
+    bad = np.flatnonzero(unknown | between)
+    if len(bad):
+        i = int(bad[0])
+        if unknown[i]:
+            return "Some of the wizards in line {} are not present in the perfect age ordering.".format(i + 4)
+        a, b, mid = (int(x) for x in constraints[i])
+        return "In line {i}, you said {wizard_mid}'s age was NOT in between {wizard_a} and {wizard_b}'s, however, in your optimal ordering, {wizard_a} appeared at {a_order}, {wizard_b} appeared at {b_order}, {wizard_mid} appeared at {mid_order}".format(i = i + 4, wizard_a = names[a], wizard_b = names[b], wizard_mid = names[mid], a_order = a, b_order = b, mid_order = mid)
+
+    return("Success!")
+
 if __name__ == '__main__':
     main(sys.argv[1:])
@@ -1,6 +1,7 @@
 # Released to students
 
 import sys
+from src.scoring import constraint_array, score_orderings
 
 def main(argv):
     if len(argv) != 2:
@@ -32,23 +33,12 @@ def processInput(input_file, output_file):
 #return "The output ordering contains wizards that are different from the ones in the input ordering."
 
     # Counts how many constraints are satisfied.
-    constraints_satisfied = 0
-    constraints_failed = []
-    for i in range(num_constraints):
-        line_num = i + 4
-        constraint = fin.readline().split()
-
-        c = constraint # Creating an alias for easy reference
-        m = output_ordering_map # Creating an alias for easy reference
-
-        wiz_a = m[c[0]]
-        wiz_b = m[c[1]]
-        wiz_mid = m[c[2]]
-
-        if (wiz_a < wiz_mid < wiz_b) or (wiz_b < wiz_mid < wiz_a):
-            constraints_failed.append(c)
-        else:
-            constraints_satisfied += 1
+    constraints = [fin.readline().split() for i in range(num_constraints)]
+    C = constraint_array(constraints, output_ordering_map)
+    counts, violated = score_orderings(range(len(output_ordering)), C, masks=True)
+
+    constraints_satisfied = int(counts[0])
+    constraints_failed = [constraints[i] for i in violated[0].nonzero()[0]]
 
     return constraints_satisfied, num_constraints, constraints_failed
 
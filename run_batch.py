@@ -0,0 +1,234 @@
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from multiprocessing.connection import wait
+
+import src.instrument as instrument
+from solver import solve_ids, write_output, preload_engine, ENCODINGS, ENGINES
+from src.cache import ResultCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_ENTRIES
+from src.instance import name_ordering, read_instance
+from src.sat_backend import get_backend
+
+JOURNAL = "batch_journal.jsonl"
+
+def find_inputs(input_root):
+    """
+    :param input_root: directory to search recursively
+    :return: sorted list of paths of `.in` files under `input_root`
+    """
+    paths = []
+    for dirpath, _, filenames in os.walk(input_root):
+        for filename in filenames:
+            if filename.endswith(".in"):
+                paths.append(os.path.join(dirpath, filename))
+    return sorted(paths)
+
+def output_path(input_root, output_root, path):
+    """
+    Mirror `path` under `output_root`, renaming a leading "input" of each
+    directory and file name to "output", i.e.
+    phase2_inputs/inputs20/input20_0.in -> phase2_outputs/outputs20/output20_0.out
+    """
+    relative = os.path.relpath(path, input_root)[:-len(".in")] + ".out"
+    parts = ["output" + part[len("input"):] if part.startswith("input") else part
+             for part in relative.split(os.sep)]
+    return os.path.join(output_root, *parts)
+
+def solve_file(input_file, output_file, options, conn):
+    """
+    Worker process body: solve one instance and send its record back over `conn`.
+    """
+    start = time.time()
+    if options['profile']:
+        instrument.enable()
+    with instrument.PROFILER.phase("read"):
+        num_wizards, names, constraints = read_instance(input_file)
+    num_constraints = len(constraints)
+    if len(names) != num_wizards:
+        # A wizard in no constraint has no name to write out.
+        conn.send({'input': input_file, 'output': output_file, 'status': 'error',
+                   'time': time.time() - start,
+                   'error': "expected {0} wizards, the constraints name {1}".format(
+                       num_wizards, len(names))})
+        conn.close()
+        return
+    cache = None
+    if options['cache']:
+        cache = ResultCache(options['cache'], options['cache_size'] or DEFAULT_MAX_ENTRIES)
+    stats = {}
+    ordering = solve_ids(num_wizards, constraints, options['encoding'],
+                         constrained_only=options['constrained_only'], lazy=options['lazy'],
+                         stats=stats, engine=options['engine'], iterations=options['iterations'],
+                         time_limit=options['time_limit'], workers=1,
+                         symmetry=options['symmetry'], cache=cache,
+                         backend=get_backend(options['sat_solver'], options['sat_timeout']))
+    with instrument.PROFILER.phase("write"):
+        write_output(output_file, name_ordering(ordering, names))
+    record = {'input': input_file, 'output': output_file, 'status': 'ok',
+              'time': time.time() - start, 'satisfied': stats['satisfied'],
+              'total': num_constraints, 'engine': stats['engine']}
+    if cache is not None:
+        record['cache'] = stats['cache']
+    if options['profile']:
+        record['profile'] = instrument.disable().record()
+    conn.send(record)
+    conn.close()
+
+def read_journal(journal):
+    """
+    :return: dict of input path -> last record written for it
+    """
+    records = {}
+    if os.path.exists(journal):
+        with open(journal) as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    record = json.loads(line)
+                    records[record['input']] = record
+    return records
+
+def run_batch(input_root, output_root, workers=None, timeout=None, resume=False, options=None):
+    """
+    Solve every `.in` under `input_root`, at most `workers` at a time. Each instance
+    runs in a process forked from this one, so imports are paid once, and is
+    killed after `timeout` seconds. Finished records are appended to the journal
+    in `output_root` as they come in, so a killed run can be resumed; a run that
+    does not resume starts the journal over.
+    :return: list of records, one per instance, in input order
+    """
+    options = options or {}
+    options.setdefault('encoding', 'literal')
+    options.setdefault('constrained_only', False)
+    options.setdefault('lazy', False)
+    options.setdefault('symmetry', False)
+    options.setdefault('engine', 'sat')
+    options.setdefault('iterations', None)
+    options.setdefault('time_limit', None)
+    options.setdefault('cache', None)
+    options.setdefault('cache_size', None)
+    options.setdefault('sat_solver', None)
+    options.setdefault('sat_timeout', None)
+    options.setdefault('profile', False)
+    workers = workers or os.cpu_count() or 1
+    context = multiprocessing.get_context("fork")
+    preload_engine(options['engine'])     # Imported once here, inherited by every fork.
+
+    os.makedirs(output_root, exist_ok=True)
+    journal = os.path.join(output_root, JOURNAL)
+    done = read_journal(journal) if resume else {}
+
+    pending = []
+    for path in find_inputs(input_root):
+        out = output_path(input_root, output_root, path)
+        record = done.get(path)
+        if record is not None and record['status'] == 'ok' and os.path.exists(out):
+            continue
+        pending.append((path, out))
+    pending.reverse()
+
+    records = dict(done)
+    running = {}    # sentinel -> (process, conn, path, out, deadline, started)
+    with open(journal, "a" if resume else "w") as log:
+        while pending or running:
+            while pending and len(running) < workers:
+                path, out = pending.pop()
+                os.makedirs(os.path.dirname(out), exist_ok=True)
+                receiver, sender = context.Pipe(duplex=False)
+                process = context.Process(target=solve_file, args=(path, out, options, sender))
+                process.start()
+                sender.close()
+                deadline = None if timeout is None else time.time() + timeout
+                running[process.sentinel] = (process, receiver, path, out, deadline, time.time())
+
+            deadlines = [entry[4] for entry in running.values() if entry[4] is not None]
+            wait_for = None if not deadlines else max(0, min(deadlines) - time.time())
+            ready = wait(list(running), wait_for)
+
+            now = time.time()
+            for sentinel in list(running):
+                process, receiver, path, out, deadline, started = running[sentinel]
+                if sentinel in ready:
+                    record = receiver.recv() if receiver.poll() else \
+                        {'input': path, 'output': out, 'status': 'error',
+                         'time': now - started, 'exitcode': process.exitcode}
+                elif deadline is not None and now >= deadline:
+                    process.terminate()
+                    record = {'input': path, 'output': out, 'status': 'timeout',
+                              'time': now - started}
+                else:
+                    continue
+                process.join()
+                receiver.close()
+                del running[sentinel]
+                records[path] = record
+                log.write(json.dumps(record) + "\n")
+                log.flush()
+
+    return [records[path] for path in find_inputs(input_root) if path in records]
+
+def print_summary(records):
+    print("{0:<40} {1:>8} {2:>9} {3:>8} {4}".format("input", "time", "satisfied", "engine", "status"))
+    for record in records:
+        satisfied = "{0}/{1}".format(record['satisfied'], record['total']) if 'satisfied' in record else "-"
+        print("{0:<40} {1:>8.3f} {2:>9} {3:>8} {4}".format(
+            record['input'], record['time'], satisfied, record.get('engine', '-'), record['status']))
+    solved = sum(1 for r in records if r['status'] == 'ok' and r['satisfied'] == r['total'])
+    print("{0}/{1} instances fully satisfied, {2:.3f}s total".format(
+        solved, len(records), sum(r['time'] for r in records)))
+
+    profiles = [r['profile'] for r in records if 'profile' in r]
+    if profiles:
+        summary = instrument.aggregate(profiles)
+        print("")
+        print("{0:<22} {1:>9} {2:>9} {3:>11} {4:>7}".format("phase", "total", "max", "peak KiB", "calls"))
+        for name, entry in sorted(summary['phases'].items(), key=lambda item: -item[1]['time']):
+            print("{0:<22} {1:>9.3f} {2:>9.3f} {3:>11.1f} {4:>7}".format(
+                name, entry['time'], entry['max_time'], entry['peak'] / 1024.0, entry['calls']))
+        print(", ".join("{0}={1}".format(name, value)
+                        for name, value in sorted(summary['counters'].items())))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Solve every .in file under a directory.")
+    parser.add_argument("input_root", nargs = "?", default = "phase2_inputs")
+    parser.add_argument("output_root", nargs = "?", default = "phase2_outputs")
+    parser.add_argument("--workers", type = int, default = None,
+                        help = "instances solved at once, one per core by default")
+    parser.add_argument("--timeout", type = float, default = None,
+                        help = "seconds before an instance is killed")
+    parser.add_argument("--resume", action = "store_true",
+                        help = "skip instances already solved according to the journal")
+    parser.add_argument("--encoding", choices = ENCODINGS, default = "literal")
+    parser.add_argument("--constrained-only", action = "store_true")
+    parser.add_argument("--lazy", action = "store_true")
+    parser.add_argument("--symmetry", action = "store_true")
+    parser.add_argument("--engine", choices = ENGINES, default = "sat")
+    parser.add_argument("--sat-solver", default = "pycosat", metavar = "CMD",
+                        help = "pycosat, or the command line of a local DIMACS solver")
+    parser.add_argument("--sat-timeout", type = float, default = None,
+                        help = "seconds an external SAT solver may run per instance")
+    parser.add_argument("--profile", action = "store_true",
+                        help = "record phase times, peak memory and clause counts in the journal, "
+                               "and summarize them over the batch")
+    parser.add_argument("--iterations", type = int, default = None,
+                        help = "local search and annealing move budget")
+    parser.add_argument("--time-limit", type = float, default = None,
+                        help = "local search and annealing time budget in seconds")
+    parser.add_argument("--cache", nargs = "?", const = DEFAULT_CACHE_DIR, metavar = "DIR",
+                        help = "reuse orderings found for earlier copies of an instance, "
+                               "shared by all workers")
+    parser.add_argument("--cache-size", type = int, default = None,
+                        help = "cached instances kept before the least recently used are evicted")
+    args = parser.parse_args()
+
+    options = {'encoding': args.encoding, 'constrained_only': args.constrained_only,
+               'lazy': args.lazy, 'symmetry': args.symmetry, 'engine': args.engine,
+               'iterations': args.iterations, 'time_limit': args.time_limit,
+               'cache': args.cache, 'cache_size': args.cache_size,
+               'sat_solver': args.sat_solver, 'sat_timeout': args.sat_timeout,
+               'profile': args.profile}
+    records = run_batch(args.input_root, args.output_root, args.workers, args.timeout,
+                        args.resume, options)
+    print_summary(records)
@@ -1,13 +1,14 @@
 import argparse
-import src.dag_utils as dg
-import src.sat_reduce as sr
+import importlib
+import time
 import sys
-sys.path.append('/home/jake/anaconda3/lib/python3.5/site-packages')
-import pycosat
-import itertools
+import src.instrument as instrument
+from src.instance import intern_constraints, name_ordering, read_instance
+from src.preprocess import (canonicalize_array, canonicalize_constraints, connected_components,
+                            peel_constraints, DUPLICATE)
 
-from satispy import Variable, Cnf
-from satispy.solver import Minisat
+# Engines import their dependencies when first used, so start-up only pays
+# for what the chosen engine needs; see preload_engine.
 
 """
 ======================================================================
@@ -16,43 +17,30 @@ from satispy.solver import Minisat
 """
 
 def remove_bad_constraints(constraints):
-    good_constraints = list()
-    for c in constraints:
-        # First 2 elements in constraint list are the same
-        if c[0] == c[1]:
-            continue
-        reversed_constraint = [c[1], c[0], c[2]]
-        # First 2 elements in constraint are reversed order of constraint already
-        # Accounted for or duplicate constraint
-        if reversed_constraint in good_constraints or c in good_constraints:
-            continue
-        good_constraints.append(c)
+    """
+    :param constraints: list of 3-element constraints
+    :return: constraints without duplicates and trivially satisfied forms,
+             see `src.preprocess.canonicalize_constraints`
+    """
+    good_constraints, _ = canonicalize_constraints(constraints)
     return good_constraints
 
 def num_constraints_satisfied(num_wizards, constraints, ordering):
     if (len(ordering) != num_wizards):
         # print("Input file has unique {} wizards, but output file has {}".format(num_wizards, len(ordering)))
         return 0
-    
+
+    import src.scoring as scoring
+
     # Counts how many constraints are satisfied.
-    constraints_satisfied = 0
     output_ordering_map = {k: v for v, k in enumerate(ordering)}
-    for constraint in constraints:
-        c = constraint # Creating an alias for easy reference
-        m = output_ordering_map # Creating an alias for easy reference
-        
-        wiz_a = m[c[0]]
-        wiz_b = m[c[1]]
-        wiz_mid = m[c[2]]
-        
-        if (wiz_a < wiz_mid < wiz_b) or (wiz_b < wiz_mid < wiz_a):
-            pass
-        else:
-            constraints_satisfied += 1
-
-    return constraints_satisfied
+    C = scoring.constraint_array(constraints, output_ordering_map)
+    return int(scoring.score_orderings(range(len(ordering)), C)[0])
 
 def original_solver(constraints):
+    from satispy import Variable, Cnf
+    from satispy.solver import Minisat
+
     variables = {}
 
     def get_variable(name):
@@ -87,53 +75,216 @@ def original_solver(constraints):
 
     return valid
 
-def pycosatSolve(constraints, limit):
+def pycosatSolve(constraints, limit, symmetry=False):
+    """
+    Enumerate models of the encoding without transitivity clauses: one variable
+    per ordered pair (x, y), meaning x comes before y.
+    :param constraints: list of 3-element constraints
+    :param limit: number of models to enumerate
+    :return: list of models, each the list of (x, y) pairs it makes true
+    """
+    import itertools
+    import pycosat
+    import src.sat_reduce as sr
+
     cnf = list()
-    clauses = dict()
-    reverse_clauses = dict()
+    variables = dict()      # (x, y) -> variable
+    pairs = [None]          # variable -> (x, y); pycosat variables must be non-zero
     unique_constraints = remove_bad_constraints(constraints)
-    
-    i = 1 #pycosat variables must be non-zero
+
+    def variable(x, y):
+        if (x, y) not in variables:
+            variables[(x, y)] = len(pairs)
+            pairs.append((x, y))
+        return variables[(x, y)]
+
     for constraint in unique_constraints:
         a, b, c = constraint
-        x_1 = '{0}<{1}'.format(a, c)
-        x_2 = '{0}<{1}'.format(c, a)
-        x_3 = '{0}<{1}'.format(b, c)
-        x_4 = '{0}<{1}'.format(c, b)
-        if x_1 not in clauses:
-            clauses[x_1] = i
-            reverse_clauses[i] = x_1
-            i += 1
-        if x_2 not in clauses:
-            clauses[x_2] = i
-            reverse_clauses[i] = x_2
-            i += 1
-        if x_3 not in clauses:
-            clauses[x_3] = i
-            reverse_clauses[i] = x_3
-            i += 1
-        if x_4 not in clauses:
-            clauses[x_4] = i
-            reverse_clauses[i] = x_4
-            i += 1
-        cnf.append([clauses[x_1], clauses[x_2]])
-        cnf.append([clauses[x_3], clauses[x_4]])
-        cnf.append([-clauses[x_1], -clauses[x_4]])
-        cnf.append([-clauses[x_2], -clauses[x_3]])
-    
+        x_1 = variable(a, c)
+        x_2 = variable(c, a)
+        x_3 = variable(b, c)
+        x_4 = variable(c, b)
+        cnf.append([x_1, x_2])
+        cnf.append([x_3, x_4])
+        cnf.append([-x_1, -x_4])
+        cnf.append([-x_2, -x_3])
+
+    if symmetry:
+        # Models come in mirror-image pairs; keep one of each.
+        pair = sr.reversal_pair(unique_constraints)
+        if pair is not None:
+            cnf.append([variables[pair]])
+
     solutions = []
-    solution_list = itertools.islice(pycosat.itersolve(cnf), limit)
-
-    for sol in solution_list:
-        c = list()
-        for var in sol:
-            if var >  0: #true variables are positive, false are negative
-                c.append(reverse_clauses[var])
-            solutions.append(c)
-    
+    for sol in itertools.islice(pycosat.itersolve(cnf), limit):
+        # True variables are positive, false ones negative.
+        solutions.append([pairs[var] for var in sol if var > 0])
     return solutions
 
-def solve(num_wizards, num_constraints, wizards, constraints):
+ENCODINGS = ['literal', 'pair']
+ENGINES = ['sat', 'backtrack', 'local', 'anneal', 'portfolio']
+DEFAULT_TIME_LIMIT = 10
+MIN_COMPONENT_TIME = 0.01   # Seconds each component gets even once the time_limit is spent.
+OLD_ENCODING_LIMIT = 1000   # Models enumerated by the pycosatSolve portfolio strategy.
+
+def sat_ordering(num_wizards, constraints, encoding='literal', constrained_only=False,
+                 lazy=False, log=None, symmetry=False, backend=None):
+    """
+    :param num_wizards: number of interned wizards
+    :param constraints: list of integer triples, see `src.instance`
+    :param encoding: 'literal' for one variable per ordered pair,
+                     'pair' for one variable per unordered pair
+    :param constrained_only: literal encoding only, restrict transitivity clauses
+                             to triangles touching a constrained pair
+    :param lazy: literal encoding only, add transitivity clauses on demand,
+                 see `sr.refine_pycosat`
+    :param log: optional sr.RefinementLog filled in by lazy refinement
+    :param symmetry: add symmetry-breaking clauses, see `sr.symmetry_pairs`
+    :param backend: SAT solver from `src.sat_backend.get_backend`, pycosat if None
+    :return: list of wizard ids, or None if the constraints are unsatisfiable
+    """
+    import src.sat_reduce as sr
+
+    if encoding == 'pair':
+        P = sr.PairTranslator(num_wizards)
+        cnf = sr.reduce_pycosat_pairs(constraints, P, symmetry)
+        solution = sr.solve_pycosat(cnf, backend)
+        if solution in ("UNSAT", "UNKNOWN"):
+            return None
+        with instrument.PROFILER.phase("ordering"):
+            return sr.ordering_pycosat_pairs(solution, P)
+    else:
+        L = sr.LiteralTranslator(num_wizards)
+        if lazy:
+            solution = sr.refine_pycosat(constraints, L, log=log, symmetry=symmetry, backend=backend)
+        else:
+            solution = sr.solve_pycosat(sr.reduce_pycosat(constraints, L, constrained_only, symmetry),
+                                        backend)
+        if solution in ("UNSAT", "UNKNOWN"):
+            return None
+        with instrument.PROFILER.phase("ordering"):
+            return sr.ordering_pycosat(solution, L)
+
+def old_encoding_ordering(num_wizards, constraints, time_limit=None):
+    """
+    Portfolio strategy for the pycosatSolve encoding, which has no transitivity
+    clauses: linearize each acyclic model and keep the best scoring ordering.
+    """
+    import src.dag_utils as dg
+    import src.scoring as scoring
+
+    C = scoring.constraint_array(constraints)
+    best, best_amt_of_constraints = None, -1
+    for sol in pycosatSolve(constraints, OLD_ENCODING_LIMIT):
+        try:
+            s = dg.topological_order(num_wizards, sol)
+        except dg.CycleError:
+            continue
+        satisfied_constraints = int(scoring.score_orderings(s, C)[0])
+        if satisfied_constraints > best_amt_of_constraints:
+            best, best_amt_of_constraints = s, satisfied_constraints
+        if satisfied_constraints == len(constraints):
+            break
+    return best
+
+def backtrack_ordering(num_wizards, constraints, time_limit=None):
+    """
+    :return: ordering found by `src.backtrack.BacktrackSearch`, or None
+    """
+    from src.backtrack import BacktrackSearch
+    return BacktrackSearch(num_wizards, constraints, time_limit=time_limit).solve()
+
+def local_ordering(num_wizards, constraints, time_limit=None, iterations=None, initial=None):
+    """
+    :return: best ordering found by `src.local_search.local_search`
+    """
+    from src.local_search import local_search
+    return local_search(num_wizards, constraints, initial, iterations=iterations,
+                        time_limit=time_limit)[0]
+
+def anneal_ordering(num_wizards, constraints, time_limit=None, iterations=None, workers=1,
+                    initial=None):
+    """
+    :return: best ordering found by `src.annealing.parallel_anneal`
+    """
+    from src.annealing import parallel_anneal
+    return parallel_anneal(num_wizards, constraints, initial, workers=workers,
+                           iterations=iterations, time_limit=time_limit)[0]
+
+PORTFOLIO = [
+    ('sat', lambda n, constraints, time_limit: sat_ordering(n, constraints)),
+    ('lazy', lambda n, constraints, time_limit: sat_ordering(n, constraints, lazy=True)),
+    ('old_encoding', old_encoding_ordering),
+    ('backtrack', lambda n, constraints, time_limit: backtrack_ordering(n, constraints)),
+    ('local', local_ordering),
+    ('anneal', anneal_ordering),
+]
+
+# Modules each engine may import, including the scorer and the local search fallback.
+ENGINE_MODULES = {
+    'sat': ['pycosat', 'src.sat_reduce', 'src.local_search', 'src.scoring'],
+    'backtrack': ['src.backtrack', 'src.local_search', 'src.scoring'],
+    'local': ['src.local_search', 'src.scoring'],
+    'anneal': ['src.annealing', 'src.scoring'],
+}
+ENGINE_MODULES['portfolio'] = sorted(set(sum(ENGINE_MODULES.values(), ['src.portfolio'])))
+
+def preload_engine(engine):
+    """
+    Import everything `engine` needs up front. Call before forking workers, so
+    each child does not import the engine again.
+    """
+    for module in ENGINE_MODULES[engine]:
+        importlib.import_module(module)
+
+def solve_component(num_wizards, constraints, encoding='literal', constrained_only=False,
+                    lazy=False, log=None, engine='sat', iterations=None, time_limit=None,
+                    workers=None, symmetry=False, initial=None, backend=None):
+    """
+    Order one connected component, see `solve` for the options.
+    :param num_wizards: number of interned wizards
+    :param constraints: list of canonical integer triples, see `src.preprocess`
+    :param initial: ordering the local search and annealing start from, random if None
+    :return: tuple (ordering of wizard ids, engine that produced it)
+    """
+    profiler = instrument.PROFILER
+    ordering = None
+    if engine == 'portfolio':
+        import src.portfolio as portfolio
+        preload_engine(engine)
+        deadline = time.time() + (time_limit or DEFAULT_TIME_LIMIT)
+        with profiler.phase("portfolio"):
+            winner, ordering, _ = portfolio.race(PORTFOLIO, num_wizards, constraints,
+                                                 time_limit or DEFAULT_TIME_LIMIT)
+        engine = 'portfolio:{0}'.format(winner) if ordering is not None else 'local'
+        # The fallback gets what is left of the race's budget, not a new one.
+        time_limit = max(0.0, deadline - time.time())
+    elif engine == 'sat':
+        ordering = sat_ordering(num_wizards, constraints, encoding, constrained_only, lazy, log,
+                                symmetry, backend)
+        if ordering is None:
+            engine = 'local'
+    elif engine == 'backtrack':
+        with profiler.phase("backtrack"):
+            ordering = backtrack_ordering(num_wizards, constraints, time_limit)
+        if ordering is None:
+            engine = 'local'
+    if ordering is None:
+        if iterations is None and time_limit is None:
+            time_limit = DEFAULT_TIME_LIMIT
+        if engine == 'anneal':
+            with profiler.phase("anneal"):
+                ordering = anneal_ordering(num_wizards, constraints, time_limit, iterations,
+                                           workers, initial)
+        else:
+            with profiler.phase("local_search"):
+                ordering = local_ordering(num_wizards, constraints, time_limit, iterations, initial)
+    return ordering, engine
+
+def solve(num_wizards, num_constraints, wizards, constraints, encoding='literal',
+          constrained_only=False, lazy=False, log=None, stats=None, engine='sat',
+          iterations=None, time_limit=None, workers=None, symmetry=False, cache=None,
+          backend=None):
     """
     Write your algorithm here.
     Input:
@@ -142,36 +293,130 @@ def solve(num_wizards, num_constraints, wizards, constraints):
         wizards: An array of wizard names, in no particular order
         constraints: A 2D-array of constraints, 
                      where constraints[0] may take the form ['A', 'B', 'C']i
+        encoding: SAT encoding to use, one of ENCODINGS
+        constrained_only, lazy, log, symmetry, backend: see `sat_ordering`
+        stats: optional dict, receives the preprocessing counts under 'removed',
+               the sizes of the independent components under 'components',
+               (before, after) peeling wizard and constraint counts under 'kernel',
+               the engines that produced the ordering under 'engine' and the
+               number of satisfied constraints under 'satisfied'
+        engine: one of ENGINES. 'sat' and 'backtrack' fall back to local search
+                when the constraints are unsatisfiable or out of time. 'portfolio' races the PORTFOLIO
+                strategies and keeps the first complete or best ordering
+        iterations, time_limit: local search and annealing budget,
+                                DEFAULT_TIME_LIMIT seconds if neither is given.
+                                time_limit is the portfolio deadline. Both are
+                                for the whole instance, split across components
+        workers: annealing process pool size, one per core if None
+        cache: optional src.cache.ResultCache. A cached ordering satisfying every
+               constraint is returned without solving, a partial one is where
+               local search and annealing start; 'cache' in stats is 'hit',
+               'warm' or 'miss'
+
+    Wizards that are only ever the middle of a constraint are peeled off to the
+    end first, see `peel_constraints`. The remaining kernel is split into
+    components sharing no constraint, each ordered on its own and concatenated;
+    wizards in no constraint go in between.
 
     Output:
         An array of wizard names in the ordering your algorithm returns
     """
-    # unique_constraints = remove_bad_constraints(constraints)
-
-    # TODO: Rethink SAT Reduction
-    # solutions = pycosatSolve(constraints, 30000)
-    # best_amt_of_constraints = 0
-    # best_solution = list()
-    # for sol in solutions:
-    #     g = dg.build_dag(sol)
-    #     s = dg.linearize(g)
-    #     satisfied_constraints = num_constraints_satisfied(num_wizards, constraints, s)
-    #     if satisfied_constraints > best_amt_of_constraints:
-    #         best_solution = s
-    #         best_amt_of_constraints = satisfied_constraints
-    #     if(satisfied_constraints == num_constraints):
-    #         break
-
-    L = sr.LiteralTranslator()
-    cnf = sr.reduce_pycosat(constraints, L)
-    solution = sr.solve_pycosat(cnf)
-    literals = sr.translate_pycosat(solution, L)
-
-    G = dg.build_dag(literals)
-    return dg.linearize(G)
-
-    print("Satisfied {0}/{1} constraints".format(best_amt_of_constraints, num_constraints))
-    return best_solution
+    names, int_constraints = intern_constraints(constraints, wizards)
+    ordering = solve_ids(len(names), int_constraints, encoding, constrained_only, lazy, log, stats,
+                         engine, iterations, time_limit, workers, symmetry, cache, backend)
+    return name_ordering(ordering, names)
+
+def solve_ids(num_wizards, constraints, encoding='literal', constrained_only=False, lazy=False,
+              log=None, stats=None, engine='sat', iterations=None, time_limit=None, workers=None,
+              symmetry=False, cache=None, backend=None, initial=None):
+    """
+    `solve` on interned wizards, for callers that already hold ids, such as the
+    (m, 3) array returned by `src.instance.read_instance`. An array stays one
+    through canonicalization and scoring; only the kept constraints become tuples.
+    :param num_wizards: number of interned wizards
+    :param constraints: list of integer triples or (m, 3) array of wizard ids
+    :param initial: ordering the local search and annealing start from, unless the
+                    cache has one; the result satisfies at least as many constraints
+    :return: ordering of the wizard ids 0 .. num_wizards - 1
+    """
+    profiler = instrument.PROFILER
+    with profiler.phase("preprocess"):
+        if isinstance(constraints, list):
+            int_constraints, removed = canonicalize_constraints(constraints)
+        else:
+            int_constraints, removed = canonicalize_array(constraints)
+        kernel, peeled = peel_constraints(num_wizards, int_constraints)
+        components, isolated = connected_components(num_wizards, kernel)
+    profiler.count("wizards", num_wizards)
+    profiler.count("constraints", len(constraints))
+    profiler.count("constraints_deduped", removed[DUPLICATE])
+    profiler.count("constraints_removed", sum(removed.values()))
+    profiler.count("constraints_kernel", len(kernel))
+    if stats is None:
+        stats = {}
+    stats['removed'] = removed
+    stats['components'] = [len(component) for component, _ in components]
+    stats['kernel'] = {'wizards': (len(set(w for c in int_constraints for w in c)),
+                                   sum(stats['components'])),
+                       'constraints': (len(int_constraints), len(kernel))}
+
+    import src.scoring as scoring
+    C = scoring.constraint_array(constraints)
+    initial_engine = 'initial'
+    if cache is not None:
+        from src.cache import canonical_hash
+        with profiler.phase("cache"):
+            key, labels = canonical_hash(num_wizards, constraints if isinstance(constraints, list)
+                                         else constraints.tolist())
+            cached = cache.load(key, labels)
+        stats['cache'] = 'miss' if cached is None else 'warm'
+        if cached is not None:
+            initial, initial_engine = cached, 'cache'
+    if initial is not None:
+        cached_satisfied = int(scoring.score_orderings(initial, C)[0])
+        if initial_engine == 'cache' and cached_satisfied == len(constraints):
+            stats['cache'] = 'hit'
+            stats['engine'] = 'cache'
+            stats['satisfied'] = cached_satisfied
+            return initial
+    position = None if initial is None else {w: i for i, w in enumerate(initial)}
+
+    if iterations is None and time_limit is None and engine in ('portfolio', 'local', 'anneal'):
+        time_limit = DEFAULT_TIME_LIMIT
+    # The budget is for the whole instance: each component gets a share of what is
+    # left in proportion to its constraints, so time one leaves unused carries over.
+    deadline = None if time_limit is None else time.time() + time_limit
+    remaining = len(kernel)
+
+    ordering, engines = [], []
+    for component, component_constraints in components:
+        component_initial = None if position is None else \
+            sorted(range(len(component)), key=lambda i: position[component[i]])
+        share = float(len(component_constraints)) / remaining
+        remaining -= len(component_constraints)
+        component_time = None if deadline is None else \
+            max(MIN_COMPONENT_TIME, share * (deadline - time.time()))
+        component_iterations = None if iterations is None else \
+            max(1, iterations * len(component_constraints) // len(kernel))
+        local_ordering, local_engine = solve_component(
+            len(component), component_constraints, encoding, constrained_only, lazy, log,
+            engine, component_iterations, component_time, workers, symmetry, component_initial,
+            backend)
+        ordering.extend(component[i] for i in local_ordering)
+        if local_engine not in engines:
+            engines.append(local_engine)
+    peeled_set = set(peeled)
+    ordering.extend(w for w in isolated if w not in peeled_set)
+    ordering.extend(reversed(peeled))
+
+    stats['engine'] = ','.join(engines) or engine
+    stats['satisfied'] = int(scoring.score_orderings(ordering, C)[0])
+    if initial is not None and cached_satisfied > stats['satisfied']:
+        ordering, stats['satisfied'], stats['engine'] = initial, cached_satisfied, initial_engine
+    if cache is not None:
+        with profiler.phase("cache"):
+            cache.store(key, labels, ordering, stats['satisfied'], len(constraints))
+    return ordering
 
 """
 ======================================================================
@@ -201,10 +446,98 @@ def write_output(filename, solution):
 
 if __name__=="__main__":
     parser = argparse.ArgumentParser(description = "Constraint Solver.")
-    parser.add_argument("input_file", type=str, help = "___.in")
-    parser.add_argument("output_file", type=str, help = "___.out")
+    parser.add_argument("input_file", type=str, nargs = "?", help = "___.in")
+    parser.add_argument("output_file", type=str, nargs = "?", help = "___.out")
+    parser.add_argument("--encoding", choices = ENCODINGS, default = "literal",
+                        help = "SAT encoding of the wizard ordering")
+    parser.add_argument("--constrained-only", action = "store_true",
+                        help = "only write transitivity clauses for triangles touching a constrained pair")
+    parser.add_argument("--lazy", action = "store_true",
+                        help = "add transitivity clauses only for cycles found in the model")
+    parser.add_argument("--symmetry", action = "store_true",
+                        help = "add clauses breaking the reversal and interchangeable wizard symmetries")
+    parser.add_argument("--sat-solver", default = "pycosat", metavar = "CMD",
+                        help = "pycosat, or the command line of a local DIMACS solver, with {input} "
+                               "and {output} standing for the formula and answer files")
+    parser.add_argument("--sat-timeout", type = float, default = None,
+                        help = "seconds an external SAT solver may run before falling back")
+    parser.add_argument("--engine", choices = ENGINES, default = "sat",
+                        help = "solver engine, 'sat' and 'backtrack' fall back to 'local' when unsatisfiable")
+    parser.add_argument("--portfolio", action = "store_const", dest = "engine", const = "portfolio",
+                        help = "race all engines, same as --engine portfolio")
+    parser.add_argument("--iterations", type = int, default = None,
+                        help = "local search and annealing move budget")
+    parser.add_argument("--time-limit", type = float, default = None,
+                        help = "local search and annealing time budget in seconds")
+    parser.add_argument("--workers", type = int, default = None,
+                        help = "annealing processes, or server workers with --serve; one per core by default")
+    parser.add_argument("--serve", nargs = "?", const = "-", metavar = "SOCKET",
+                        help = "keep running and solve the .in instances read from a Unix socket, "
+                               "or from stdin if no path is given; answers are JSON lines")
+    parser.add_argument("--queue-size", type = int, default = None,
+                        help = "instances the server reads ahead of its workers")
+    parser.add_argument("--cache", nargs = "?", const = True, metavar = "DIR",
+                        help = "reuse orderings found for earlier copies of an instance, "
+                               "under DIR (.solver_cache if not given)")
+    parser.add_argument("--cache-size", type = int, default = None,
+                        help = "cached instances kept before the least recently used are evicted")
+    parser.add_argument("--mmap", action = "store_true",
+                        help = "map the input file instead of reading it, for very large instances")
+    parser.add_argument("--profile", nargs = "?", const = "-", metavar = "FILE",
+                        help = "record the time and peak memory of each phase, and clause counts, "
+                               "as a JSON line appended to FILE or printed")
+    parser.add_argument("--verbose", action = "store_true",
+                        help = "report constraints removed by preprocessing")
     args = parser.parse_args()
 
-    num_wizards, num_constraints, wizards, constraints = read_input(args.input_file)
-    solution = solve(num_wizards, num_constraints, wizards, constraints)
-    write_output(args.output_file, solution)
+    from src.sat_backend import get_backend
+    if args.serve:
+        from src.server import SolverServer, DEFAULT_QUEUE_SIZE
+        options = {'encoding': args.encoding, 'constrained_only': args.constrained_only,
+                   'lazy': args.lazy, 'symmetry': args.symmetry, 'engine': args.engine,
+                   'backend': get_backend(args.sat_solver, args.sat_timeout),
+                   'iterations': args.iterations, 'time_limit': args.time_limit}
+        server = SolverServer(args.workers, args.queue_size or DEFAULT_QUEUE_SIZE, options,
+                              ENGINE_MODULES[args.engine])
+        server.run(None if args.serve == "-" else args.serve)
+        sys.exit(0)
+    if args.input_file is None or args.output_file is None:
+        parser.error("input_file and output_file are required unless --serve is given")
+
+    if args.profile:
+        instrument.enable()
+    with instrument.PROFILER.phase("read"):
+        num_wizards, names, constraints = read_instance(args.input_file, args.mmap)
+    num_constraints = len(constraints)
+    log = None
+    if args.lazy:
+        import src.sat_reduce as sr
+        log = sr.RefinementLog()
+    cache = None
+    if args.cache:
+        from src.cache import ResultCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_ENTRIES
+        cache = ResultCache(DEFAULT_CACHE_DIR if args.cache is True else args.cache,
+                            args.cache_size or DEFAULT_MAX_ENTRIES)
+    stats = {}
+    ordering = solve_ids(len(names), constraints, args.encoding, args.constrained_only, args.lazy,
+                         log, stats, args.engine, args.iterations, args.time_limit, args.workers,
+                         args.symmetry, cache, get_backend(args.sat_solver, args.sat_timeout))
+    with instrument.PROFILER.phase("write"):
+        write_output(args.output_file, name_ordering(ordering, names))
+    if args.profile:
+        record = instrument.disable().record(input=args.input_file, engine=stats['engine'],
+                                             satisfied=stats['satisfied'], total=num_constraints)
+        instrument.write_record(record, None if args.profile == "-" else args.profile)
+    if args.verbose:
+        print("Removed constraints: {0}".format(stats['removed']))
+        print("Kernel: {0[0]} -> {0[1]} wizards, {1[0]} -> {1[1]} constraints".format(
+            stats['kernel']['wizards'], stats['kernel']['constraints']))
+        print("Component sizes: {0}".format(stats['components']))
+        if cache is not None:
+            print("Cache: {0}".format(stats['cache']))
+    if stats['satisfied'] < num_constraints or args.verbose:
+        print("Satisfied {0}/{1} constraints ({2})".format(
+            stats['satisfied'], num_constraints, stats['engine']))
+    if args.lazy:
+        print("Lazy refinement: {0} rounds, clauses added per round: {1}".format(
+            log.rounds, log.clauses_added))
@@ -32,13 +32,7 @@ def randomly_select_constraints(constraints, n):
     :param n: number of constraints selected
     :return: n-sized list of randomly picked elements from `constraints`
     """
-    constraints_copy = list(constraints)
-    selected = []
-    for _ in range(n):
-        index = random.randrange(len(constraints_copy))
-        c = constraints_copy.pop(index)
-        selected.append(c)
-    return selected
+    return random.sample(constraints, n)
 
 def all_wizards(constraints, n):
     """
@@ -73,13 +67,95 @@ def insert_duplicates(constraints, n):
     """
     DOES NOT MUTATE `constraints`
     :param constraints: Constraints to
-    :param n:
+    :param n: number of degenerate copies, see DUPLICATE_FORMS, added at random positions
     :return: new list
     """
-    c = list(constraints)
-    for i in range(n):
-        rand = random.randrange(len(constraints))
-        triplet = constraints[rand]
+    duplicates = []
+    for _ in range(n):
+        triplet = constraints[random.randrange(len(constraints))]
         i, j, k = DUPLICATE_FORMS[random.randrange(len(DUPLICATE_FORMS))]
-        c = insert_random(c, (triplet[i], triplet[j], triplet[k]))
-    return c
+        duplicates.append((triplet[i], triplet[j], triplet[k]))
+    # Slots of the result holding a duplicate, in one pass instead of n inserts.
+    slots = set(random.sample(range(len(constraints) + n), n))
+    originals, copies = iter(constraints), iter(duplicates)
+    return [next(copies) if i in slots else next(originals) for i in range(len(constraints) + n)]
+
+def sample_constraints(num_wizards, num_constraints, rng):
+    """
+    Draw distinct constraints that hold for the ordering 0 .. num_wizards - 1
+    without listing all of them. A constraint is fixed by its three positions
+    p < q < r and by whether p or r is the one not in between, so there are
+    2 * C(n, 3) of them; random triples are drawn in bulk and repeats dropped
+    until there are enough. The first constraints partition the wizards into
+    triples, so every wizard appears at least once.
+
+    :param rng: numpy.random.Generator
+    :return: (num_constraints, 3) int64 array of (a, b, c), c not between a and b,
+             in random order and with random end order
+    :raises ValueError: if the wizards cannot be covered or there are not enough constraints
+    """
+    import numpy as np
+
+    n = num_wizards
+    total = n * (n - 1) * (n - 2) // 3
+    if n < 3 or 3 * num_constraints < n:
+        raise ValueError("{0} constraints cannot cover {1} wizards".format(num_constraints, n))
+    if num_constraints > total:
+        raise ValueError("only {0} distinct constraints exist for {1} wizards".format(total, n))
+
+    def keys(positions):
+        positions.sort(axis=1)
+        side = rng.integers(0, 2, len(positions))
+        return ((positions[:, 0] * n + positions[:, 1]) * n + positions[:, 2]) * 2 + side
+
+    cover = rng.permutation(n)
+    if n % 3:
+        # The wizards left over share a triple with others picked from the rest.
+        padding = rng.choice(n - n % 3, 3 - n % 3, replace=False)
+        cover = np.concatenate([cover, cover[padding]])
+    covering = np.sort(keys(cover.reshape(-1, 3)))
+
+    drawn = np.empty(0, dtype=np.int64)
+    while len(drawn) + len(covering) < num_constraints:
+        need = num_constraints - len(drawn) - len(covering)
+        free = 1.0 - float(len(drawn) + len(covering)) / total
+        positions = rng.integers(0, n, size=(int(1.2 * need / free) + 16, 3))
+        positions = positions[(positions[:, 0] != positions[:, 1]) &
+                              (positions[:, 1] != positions[:, 2]) &
+                              (positions[:, 0] != positions[:, 2])]
+        drawn = np.concatenate([drawn, keys(positions)])
+        drawn.sort()
+        repeated = np.zeros(len(drawn), dtype=bool)
+        repeated[1:] = drawn[1:] == drawn[:-1]
+        index = np.minimum(np.searchsorted(covering, drawn), len(covering) - 1)
+        drawn = drawn[~repeated & (covering[index] != drawn)]
+    # Sorted keys are not in random order: pick the ones kept at random, then shuffle.
+    drawn = drawn[rng.permutation(len(drawn))[:num_constraints - len(covering)]]
+    found = np.concatenate([covering, drawn])
+    found = found[rng.permutation(len(found))]
+
+    side = found % 2
+    found //= 2
+    p, q, r = found // (n * n), found // n % n, found % n
+    a, b, c = np.where(side, p, q), np.where(side, q, r), np.where(side, r, p)
+    swap = rng.integers(0, 2, len(found)).astype(bool)
+    return np.stack([np.where(swap, b, a), np.where(swap, a, b), c], axis=1)
+
+def sample_duplicates(constraints, num_duplicates, rng):
+    """
+    Vectorized `insert_duplicates` for arrays from `sample_constraints`.
+    :param rng: numpy.random.Generator
+    :return: new array with `num_duplicates` degenerate copies at random rows
+    """
+    import numpy as np
+
+    m = len(constraints)
+    sources = constraints[rng.integers(0, m, num_duplicates)]
+    forms = np.array(DUPLICATE_FORMS)[rng.integers(0, len(DUPLICATE_FORMS), num_duplicates)]
+    duplicates = np.take_along_axis(sources, forms, axis=1)
+    result = np.empty((m + num_duplicates, 3), dtype=constraints.dtype)
+    slots = np.zeros(m + num_duplicates, dtype=bool)
+    slots[rng.choice(m + num_duplicates, num_duplicates, replace=False)] = True
+    result[slots] = duplicates
+    result[~slots] = constraints
+    return result
@@ -0,0 +1,138 @@
+import math
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from src.local_search import OrderingState
+
+DEFAULT_ITERATIONS = 200000
+CHECK_EVERY = 1000          # Moves between looks at the clock and the shared best.
+
+def anneal(num_wizards, constraints, initial=None, iterations=None, time_limit=None, seed=None,
+           t_start=2.0, t_end=0.02, best=None):
+    """
+    Simulated annealing over orderings with random insert and swap moves, scored
+    by OrderingState deltas. The temperature cools geometrically from `t_start`
+    to `t_end` over the iteration or time budget.
+    :param num_wizards: number of interned wizards
+    :param constraints: list of integer triples, see `src.instance`
+    :param initial: starting ordering of wizard ids, random if None
+    :param iterations: number of moves, DEFAULT_ITERATIONS if no budget is given
+    :param time_limit: number of seconds
+    :param seed: seed for the random moves
+    :param best: optional shared multiprocessing.Value holding the best count found
+                 by any run; the run publishes to it and stops once it reaches
+                 the number of constraints
+    :return: tuple (best ordering, number of constraints it satisfies)
+    """
+    rng = random.Random(seed)
+    if initial is None:
+        initial = list(range(num_wizards))
+        rng.shuffle(initial)
+    state = OrderingState(num_wizards, constraints, initial)
+    best_order, best_satisfied = list(state.order), state.satisfied
+    total = len(state.constraints)
+    if iterations is None and time_limit is None:
+        iterations = DEFAULT_ITERATIONS
+    start = time.time()
+
+    i = 0
+    progress = 0.0
+    while best_satisfied < total and num_wizards > 1:
+        if i % CHECK_EVERY == 0:
+            if time_limit is not None:
+                progress = max(progress, (time.time() - start) / time_limit if time_limit > 0
+                                         else 1.0)
+            if iterations is not None:
+                progress = max(progress, float(i) / iterations)
+            if progress >= 1:
+                break
+            if best is not None and best.value >= total:
+                break
+            temperature = t_start * (t_end / t_start) ** progress
+        i += 1
+
+        w = rng.randrange(num_wizards)
+        if rng.random() < 0.5:
+            v = rng.randrange(num_wizards)
+            delta = state.insert_delta(w, v)
+            if delta >= 0 or rng.random() < math.exp(delta / temperature):
+                state.apply_insert(w, v)
+        else:
+            v = rng.randrange(num_wizards)
+            delta = state.swap_delta(w, v)
+            if delta >= 0 or rng.random() < math.exp(delta / temperature):
+                state.apply_swap(w, v)
+
+        if state.satisfied > best_satisfied:
+            best_order, best_satisfied = list(state.order), state.satisfied
+            if best is not None:
+                with best.get_lock():
+                    best.value = max(best.value, best_satisfied)
+
+    return best_order, best_satisfied
+
+# Set once per worker process by `_init_worker`, so tasks only carry a seed.
+_worker = {}
+
+def _init_worker(num_wizards, constraints, best):
+    _worker['num_wizards'] = num_wizards
+    _worker['constraints'] = constraints
+    _worker['best'] = best
+
+def _run(initial, iterations, deadline, seed):
+    time_limit = None if deadline is None else deadline - time.time()
+    if time_limit is not None and time_limit <= 0:
+        return None, -1     # Queued behind other restarts until the budget was spent.
+    return anneal(_worker['num_wizards'], _worker['constraints'], initial, iterations,
+                  time_limit, seed, best=_worker['best'])
+
+def parallel_anneal(num_wizards, constraints, initial=None, restarts=None, workers=None,
+                    iterations=None, time_limit=None, seed=0):
+    """
+    Run independent annealing restarts with seeds seed, seed + 1, ... across a
+    process pool. The workers share the best count found so far and all stop as
+    soon as one of them satisfies every constraint.
+    :param restarts: number of runs, one per worker if None
+    :param workers: pool size, os.cpu_count() if None. 1 runs in this process.
+    :param iterations: moves of each run
+    :param time_limit: seconds for the whole call: each run gets what is left when it
+                       starts, and runs that start after that are skipped
+    :return: tuple (best ordering, number of constraints it satisfies)
+    """
+    workers = workers or os.cpu_count() or 1
+    restarts = restarts or workers
+    total = len(constraints)
+    best = multiprocessing.Value('i', -1)
+    best_order, best_satisfied = None, -1
+    deadline = None if time_limit is None else time.time() + time_limit
+
+    if workers == 1:
+        for r in range(restarts):
+            remaining = None if deadline is None else deadline - time.time()
+            if remaining is not None and remaining <= 0 and best_order is not None:
+                break
+            order, satisfied = anneal(num_wizards, constraints, initial, iterations, remaining,
+                                      seed + r, best=best)
+            if satisfied > best_satisfied:
+                best_order, best_satisfied = order, satisfied
+            if best_satisfied >= total:
+                break
+        return best_order, best_satisfied
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(num_wizards, constraints, best)) as pool:
+        futures = [pool.submit(_run, initial, iterations, deadline, seed + r)
+                   for r in range(restarts)]
+        for future in as_completed(futures):
+            order, satisfied = future.result()
+            if satisfied > best_satisfied:
+                best_order, best_satisfied = order, satisfied
+            if best_satisfied >= total:
+                for f in futures:
+                    f.cancel()
+                break
+
+    return best_order, best_satisfied
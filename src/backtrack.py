@@ -0,0 +1,239 @@
+import random
+import sys
+import time
+
+RESTART_NODES = 100         # Node limit of the first restart, doubled after each.
+
+class BacktrackSearch(object):
+    """
+    Builds an ordering by inserting one wizard at a time into the gaps of a
+    partial ordering. Insertions never change the relative order of placed
+    wizards, so a constraint only matters once two of its wizards are placed:
+    from then on it watches its last wizard and restricts the gaps that wizard
+    may take. Domains are bitmasks of gaps; the wizard with the fewest allowed
+    gaps is placed next, and an empty domain prunes the branch. No CNF is built.
+
+    search = BacktrackSearch(3, [(0, 1, 2)])
+    search.solve()          # i.e. [2, 0, 1], or None if unsatisfiable
+    search.nodes            # number of placements tried
+    """
+    def __init__(self, num_wizards, constraints, node_limit=None, time_limit=None, seed=None):
+        self.n = num_wizards
+        self.constraints = [c for c in constraints if len(set(c)) == 3]
+        self.index = [[] for _ in range(num_wizards)]
+        for k, (a, b, c) in enumerate(self.constraints):
+            self.index[a].append(k)
+            self.index[b].append(k)
+            self.index[c].append(k)
+        self.node_limit = node_limit
+        self.time_limit = time_limit
+        self.seed = seed
+        self.nodes = 0
+        self.exhausted = False      # True if the budget ran out before an answer.
+
+    def __allowed(self, x, gaps):
+        """
+        :return: bitmask of the gaps `x` may be inserted into, given its watched constraints
+        """
+        pos = self.pos
+        mask = (1 << gaps) - 1
+        for k in self.watching[x]:
+            a, b, c = self.constraints[k]
+            if x == c:
+                # Gap g puts c between the ends iff lo < g <= hi.
+                lo, hi = min(pos[a], pos[b]), max(pos[a], pos[b])
+                mask &= ~(((1 << (hi + 1)) - 1) ^ ((1 << (lo + 1)) - 1))
+            else:
+                other = b if x == a else a
+                # The end must stay on the same side of c as the other end.
+                before = (1 << (pos[c] + 1)) - 1
+                mask &= before if pos[other] < pos[c] else ~before
+            if not mask:
+                break
+        return mask & ((1 << gaps) - 1)
+
+    def __narrow(self, domains, x, mask):
+        """
+        :return: None if the domain of `x` became empty, else whether it changed
+        """
+        if not domains[x] & ~mask:
+            return False
+        domains[x] &= mask
+        return None if not domains[x] else True
+
+    def __propagate(self, domains):
+        """
+        Narrow the domains of constraints with one placed wizard until nothing changes.
+        A placed middle c splits the gaps into those before and after it, and both
+        unplaced ends must land on the same side. Once the unplaced middle is known to
+        be on one side of a placed end, the other end must lie beyond the middle;
+        for gaps this only gives bounds, since two wizards may share a gap.
+        The first pass visits every constraint in `single`, later passes only the
+        ones of wizards whose domain the pass before narrowed.
+        :return: False if some domain becomes empty
+        """
+        pos, index, single = self.pos, self.index, self.single
+        ks = single
+        while ks:
+            narrowed_wizards = set()
+            for k in ks:
+                a, b, c = self.constraints[k]
+                if pos[c] >= 0:
+                    before = (1 << (pos[c] + 1)) - 1
+                    for x, y in ((a, b), (b, a)):
+                        if not domains[x] & ~before:
+                            result = self.__narrow(domains, y, before)
+                        elif not domains[x] & before:
+                            result = self.__narrow(domains, y, ~before)
+                        else:
+                            continue
+                        if result is None:
+                            return False
+                        if result:
+                            narrowed_wizards.add(y)
+                    continue
+
+                other = b if pos[a] >= 0 else a
+                before = (1 << (pos[a if other == b else b] + 1)) - 1
+                low = lambda x: (domains[x] & -domains[x]).bit_length() - 1
+                high = lambda x: domains[x].bit_length() - 1
+                if not domains[c] & ~before:
+                    # c before the placed end, so other >= c.
+                    narrowed = ((other, ~((1 << low(c)) - 1)), (c, (1 << (high(other) + 1)) - 1))
+                elif not domains[c] & before:
+                    # c after the placed end, so other <= c.
+                    narrowed = ((other, (1 << (high(c) + 1)) - 1), (c, ~((1 << low(other)) - 1)))
+                else:
+                    continue
+                for x, mask in narrowed:
+                    result = self.__narrow(domains, x, mask)
+                    if result is None:
+                        return False
+                    if result:
+                        narrowed_wizards.add(x)
+            ks = set(j for x in narrowed_wizards for j in index[x] if j in single)
+        return True
+
+    def __place(self, x, g):
+        seq, pos = self.seq, self.pos
+        seq.insert(g, x)
+        for i in range(g, len(seq)):
+            pos[seq[i]] = i
+        woken = []
+        for k in self.index[x]:
+            self.count[k] += 1
+            if self.count[k] == 1:
+                self.single.add(k)
+            elif self.count[k] == 2:
+                self.single.discard(k)
+                for w in self.constraints[k]:
+                    if pos[w] < 0:
+                        self.watching[w].append(k)
+                        woken.append(w)
+        return woken
+
+    def __unplace(self, x, g, woken):
+        for w in woken:
+            self.watching[w].pop()
+        for k in self.index[x]:
+            self.count[k] -= 1
+            if self.count[k] == 1:
+                self.single.add(k)
+            elif self.count[k] == 0:
+                self.single.discard(k)
+        seq, pos = self.seq, self.pos
+        seq.pop(g)
+        pos[x] = -1
+        for i in range(g, len(seq)):
+            pos[seq[i]] = i
+
+    def __search(self):
+        gaps = len(self.seq) + 1
+        if gaps > self.n:
+            return True
+        self.nodes += 1
+        if self.node_limit is not None and self.nodes > self.node_limit:
+            self.exhausted = True
+        elif self.deadline is not None and self.nodes % 256 == 0 and time.time() > self.deadline:
+            self.exhausted = True
+        if self.attempt_limit is not None and self.nodes > self.attempt_limit:
+            self.cut_off = True
+        if self.exhausted or self.cut_off:
+            return False
+
+        domains = {}
+        for x in range(self.n):
+            if self.pos[x] < 0:
+                domains[x] = self.__allowed(x, gaps)
+                if not domains[x]:
+                    return False
+        if not self.__propagate(domains):
+            return False
+
+        # Fewest allowed gaps first, then most constraints.
+        best, best_mask, best_key = None, 0, None
+        for x, mask in domains.items():
+            key = (bin(mask).count('1'), -len(self.index[x]), self.tiebreak[x])
+            if best_key is None or key < best_key:
+                best, best_mask, best_key = x, mask, key
+        if gaps == 2:
+            best_mask &= 2      # Reversal symmetry: the second wizard goes after the first.
+
+        gaps = []
+        while best_mask:
+            low = best_mask & -best_mask
+            best_mask ^= low
+            gaps.append(low.bit_length() - 1)
+        self.rng.shuffle(gaps)
+        for g in gaps:
+            woken = self.__place(best, g)
+            if self.__search():
+                return True
+            self.__unplace(best, g, woken)
+            if self.exhausted or self.cut_off:
+                return False
+        return False
+
+    def __attempt(self, node_limit):
+        """
+        One depth-first search, giving up after `node_limit` more nodes.
+        :return: True if solved, False if proven unsatisfiable, None if cut off
+        """
+        self.seq = []
+        self.pos = [-1] * self.n
+        self.count = [0] * len(self.constraints)
+        self.single = set()         # Constraints with exactly one placed wizard.
+        self.watching = [[] for _ in range(self.n)]
+        self.attempt_limit = None if node_limit is None else self.nodes + node_limit
+        self.cut_off = False
+        if self.__search():
+            return True
+        if self.cut_off and not self.exhausted:
+            return None
+        return False
+
+    def solve(self):
+        """
+        Runs restarts with a doubling node limit, each with a new random tie-break
+        between equally constrained wizards and a new gap order, so one bad early
+        placement does not stall the whole search.
+        :return: ordering of wizard ids satisfying every constraint, or None if
+                 there is none or the budget ran out (see `exhausted`)
+        """
+        rng = self.rng = random.Random(self.seed)
+        self.deadline = None if self.time_limit is None else time.time() + self.time_limit
+        self.nodes = 0
+        self.exhausted = False
+
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(limit, 4 * self.n + 100))
+        try:
+            restart_limit = RESTART_NODES
+            while True:
+                self.tiebreak = [rng.random() for _ in range(self.n)]
+                result = self.__attempt(restart_limit)
+                if result is not None:
+                    return list(self.seq) if result else None
+                restart_limit *= 2
+        finally:
+            sys.setrecursionlimit(limit)
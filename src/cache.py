@@ -0,0 +1,160 @@
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+
+DEFAULT_CACHE_DIR = ".solver_cache"
+DEFAULT_MAX_ENTRIES = 1024  # Entries kept before the least recently used are evicted.
+KEY_VERSION = 1             # Bump when canonical_hash changes, so old entries stop matching.
+
+def canonical_hash(num_wizards, constraints):
+    """
+    Hash an instance independently of wizard names and constraint order. Wizards
+    are coloured by colour refinement (1-dimensional Weisfeiler-Leman): each round
+    a wizard's new colour is its old colour plus the multiset of (role, end
+    colours, middle colour) over its constraints, until no class splits. The hash
+    covers the multiset of constraint colour triples, ends unordered.
+
+    Renaming or shuffling an instance keeps the hash and maps every wizard to a
+    wizard of the same colour. Wizards sharing a colour are ranked by id, so the
+    labels may differ by an automorphism, or, for the rare non-isomorphic
+    instances refinement cannot tell apart, by anything: check a cached ordering
+    before trusting it.
+
+    :param num_wizards: number of interned wizards
+    :param constraints: list of integer triples, see `src.instance`
+    :return: tuple (hex digest, labels) where labels[w] is the canonical rank of wizard w
+    """
+    incident = [[] for _ in range(num_wizards)]
+    for k, constraint in enumerate(constraints):
+        for w in set(constraint):
+            incident[w].append(k)
+
+    colors = [0] * num_wizards
+    num_colors = 1
+    while True:
+        signatures = []
+        for w in range(num_wizards):
+            signature = []
+            for k in incident[w]:
+                a, b, c = constraints[k]
+                ends = (colors[a], colors[b]) if colors[a] <= colors[b] else (colors[b], colors[a])
+                signature.append((w == a or w == b, w == c, ends, colors[c]))
+            signatures.append((colors[w], sorted(signature)))
+        palette = sorted(set((color, tuple(signature)) for color, signature in signatures))
+        if len(palette) <= num_colors:
+            break
+        palette = {entry: i for i, entry in enumerate(palette)}
+        colors = [palette[(color, tuple(signature))] for color, signature in signatures]
+        num_colors = len(palette)
+
+    triples = sorted((min(colors[a], colors[b]), max(colors[a], colors[b]), colors[c])
+                     for a, b, c in constraints)
+    digest = hashlib.sha256(json.dumps([KEY_VERSION, num_wizards, triples]).encode()).hexdigest()
+    labels = [0] * num_wizards
+    for rank, w in enumerate(sorted(range(num_wizards), key=lambda w: (colors[w], w))):
+        labels[w] = rank
+    return digest, labels
+
+class ResultCache(object):
+    """
+    Orderings found for earlier instances, one JSON file per canonical hash in
+    `directory`. Orderings are stored as canonical ranks, so a renamed or
+    reshuffled copy of an instance finds them too. Files are written to a
+    temporary name and renamed into place, so concurrent readers never see a
+    partial entry. Writers of one key take a lock around reading, comparing and
+    replacing the entry, so the best ordering stored is the one that stays.
+    Reads touch the file, and the least recently used entries beyond
+    `max_entries` are deleted after each write.
+
+    cache = ResultCache(".solver_cache")
+    key, labels = canonical_hash(num_wizards, constraints)
+    cache.load(key, labels)         # ordering of wizard ids, or None
+    cache.store(key, labels, ordering, satisfied, len(constraints))
+    """
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_entries=DEFAULT_MAX_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def lock(self, key):
+        """
+        Lock `key` until the returned file is closed. Keys sharing their first two
+        characters share a lock file, which bounds the files under "locks".
+        :return: open lock file, held exclusively
+        """
+        directory = os.path.join(self.directory, "locks")
+        os.makedirs(directory, exist_ok=True)
+        f = open(os.path.join(directory, key[:2] + ".lock"), "a")
+        fcntl.flock(f, fcntl.LOCK_EX)
+        return f
+
+    def read(self, key):
+        """
+        :return: the entry dict stored for `key`, or None if there is none or it is unreadable
+        """
+        try:
+            with open(self.path(key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def load(self, key, labels):
+        """
+        :param labels: labels returned by `canonical_hash` for this instance
+        :return: cached ordering of this instance's wizard ids, or None
+        """
+        entry = self.read(key)
+        if entry is None or len(entry['ordering']) != len(labels):
+            return None
+        try:
+            os.utime(self.path(key))
+        except OSError:
+            pass
+        by_rank = [0] * len(labels)
+        for w, rank in enumerate(labels):
+            by_rank[rank] = w
+        return [by_rank[rank] for rank in entry['ordering']]
+
+    def store(self, key, labels, ordering, satisfied, total):
+        """
+        Record `ordering` unless the entry for `key` already satisfies as many constraints.
+        :return: True if the entry was written
+        """
+        with self.lock(key):
+            entry = self.read(key)
+            if entry is not None and entry['satisfied'] >= satisfied:
+                return False
+            fd, temp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump({'ordering': [labels[w] for w in ordering], 'satisfied': satisfied,
+                               'total': total}, f)
+                os.replace(temp, self.path(key))
+            except BaseException:
+                os.unlink(temp)
+                raise
+        self.evict()
+        return True
+
+    def evict(self):
+        """
+        Delete the least recently used entries beyond `max_entries`.
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                path = os.path.join(self.directory, name)
+                try:
+                    entries.append((os.stat(path).st_mtime, path))
+                except OSError:
+                    pass    # Evicted by another process meanwhile.
+        entries.sort()
+        for _, path in entries[:max(0, len(entries) - self.max_entries)]:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
@@ -1,22 +1,142 @@
-import networkx as nx
+import heapq
+
+import numpy as np
+
+class CycleError(ValueError):
+    """
+    Raised when edges that should describe an order contain a cycle.
+    `cycle` is one such cycle as a list of nodes [v1, ..., vk] with vk -> v1.
+    """
+    def __init__(self, cycle):
+        ValueError.__init__(self, "edges contain a cycle: {0}".format(
+            " < ".join(str(v) for v in cycle + cycle[:1])))
+        self.cycle = cycle
+
+class Dag(object):
+    """
+    An int-indexed graph over hashable nodes, numbered in order of first appearance.
+    """
+    def __init__(self):
+        self.nodes = []
+        self.index = {}
+        self.edges = []
+
+    def add_node(self, name):
+        if name not in self.index:
+            self.index[name] = len(self.nodes)
+            self.nodes.append(name)
+        return self.index[name]
+
+    def add_edge(self, name1, name2):
+        self.edges.append((self.add_node(name1), self.add_node(name2)))
 
 def build_dag(lst):
     """
-    For string "Name1<Name2", add and edge from name1 to name2.
-    :param lst: list of edge strings, i.e. "Dumbledore<Harry"
+    For pair (name1, name2), meaning name1 < name2, add an edge from name1 to name2.
+    :param lst: list of edge pairs, i.e. ("Dumbledore", "Harry") or wizard ids (3, 0)
     :return: a DAG
     """
-    G = nx.DiGraph()
-    for elem in lst:
-        name1, name2 = elem.split(" < ")
-        G.add_node(name1) # add_node is set operation. Idempotent for same names.
-        G.add_node(name2)
+    G = Dag()
+    for name1, name2 in lst:
         G.add_edge(name1, name2)
     return G
 
 def linearize(dag):
     """
     :param dag: DAG
-    :return: list of node values in linearized order
+    :return: list of node values in linearized order, see `topological_order`
+    :raises CycleError: if `dag` has a cycle
+    """
+    nodes = dag.nodes
+    try:
+        return [nodes[v] for v in topological_order(len(nodes), dag.edges)]
+    except CycleError as e:
+        raise CycleError([nodes[v] for v in e.cycle])
+
+def topological_order(num_nodes, edges):
     """
-    return list(nx.topological_sort(dag))
\ No newline at end of file
+    Kahn's algorithm over an int-indexed graph, taking the smallest ready node
+    first so the result is deterministic.
+    :param num_nodes: nodes are 0 .. num_nodes - 1
+    :param edges: list of pairs (u, v) for edges u -> v
+    :return: list of all nodes, each after its predecessors
+    :raises CycleError: if the edges have a cycle
+    """
+    adjacency = [[] for _ in range(num_nodes)]
+    indegree = [0] * num_nodes
+    for u, v in edges:
+        adjacency[u].append(v)
+        indegree[v] += 1
+
+    ready = [v for v in range(num_nodes) if not indegree[v]]
+    heapq.heapify(ready)
+    order = []
+    while ready:
+        u = heapq.heappop(ready)
+        order.append(u)
+        for v in adjacency[u]:
+            indegree[v] -= 1
+            if not indegree[v]:
+                heapq.heappush(ready, v)
+
+    if len(order) < num_nodes:
+        raise CycleError(find_cycles(num_nodes, edges)[0])
+    return order
+
+def linear_order(num_nodes, before, after):
+    """
+    Order the nodes given edges before[e] -> after[e]. In a total order a node's
+    position is its number of incoming edges, so nodes are sorted by in-degree
+    and the edges checked against that order without building a graph. If some
+    edge points backwards, i.e. the edges only form a partial order, falls back
+    to `topological_order`.
+    :param num_nodes: nodes are 0 .. num_nodes - 1
+    :param before: int array of edge sources
+    :param after: int array of edge targets
+    :return: list of all nodes, each after its predecessors
+    :raises CycleError: if the edges have a cycle
+    """
+    before = np.asarray(before, dtype=np.int64)
+    after = np.asarray(after, dtype=np.int64)
+    order = np.argsort(np.bincount(after, minlength=num_nodes), kind='stable')
+    rank = np.empty(num_nodes, dtype=np.int64)
+    rank[order] = np.arange(num_nodes)
+    if np.all(rank[before] < rank[after]):
+        return order.tolist()
+    return topological_order(num_nodes, list(zip(before.tolist(), after.tolist())))
+
+def find_cycles(num_nodes, edges):
+    """
+    Depth-first search over an int-indexed graph, reporting one cycle per back edge.
+    :param num_nodes: nodes are 0 .. num_nodes - 1
+    :param edges: list of pairs (u, v) for edges u -> v
+    :return: list of cycles, each a list of nodes [v1, ..., vk] with vk -> v1
+    """
+    adjacency = [[] for _ in range(num_nodes)]
+    for u, v in edges:
+        adjacency[u].append(v)
+
+    WHITE, GRAY, BLACK = 0, 1, 2
+    color = [WHITE] * num_nodes
+    cycles = []
+    for root in range(num_nodes):
+        if color[root] != WHITE:
+            continue
+        color[root] = GRAY
+        path = [root]
+        stack = [iter(adjacency[root])]
+        while stack:
+            advanced = False
+            for v in stack[-1]:
+                if color[v] == WHITE:
+                    color[v] = GRAY
+                    path.append(v)
+                    stack.append(iter(adjacency[v]))
+                    advanced = True
+                    break
+                if color[v] == GRAY:
+                    cycles.append(path[path.index(v):])
+            if not advanced:
+                color[path.pop()] = BLACK
+                stack.pop()
+    return cycles
@@ -0,0 +1,243 @@
+import time
+
+NODE_LIMIT = 20000          # Backtracking nodes per run; harder runs count as this many.
+SEEDS = 3                   # Backtracking runs per measurement, with different tie-breaks.
+SWAP_FRACTION = 0.05        # Constraints replaced per step of `harden`.
+SAMPLE_BATCH = 1000         # Random constraints tried per round when pinning down an ordering.
+OBJECTIVES = ['nodes', 'time']
+ENGINES = ['backtrack', 'sat', 'local']     # Engines timed by `measure`.
+ENGINE_TIME_LIMIT = 2.0     # Seconds each engine but backtracking gets per measurement.
+
+def planted_constraint(num_wizards, rng):
+    """
+    :param rng: random.Random
+    :return: random triple (a, b, c), c not between a and b in the ordering
+             0 .. num_wizards - 1, as `src.all_constraints.sample_constraints` draws
+    """
+    p, q, r = sorted(rng.sample(range(num_wizards), 3))
+    a, b, c = (q, r, p) if rng.random() < 0.5 else (p, q, r)
+    return (b, a, c) if rng.random() < 0.5 else (a, b, c)
+
+def _key(constraint):
+    a, b, c = constraint
+    return (min(a, b), max(a, b), c)
+
+def planted_instance(num_wizards, num_constraints, rng):
+    """
+    :return: list of distinct planted constraints, with every wizard in at least one
+    """
+    if num_wizards < 3 or 3 * num_constraints < num_wizards:
+        raise ValueError("{0} constraints cannot cover {1} wizards".format(num_constraints,
+                                                                           num_wizards))
+    if num_constraints > num_wizards * (num_wizards - 1) * (num_wizards - 2) // 3:
+        raise ValueError("not enough distinct constraints for {0} wizards".format(num_wizards))
+    cover = list(range(num_wizards))
+    rng.shuffle(cover)
+    cover += rng.sample(cover[:num_wizards - num_wizards % 3], -num_wizards % 3)
+    constraints, seen = [], set()
+    for i in range(0, len(cover), 3):
+        p, q, r = sorted(cover[i:i + 3])
+        constraint = (p, q, r) if rng.random() < 0.5 else (q, r, p)
+        constraints.append(constraint)
+        seen.add(_key(constraint))
+    while len(constraints) < num_constraints:
+        constraint = planted_constraint(num_wizards, rng)
+        if _key(constraint) not in seen:
+            constraints.append(constraint)
+            seen.add(_key(constraint))
+    rng.shuffle(constraints)
+    return constraints
+
+def measure(num_wizards, constraints, node_limit=NODE_LIMIT, seeds=SEEDS, engines=ENGINES):
+    """
+    Run `src.backtrack.BacktrackSearch` once per seed, and every other engine in
+    `engines` once through `solver.solve_ids`, within ENGINE_TIME_LIMIT seconds
+    where the engine takes a time limit. The times are summed rather than the
+    slowest kept, since an engine stopped by its limit takes the same time on
+    every instance and would hide what the others measure.
+    :param engines: names from `solver.ENGINES`; node counts are only measured
+                    if 'backtrack' is one of them
+    :return: dict of the mean and largest number of backtracking nodes, how many
+             runs hit `node_limit`, the seconds per engine under 'engines' (the
+             mean for backtracking), and their sum under 'time'
+    """
+    from src.backtrack import BacktrackSearch
+    from solver import solve_ids
+
+    metrics = {'nodes': 0.0, 'max_nodes': 0, 'exhausted': 0, 'engines': {}}
+    for engine in engines:
+        if engine == 'backtrack':
+            nodes, elapsed = [], 0.0
+            for seed in range(seeds):
+                search = BacktrackSearch(num_wizards, constraints, node_limit=node_limit,
+                                         seed=seed)
+                start = time.time()
+                search.solve()
+                elapsed += time.time() - start
+                nodes.append(min(search.nodes, node_limit))
+                metrics['exhausted'] += search.exhausted
+            metrics['nodes'], metrics['max_nodes'] = float(sum(nodes)) / seeds, max(nodes)
+            metrics['engines'][engine] = elapsed / seeds
+        else:
+            start = time.time()
+            solve_ids(num_wizards, constraints, engine=engine, time_limit=ENGINE_TIME_LIMIT,
+                      workers=1)
+            metrics['engines'][engine] = time.time() - start
+    metrics['time'] = sum(metrics['engines'].values())
+    return metrics
+
+def scan(num_wizards, counts, rng, node_limit=NODE_LIMIT, seeds=SEEDS, engines=ENGINES):
+    """
+    Measure one planted instance per number of constraints, i.e. to find the
+    density where the search is hardest.
+    :return: list of (number of constraints, instance, metrics of `measure`)
+    """
+    results = []
+    for m in counts:
+        constraints = planted_instance(num_wizards, m, rng)
+        results.append((m, constraints, measure(num_wizards, constraints, node_limit, seeds,
+                                                engines)))
+    return results
+
+def harden(num_wizards, constraints, rng, steps, objective='nodes', swap=SWAP_FRACTION,
+           node_limit=NODE_LIMIT, seeds=SEEDS, log=None, engines=ENGINES):
+    """
+    Hill climb over planted constraint sets of a fixed size: each step replaces
+    a few constraints by new ones holding for the same ordering, and keeps the
+    change unless the search got easier. Every set stays satisfiable, and no
+    step leaves a wizard out of all constraints.
+
+    :param constraints: planted starting set, see `planted_instance`
+    :param rng: random.Random
+    :param objective: metric of `measure` to maximize, 'nodes' or 'time', the
+                      total time of `engines`
+    :param swap: fraction of the constraints replaced per step, at least one
+    :param log: optional function called with the step and metrics of each improvement
+    :return: tuple (hardest constraint list found, its metrics)
+    """
+    current = list(constraints)
+    seen = set(_key(c) for c in current)
+    degree = [0] * num_wizards
+    for constraint in current:
+        for w in constraint:
+            degree[w] += 1
+    metrics = measure(num_wizards, current, node_limit, seeds, engines)
+    count = max(1, int(swap * len(current)))
+
+    for step in range(steps):
+        removed, added = [], []
+        for k in rng.sample(range(len(current)), count):
+            if all(degree[w] > 1 for w in current[k]):
+                removed.append(k)
+                for w in current[k]:
+                    degree[w] -= 1
+        while len(added) < len(removed):
+            constraint = planted_constraint(num_wizards, rng)
+            if _key(constraint) not in seen:
+                seen.add(_key(constraint))
+                added.append(constraint)
+        candidate = list(current)
+        for k, constraint in zip(removed, added):
+            candidate[k] = constraint
+        for constraint in added:
+            for w in constraint:
+                degree[w] += 1
+
+        result = measure(num_wizards, candidate, node_limit, seeds, engines)
+        if result[objective] >= metrics[objective]:
+            for k in removed:
+                seen.discard(_key(current[k]))
+            current, metrics = candidate, result
+            if log is not None:
+                log(step, metrics)
+        else:
+            for constraint in added:
+                seen.discard(_key(constraint))
+                for w in constraint:
+                    degree[w] -= 1
+            for k in removed:
+                for w in current[k]:
+                    degree[w] += 1
+    return current, metrics
+
+class UniquenessChecker(object):
+    """
+    Decides with the pair encoding of `src.sat_reduce` whether an ordering is
+    the only one, up to reversal, that satisfies a set of constraints. The
+    transitivity clauses are built once. One unit clause fixes the order of the
+    ordering's two ends, which rules out every reversed solution, and a blocking
+    clause rules out the ordering itself: it asks for one of its adjacent pairs
+    to be swapped, and an ordering keeping all of them is the same ordering.
+
+    checker = UniquenessChecker(ordering)
+    checker.other(constraints)      # another satisfying ordering, or None if unique
+    """
+    def __init__(self, ordering, backend=None):
+        import src.sat_reduce as sr
+
+        self.ordering = list(ordering)
+        self.backend = backend
+        self.pt = sr.PairTranslator(len(ordering))
+        literal = self.pt.literal
+        self.base = sr.reduce_pycosat_pairs([], self.pt)
+        self.base.append([literal(ordering[0], ordering[-1])])
+        self.base.append([-literal(x, y) for x, y in zip(ordering, ordering[1:])])
+
+    def other(self, constraints):
+        """
+        :return: an ordering other than ours and its reversal that satisfies
+                 `constraints`, or None if there is none
+        :raises SatBackendError: if an external solver gives up
+        """
+        import src.sat_reduce as sr
+        from src.sat_backend import SatBackendError
+
+        literal = self.pt.literal
+        cnf = list(self.base)
+        for a, b, c in constraints:
+            if c != a and c != b:
+                cnf.append([-literal(a, c), literal(b, c)])
+                cnf.append([literal(a, c), -literal(b, c)])
+        solution = sr.solve_pycosat(cnf, self.backend)
+        if solution == "UNSAT":
+            return None
+        if solution == "UNKNOWN":
+            raise SatBackendError("uniqueness check timed out")
+        return sr.ordering_pycosat_pairs(solution, self.pt)
+
+def pin_down(num_wizards, constraints, rng, backend=None):
+    """
+    Add planted constraints until the ordering 0 .. num_wizards - 1 is the only
+    solution up to reversal, then drop every constraint it does not need, in
+    random order: no constraint of the result can go without losing uniqueness.
+
+    :param constraints: planted constraints to start from
+    :param rng: random.Random
+    :return: minimal list of constraints with a unique solution
+    """
+    import numpy as np
+
+    checker = UniquenessChecker(range(num_wizards), backend)
+    current = list(constraints)
+    other = checker.other(current)
+    while other is not None:
+        # Any planted constraint the rival ordering breaks is new, so add one.
+        position = np.empty(num_wizards, dtype=np.int64)
+        position[other] = np.arange(num_wizards)
+        while True:
+            batch = [planted_constraint(num_wizards, rng) for _ in range(SAMPLE_BATCH)]
+            a, b, c = (position[list(column)] for column in zip(*batch))
+            broken = np.nonzero((a < c) != (b < c))[0]
+            if len(broken):
+                break
+        current.append(batch[broken[0]])
+        other = checker.other(current)
+
+    order = list(range(len(current)))
+    rng.shuffle(order)
+    needed = [True] * len(current)
+    for k in order:
+        needed[k] = False
+        if checker.other([c for c, keep in zip(current, needed) if keep]) is not None:
+            needed[k] = True
+    return [c for c, keep in zip(current, needed) if keep]
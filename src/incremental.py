@@ -0,0 +1,222 @@
+import random
+
+from src.local_search import OrderingState
+import src.instrument as instrument
+
+REPAIR_MOVES = 10           # Moves of the local repair per wizard, before a full re-solve.
+MIN_REPAIR_MOVES = 100
+RESOLVE_TIME_LIMIT = 1.0    # Seconds of the default full re-solve.
+RESOLVE_OPTIONS = {'engine': 'local', 'time_limit': RESOLVE_TIME_LIMIT}
+
+def best_insert(state, w, rng):
+    """
+    The best place to move wizard `w` to, found from its own constraints alone:
+    with the other wizards fixed, each constraint holds on a range of the gaps
+    between them, so one sweep over the sorted range ends counts the constraints
+    held in every gap. Ties go to a random best range, and within it to the gap
+    nearest to where `w` is.
+    :param state: OrderingState
+    :param rng: random.Random
+    :return: tuple (position for `apply_insert`, change in the number of satisfied constraints)
+    """
+    pos = state.pos
+    p = pos[w]
+    held = 0
+    events = []     # (gap, change) for every gap from `gap` on.
+    for k in state.index[w]:
+        a, b, c = state.constraints[k]
+        if a == b or c == a or c == b:
+            held += 1
+            continue
+        # Gap g puts w before the g-th of the other wizards, so theirs shift down past p.
+        if w == c:
+            x, y = sorted(pos[v] - (pos[v] > p) for v in (a, b))
+            held += 1
+            events.append((x + 1, -1))
+            events.append((y + 1, 1))
+        else:
+            z = pos[c] - (pos[c] > p)
+            other = b if w == a else a
+            if pos[other] < pos[c]:
+                held += 1
+                events.append((z + 1, -1))
+            else:
+                events.append((z + 1, 1))
+    events.sort()
+
+    best, best_ranges, current = -1, [], None
+    start, i = 0, 0
+    while start < state.n:
+        while i < len(events) and events[i][0] <= start:
+            held += events[i][1]
+            i += 1
+        end = events[i][0] if i < len(events) else state.n
+        end = min(end, state.n)
+        if start <= p < end:
+            current = held
+        if held > best:
+            best, best_ranges = held, [(start, end)]
+        elif held == best:
+            best_ranges.append((start, end))
+        start = end
+    start, end = best_ranges[rng.randrange(len(best_ranges))]
+    return min(max(p, start), end - 1), best - current
+
+class IncrementalSolver(object):
+    """
+    Keeps an ordering for constraints that arrive one at a time, on top of an
+    OrderingState: the wizards are interned once, and each constraint goes into
+    the per-wizard index, so a new constraint is checked against the current
+    positions in O(1). A violated constraint is repaired locally: first by the
+    best single move of one of its three wizards, then by a min-conflicts search
+    that only moves wizards of violated constraints, each to its best place
+    found by `best_insert` in O(degree log degree). Only
+    if that fails does `solver.solve_ids` solve everything again, and only if
+    the ordering satisfied every constraint before, so an instance that is
+    already unsatisfied does not re-solve on each arrival.
+
+    solver = IncrementalSolver(["A", "B", "C"])
+    solver.add_constraint("A", "C", "B")    # True, after moving one wizard
+    solver.ordering()                       # i.e. ["B", "A", "C"]
+    solver.stats                            # how each arrival was handled
+    """
+    def __init__(self, wizards=(), constraints=(), ordering=None, repair_moves=None,
+                 seed=None, **options):
+        """
+        :param wizards: names of the known wizards; others are added as they appear
+        :param constraints: initial constraints of names, solved with `solver.solve_ids`
+                            unless `ordering` is given
+        :param ordering: initial ordering of all `wizards`, in the given order if None
+        :param repair_moves: moves of the local repair, REPAIR_MOVES per wizard if None
+        :param options: keyword arguments of `solver.solve_ids` for full re-solves, over
+                        RESOLVE_OPTIONS: a bounded local search, since an exact engine
+                        can take minutes near the hardness peak
+        """
+        self.wizards = []
+        self.ids = {}
+        self.state = OrderingState(0, [])
+        self.repair_moves = repair_moves
+        self.rng = random.Random(seed)
+        self.options = dict(RESOLVE_OPTIONS, **options)
+        self.stats = {'held': 0, 'moved': 0, 'repaired': 0, 'resolved': 0, 'unsatisfied': 0}
+
+        for name in (wizards if ordering is None else ordering):
+            self.intern(name)
+        for a, b, c in constraints:
+            self.state.add_constraint(self.intern(a), self.intern(b), self.intern(c))
+        if self.state.constraints and ordering is None:
+            self.resolve()
+
+    def intern(self, name):
+        """
+        :return: id of wizard `name`, added at the end of the ordering if new
+        """
+        w = self.ids.get(name)
+        if w is None:
+            w = self.ids[name] = self.state.add_wizard()
+            self.wizards.append(name)
+        return w
+
+    def ordering(self):
+        """
+        :return: names of all wizards in the current order
+        """
+        return [self.wizards[w] for w in self.state.order]
+
+    def satisfied(self):
+        """
+        :return: tuple (constraints the ordering satisfies, constraints)
+        """
+        return self.state.satisfied, len(self.state.constraints)
+
+    def add_constraint(self, a, b, c):
+        """
+        Add "c is not between a and b", repairing the ordering if it breaks it.
+        :return: True if the ordering satisfies every constraint afterwards
+        """
+        state = self.state
+        total = len(state.constraints)
+        was_satisfied = state.satisfied == total
+        k = state.add_constraint(self.intern(a), self.intern(b), self.intern(c))
+        if state.holds(k):
+            self.stats['held'] += 1
+            return state.satisfied == total + 1
+
+        with instrument.PROFILER.phase("repair"):
+            if self.__move(k):
+                self.stats['moved'] += 1
+                return True
+            if self.__repair(k):
+                self.stats['repaired'] += 1
+                return True
+        if was_satisfied and self.resolve():
+            return True
+        self.stats['unsatisfied'] += 1
+        return False
+
+    def __move(self, k):
+        """
+        Try the best single move of each wizard of constraint k.
+        :return: True if one of them leaves every constraint satisfied
+        """
+        state = self.state
+        for w in set(state.constraints[k]):
+            q, delta = best_insert(state, w, self.rng)
+            if state.satisfied + delta == len(state.constraints):
+                state.apply_insert(w, q)
+                return True
+        return False
+
+    def __repair(self, k):
+        """
+        Min-conflicts search, starting with constraint k: take a violated
+        constraint and move one of its wizards to its best place, even if that
+        only keeps the count. Constraints a move breaks join the violated ones.
+        :return: True if every constraint is satisfied within the repair budget
+        """
+        state = self.state
+        rng = self.rng
+        total = len(state.constraints)
+        broken = [k]
+        moves = self.repair_moves
+        if moves is None:
+            moves = max(MIN_REPAIR_MOVES, REPAIR_MOVES * state.n)
+        for _ in range(moves):
+            j = broken[rng.randrange(len(broken))]
+            if state.holds(j):
+                broken.remove(j)
+                if not broken:
+                    # Only the ones seen are tracked; find any left before giving up.
+                    broken = state.violated()
+                    if not broken:
+                        return True
+                continue
+            w = rng.choice(state.constraints[j])
+            q, delta = best_insert(state, w, rng)
+            if q == state.pos[w]:
+                continue
+            state.apply_insert(w, q)
+            if state.satisfied == total:
+                return True
+            for i in state.index[w]:
+                if not state.holds(i) and i not in broken:
+                    broken.append(i)
+        return False
+
+    def resolve(self):
+        """
+        Solve all constraints again with `solver.solve_ids`, starting its local
+        search from the current ordering, and keep the result if it satisfies
+        more of them.
+        :return: True if the ordering satisfies every constraint afterwards
+        """
+        from solver import solve_ids
+
+        state = self.state
+        stats = {}
+        ordering = solve_ids(state.n, list(state.constraints), stats=stats,
+                             initial=list(state.order), **self.options)
+        self.stats['resolved'] += 1
+        if stats['satisfied'] > state.satisfied:
+            self.state = OrderingState(state.n, state.constraints, ordering)
+        return self.state.satisfied == len(self.state.constraints)
@@ -0,0 +1,173 @@
+import mmap
+import os
+
+CHUNK_BYTES = 1 << 24       # Constraint text split and interned at once, bounds parse memory.
+
+class InstanceError(ValueError):
+    """
+    Raised when a file does not follow the instance format.
+    """
+
+def intern_constraints(constraints, wizards=()):
+    """
+    Map wizard names to dense integer ids so the reductions never have to
+    format or split name strings. Example:
+
+    names, int_constraints = intern_constraints([["Harry", "Snape", "Dumbledore"]])
+    names                   # ["Harry", "Snape", "Dumbledore"]
+    int_constraints         # [(0, 1, 2)]
+
+    :param constraints: list of 3-element name constraints
+    :param wizards: names to intern first, so their ids follow this order
+    :return: tuple (names, int_constraints) where names[i] is the name of wizard i
+    """
+    index = {}
+    names = []
+
+    def touch(name):
+        if name in index:
+            return index[name]
+        index[name] = len(names)
+        names.append(name)
+        return index[name]
+
+    for wizard in wizards:
+        touch(wizard)
+
+    int_constraints = []
+    for constraint in constraints:
+        a, b, c = constraint
+        int_constraints.append((touch(a), touch(b), touch(c)))
+
+    return names, int_constraints
+
+def name_ordering(ordering, names):
+    """
+    :param ordering: list of wizard ids
+    :param names: names list returned by `intern_constraints`
+    :return: list of wizard names in the same order
+    """
+    return [names[i] for i in ordering]
+
+def _next_line(data, pos):
+    """
+    :return: tuple (line at `pos` without its newline, position after the newline)
+    """
+    end = data.find(b"\n", pos)
+    if end < 0:
+        end = len(data)
+    return data[pos:end], end + 1
+
+def _count(line, what):
+    tokens = line.split()
+    if len(tokens) != 1 or not tokens[0].isdigit():
+        raise InstanceError("expected the {0} on a line of its own, got {1!r}".format(
+            what, line.decode(errors="replace")))
+    return int(tokens[0])
+
+def _check_lines(chunk, first_line):
+    """
+    Make sure every non-blank line of `chunk` holds exactly 3 names, counting
+    the tokens of all lines at once: a token starts at a non-space byte after a
+    space, and belongs to the line of the newlines before it.
+    :param first_line: 1-indexed line number of the first line of `chunk`
+    :raises InstanceError: naming the first offending line
+    """
+    import numpy as np
+
+    raw = np.frombuffer(chunk, dtype=np.uint8)
+    is_space = np.zeros(256, dtype=bool)
+    is_space[list(b" \t\n\r\x0b\x0c")] = True     # What bytes.split() splits on.
+    space = is_space[raw]
+    starts = ~space
+    starts[1:] &= space[:-1]
+    newlines = np.flatnonzero(raw == ord("\n"))
+    counts = np.bincount(np.searchsorted(newlines, np.flatnonzero(starts)),
+                         minlength=len(newlines) + 1)
+    bad = np.flatnonzero((counts != 0) & (counts != 3))
+    if len(bad):
+        raise InstanceError("line {0}: expected 3 wizards, got {1}".format(
+            first_line + bad[0], counts[bad[0]]))
+
+def parse_instance(data, with_ordering=False):
+    """
+    Bulk parser for the `.in` format: the number of wizards, the number of
+    constraints, then one constraint of three names per line. With
+    `with_ordering`, a line listing the wizards in order follows the number of
+    wizards, as in the staff instance format. Constraint text is split and
+    interned a chunk of CHUNK_BYTES at a time, straight into an int32 array, so
+    only that array grows with the instance. Each chunk's lines are checked to
+    hold 3 names each. Ids follow first appearance, as in `intern_constraints`.
+
+    :param data: bytes or mmap of the whole file
+    :param with_ordering: expect the ordering line; its wizards get ids 0 .. W - 1
+                          in order, so ids are positions in the ordering
+    :return: tuple (num_wizards, names, constraints) where names[i] is the name
+             of wizard i and constraints an (m, 3) int32 array of wizard ids
+    :raises InstanceError: if `data` is not a well-formed instance
+    """
+    import numpy as np
+
+    index = {}      # Name bytes -> id.
+    names = []
+
+    def touch(name):
+        if name not in index:
+            index[name] = len(names)
+            names.append(name.decode())
+
+    line, pos = _next_line(data, 0)
+    num_wizards = _count(line, "number of wizards")
+    if with_ordering:
+        line, pos = _next_line(data, pos)
+        for name in line.split():
+            touch(name)
+        if len(names) != num_wizards or len(line.split()) != num_wizards:
+            raise InstanceError("expected an ordering of {0} distinct wizards, got {1} names, "
+                                "{2} distinct".format(num_wizards, len(line.split()), len(names)))
+    line, pos = _next_line(data, pos)
+    num_constraints = _count(line, "number of constraints")
+    line_number = 4 if with_ordering else 3      # Of the first constraint.
+
+    flat = np.empty(3 * num_constraints, dtype=np.int32)
+    filled = 0
+    while pos < len(data):
+        end = data.find(b"\n", pos + CHUNK_BYTES)
+        end = len(data) if end < 0 else end + 1
+        chunk = data[pos:end]
+        pos = end
+        _check_lines(chunk, line_number)
+        line_number += chunk.count(b"\n")
+        tokens = chunk.split()
+        if not tokens:
+            continue
+        if filled + len(tokens) > len(flat):
+            raise InstanceError("more input than the {0} constraints announced".format(num_constraints))
+        try:
+            ids = np.fromiter(map(index.__getitem__, tokens), dtype=np.int32, count=len(tokens))
+        except KeyError:
+            # New names, which after the first chunks is rare.
+            for name in tokens:
+                touch(name)
+            ids = np.fromiter(map(index.__getitem__, tokens), dtype=np.int32, count=len(tokens))
+        flat[filled:filled + len(tokens)] = ids
+        filled += len(tokens)
+
+    if filled != len(flat):
+        raise InstanceError("expected {0} constraints, found {1}".format(
+            num_constraints, filled // 3))
+    return num_wizards, names, flat.reshape(-1, 3)
+
+def read_instance(filename, use_mmap=False, with_ordering=False):
+    """
+    Read an instance file with `parse_instance`.
+    :param use_mmap: map the file instead of reading it, for files too large to copy
+    """
+    with open(filename, "rb") as f:
+        if not use_mmap or os.fstat(f.fileno()).st_size == 0:
+            return parse_instance(f.read(), with_ordering)
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return parse_instance(data, with_ordering)
+        finally:
+            data.close()
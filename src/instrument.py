@@ -0,0 +1,163 @@
+import time
+
+class _NullPhase(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_PHASE = _NullPhase()
+
+class NullProfiler(object):
+    """
+    The profiler in place while profiling is off: phases and counters do
+    nothing, so instrumented code pays one method call per phase.
+    """
+    enabled = False
+
+    def phase(self, name):
+        return _NULL_PHASE
+
+    def count(self, name, amount=1):
+        pass
+
+class _Phase(object):
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler._enter(self.name)
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler._exit(self.name)
+        return False
+
+class Profiler(object):
+    """
+    Wall time and peak traced memory per named phase, plus counters. A phase
+    entered several times accumulates its time and calls and keeps its highest
+    peak. Peaks are bytes allocated above what was live when the phase began,
+    measured with tracemalloc, which slows allocation down while it runs; nested
+    phases each get their own peak.
+
+    profiler = instrument.enable()
+    with instrument.PROFILER.phase("solve"):
+        ...
+    instrument.PROFILER.count("clauses", len(cnf))
+    instrument.disable().record()
+    """
+    enabled = True
+
+    def __init__(self, memory=True):
+        self.memory = memory
+        self.started_tracing = False    # Set by `enable`, so `disable` stops only its own tracing.
+        self.phases = {}        # name -> {'time', 'peak', 'calls'}
+        self.counters = {}
+        self.stack = []         # [start time, memory at start, highest peak of finished children]
+        self.start = time.time()
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def _enter(self, name):
+        current = 0
+        if self.memory:
+            import tracemalloc
+            current, peak = tracemalloc.get_traced_memory()
+            if self.stack:
+                self.stack[-1][2] = max(self.stack[-1][2], peak)
+            tracemalloc.reset_peak()
+        self.stack.append([time.perf_counter(), current, 0])
+
+    def _exit(self, name):
+        start, current, child_peak = self.stack.pop()
+        entry = self.phases.setdefault(name, {'time': 0.0, 'peak': 0, 'calls': 0})
+        entry['time'] += time.perf_counter() - start
+        entry['calls'] += 1
+        if self.memory:
+            import tracemalloc
+            peak = max(child_peak, tracemalloc.get_traced_memory()[1])
+            entry['peak'] = max(entry['peak'], peak - current)
+            if self.stack:
+                self.stack[-1][2] = max(self.stack[-1][2], peak)
+
+    def record(self, **fields):
+        """
+        :param fields: extra keys for the record, i.e. the input path
+        :return: JSON-serializable dict of the phases, counters and total time
+        """
+        record = dict(fields)
+        record['time'] = time.time() - self.start
+        record['phases'] = self.phases
+        record['counters'] = self.counters
+        return record
+
+PROFILER = NullProfiler()
+
+def enable(memory=True):
+    """
+    Replace the global profiler with a fresh Profiler.
+    :param memory: also trace peak memory per phase
+    :return: the new profiler
+    """
+    global PROFILER
+    started = False
+    if memory:
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started = True
+    PROFILER = Profiler(memory)
+    PROFILER.started_tracing = started
+    return PROFILER
+
+def disable():
+    """
+    Restore the no-op profiler, stopping tracemalloc if `enable` started it.
+    :return: the profiler that was in place
+    """
+    global PROFILER
+    profiler, PROFILER = PROFILER, NullProfiler()
+    if getattr(profiler, 'started_tracing', False):
+        import tracemalloc
+        tracemalloc.stop()
+    return profiler
+
+def write_record(record, path=None):
+    """
+    Append `record` as one JSON line to `path`, or print it if `path` is None.
+    """
+    import json
+    line = json.dumps(record, sort_keys=True)
+    if path is None:
+        print(line)
+    else:
+        with open(path, "a") as f:
+            f.write(line + "\n")
+
+def aggregate(records):
+    """
+    Combine per-instance profile records, i.e. to compare whole runs.
+    :param records: list of dicts returned by Profiler.record
+    :return: dict with the number of instances, and per phase the total and
+             largest time, the largest peak and the number of calls, and per
+             counter its total
+    """
+    phases = {}
+    counters = {}
+    for record in records:
+        for name, entry in record['phases'].items():
+            total = phases.setdefault(name, {'time': 0.0, 'max_time': 0.0, 'peak': 0, 'calls': 0})
+            total['time'] += entry['time']
+            total['max_time'] = max(total['max_time'], entry['time'])
+            total['peak'] = max(total['peak'], entry['peak'])
+            total['calls'] += entry['calls']
+        for name, value in record['counters'].items():
+            counters[name] = counters.get(name, 0) + value
+    return {'instances': len(records), 'phases': phases, 'counters': counters}
@@ -0,0 +1,173 @@
+import random
+import time
+
+def is_satisfied(pa, pb, pc):
+    """
+    :return: True if position pc is not strictly between positions pa and pb
+    """
+    return not (pa < pc < pb or pb < pc < pa)
+
+class OrderingState(object):
+    """
+    An ordering of wizard ids together with a per-wizard inverted index of the
+    constraints it appears in. Moving a wizard only changes the relative order of
+    that wizard against the others, so a move is scored from the constraints of
+    the moved wizards alone, in O(degree). Example:
+
+    state = OrderingState(3, [(0, 1, 2)], [0, 2, 1])
+    state.satisfied                 # 0
+    state.insert_delta(2, 2)        # 1, moving wizard 2 to the end
+    state.apply_insert(2, 2)
+    state.order                     # [0, 1, 2]
+    """
+    def __init__(self, num_wizards, constraints, ordering=None):
+        self.n = num_wizards
+        self.constraints = []
+        self.index = [[] for _ in range(num_wizards)]
+        self.order = list(ordering) if ordering is not None else list(range(num_wizards))
+        self.pos = [0] * num_wizards
+        for i, w in enumerate(self.order):
+            self.pos[w] = i
+        self.satisfied = 0
+        for a, b, c in constraints:
+            self.add_constraint(a, b, c)
+
+    def add_constraint(self, a, b, c):
+        """
+        :return: index of the new constraint
+        """
+        k = len(self.constraints)
+        self.constraints.append((a, b, c))
+        for w in set((a, b, c)):
+            self.index[w].append(k)
+        if self.holds(k):
+            self.satisfied += 1
+        return k
+
+    def add_wizard(self):
+        """
+        Append a wizard that is in no constraint yet to the end of the ordering.
+        :return: id of the new wizard
+        """
+        w = self.n
+        self.n += 1
+        self.index.append([])
+        self.pos.append(len(self.order))
+        self.order.append(w)
+        return w
+
+    def holds(self, k):
+        a, b, c = self.constraints[k]
+        pos = self.pos
+        return is_satisfied(pos[a], pos[b], pos[c])
+
+    def violated(self):
+        """
+        :return: indices of the constraints violated by the current ordering
+        """
+        return [k for k in range(len(self.constraints)) if not self.holds(k)]
+
+    def __delta(self, ks, moved):
+        """
+        :param ks: constraint indices touched by a move
+        :param moved: dict of wizard -> new (possibly fractional) position
+        :return: change in the number of satisfied constraints
+        """
+        pos = self.pos
+        delta = 0
+        for k in ks:
+            a, b, c = self.constraints[k]
+            pa, pb, pc = pos[a], pos[b], pos[c]
+            before = is_satisfied(pa, pb, pc)
+            after = is_satisfied(moved.get(a, pa), moved.get(b, pb), moved.get(c, pc))
+            delta += after - before
+        return delta
+
+    def insert_delta(self, w, q):
+        """
+        :param w: wizard to move
+        :param q: position of `w` after the move
+        :return: change in the number of satisfied constraints
+        """
+        p = self.pos[w]
+        if q == p:
+            return 0
+        # Relative to the current positions, w lands just past the wizard at q.
+        virtual = q + 0.5 if q > p else q - 0.5
+        return self.__delta(self.index[w], {w: virtual})
+
+    def apply_insert(self, w, q):
+        delta = self.insert_delta(w, q)
+        p = self.pos[w]
+        order = self.order
+        order.pop(p)
+        order.insert(q, w)
+        for i in range(min(p, q), max(p, q) + 1):
+            self.pos[order[i]] = i
+        self.satisfied += delta
+        return delta
+
+    def swap_delta(self, u, v):
+        """
+        :return: change in the number of satisfied constraints if `u` and `v` swap places
+        """
+        if u == v:
+            return 0
+        ks = set(self.index[u])
+        ks.update(self.index[v])
+        return self.__delta(ks, {u: self.pos[v], v: self.pos[u]})
+
+    def apply_swap(self, u, v):
+        delta = self.swap_delta(u, v)
+        pu, pv = self.pos[u], self.pos[v]
+        self.order[pu], self.order[pv] = v, u
+        self.pos[u], self.pos[v] = pv, pu
+        self.satisfied += delta
+        return delta
+
+def local_search(num_wizards, constraints, initial=None, iterations=None, time_limit=None,
+                 seed=None):
+    """
+    Random insert and swap moves, keeping every move that does not lose a
+    constraint, until all constraints hold or the budget runs out.
+    :param num_wizards: number of interned wizards
+    :param constraints: list of integer triples, see `src.instance`
+    :param initial: starting ordering of wizard ids, random if None
+    :param iterations: maximum number of moves tried
+    :param time_limit: maximum number of seconds, checked every 1000 moves
+    :param seed: seed for the random moves
+    :return: tuple (best ordering, number of constraints it satisfies)
+    """
+    rng = random.Random(seed)
+    if initial is None:
+        initial = list(range(num_wizards))
+        rng.shuffle(initial)
+    state = OrderingState(num_wizards, constraints, initial)
+    best, best_satisfied = list(state.order), state.satisfied
+    total = len(state.constraints)
+    if num_wizards < 2:
+        return best, best_satisfied
+
+    deadline = None if time_limit is None else time.time() + time_limit
+    i = 0
+    while best_satisfied < total:
+        if iterations is not None and i >= iterations:
+            break
+        if deadline is not None and i % 1000 == 0 and time.time() > deadline:
+            break
+        i += 1
+
+        w = rng.randrange(num_wizards)
+        if rng.random() < 0.5:
+            q = rng.randrange(num_wizards)
+            if state.insert_delta(w, q) >= 0:
+                state.apply_insert(w, q)
+        else:
+            v = rng.randrange(num_wizards)
+            if state.swap_delta(w, v) >= 0:
+                state.apply_swap(w, v)
+
+        if state.satisfied > best_satisfied:
+            best, best_satisfied = list(state.order), state.satisfied
+
+    return best, best_satisfied
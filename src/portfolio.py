@@ -0,0 +1,73 @@
+import multiprocessing
+import time
+from multiprocessing.connection import wait
+
+import src.instrument as instrument
+import src.scoring as scoring
+
+def _run(strategy, num_wizards, constraints, time_limit, conn):
+    # The parent's profiler would only slow the strategy down; its record stays there.
+    instrument.disable()
+    name, function = strategy
+    ordering = function(num_wizards, constraints, time_limit)
+    conn.send((name, ordering))
+    conn.close()
+
+def race(strategies, num_wizards, constraints, deadline):
+    """
+    Start every strategy in its own process and return the first ordering that
+    satisfies every constraint, terminating the others. If none does within
+    `deadline` seconds, return the best ordering reported so far. Heuristic
+    strategies get a time limit slightly under the deadline so they report back.
+    :param strategies: list of (name, function) pairs, where
+                       function(num_wizards, constraints, time_limit) returns an
+                       ordering of wizard ids or None
+    :param num_wizards: number of interned wizards
+    :param constraints: list of integer triples, see `src.instance`
+    :param deadline: seconds before the race is called
+    :return: tuple (winning strategy name, ordering, number of constraints it
+             satisfies), or (None, None, -1) if nothing was reported
+    """
+    context = multiprocessing.get_context("fork")
+    C = scoring.constraint_array(constraints)
+    total = len(constraints)
+    time_limit = max(0.05, 0.9 * deadline)
+    end = time.time() + deadline
+
+    running = {}    # receiver -> process
+    for strategy in strategies:
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(target=_run, args=(strategy, num_wizards, constraints,
+                                                     time_limit, sender))
+        process.start()
+        sender.close()
+        running[receiver] = process
+
+    best = (None, None, -1)
+    try:
+        while running and best[2] < total:
+            remaining = end - time.time()
+            if remaining <= 0:
+                break
+            # A large answer fills the pipe and keeps its sender alive until it is
+            # read, so wait for answers as well as for exits.
+            ready = wait(list(running) + [p.sentinel for p in running.values()], remaining)
+            for receiver in [r for r, p in running.items() if r in ready or p.sentinel in ready]:
+                process = running.pop(receiver)
+                try:
+                    name, ordering = receiver.recv()
+                except EOFError:
+                    ordering = None     # Exited without an answer.
+                if ordering is not None:
+                    satisfied = int(scoring.score_orderings(ordering, C)[0])
+                    if satisfied > best[2]:
+                        best = (name, ordering, satisfied)
+                process.join()
+                receiver.close()
+    finally:
+        for receiver, process in running.items():
+            process.terminate()
+            process.join()
+            receiver.close()
+
+    return best
@@ -0,0 +1,157 @@
+SAME_PAIR = 'same_pair'             # (a, a, c): nothing lies strictly between a and a.
+MIDDLE_IS_END = 'middle_is_end'     # (a, b, a), (a, b, b): an end is never between.
+DUPLICATE = 'duplicate'             # (a, b, c) seen before, as (a, b, c) or (b, a, c).
+
+def canonicalize_constraints(constraints):
+    """
+    Drop trivially satisfied and duplicate constraints in one linear pass. Each
+    constraint (a, b, c) is keyed by its unordered end pair and its middle, so
+    (a, b, c) and (b, a, c) collide. Kept constraints keep their input order.
+
+    :param constraints: list of 3-element constraints, of names or wizard ids
+    :return: tuple (kept, removed) where removed maps each category above to
+             the number of constraints dropped for it
+    """
+    removed = {SAME_PAIR: 0, MIDDLE_IS_END: 0, DUPLICATE: 0}
+    seen = set()
+    kept = []
+    for constraint in constraints:
+        a, b, c = constraint
+        if a == b:
+            removed[SAME_PAIR] += 1
+            continue
+        if c == a or c == b:
+            removed[MIDDLE_IS_END] += 1
+            continue
+        key = (a, b, c) if a < b else (b, a, c)
+        if key in seen:
+            removed[DUPLICATE] += 1
+            continue
+        seen.add(key)
+        kept.append(constraint)
+    return kept, removed
+
+def canonicalize_array(constraints):
+    """
+    `canonicalize_constraints` for an (m, 3) array of wizard ids, such as
+    `src.instance.parse_instance` returns: the checks run on whole columns, and
+    duplicates are found by sorting the keys, so only kept constraints become
+    Python tuples. The three ids pack into one int64 key while n ** 3 fits;
+    past about 2 million wizards the columns are sorted with lexsort instead.
+
+    :return: tuple (kept, removed) as for `canonicalize_constraints`
+    """
+    import numpy as np
+
+    a, b, c = (constraints[:, i].astype(np.int64) for i in range(3))
+    same_pair = a == b
+    middle_is_end = ~same_pair & ((c == a) | (c == b))
+    rows = np.flatnonzero(~same_pair & ~middle_is_end)
+    n = int(constraints.max()) + 1 if len(constraints) else 0
+    lo, hi, c = np.minimum(a, b)[rows], np.maximum(a, b)[rows], c[rows]
+    first = np.ones(len(rows), dtype=bool)
+    if n ** 3 <= 2 ** 63:
+        keys = (lo * n + hi) * n + c
+        order = np.argsort(keys, kind="stable")
+        first[1:] = keys[order[1:]] != keys[order[:-1]]
+    else:
+        order = np.lexsort((c, hi, lo))
+        first[1:] = False
+        for column in (lo, hi, c):
+            column = column[order]
+            first[1:] |= column[1:] != column[:-1]
+    kept = np.sort(rows[order[first]])
+    removed = {SAME_PAIR: int(same_pair.sum()), MIDDLE_IS_END: int(middle_is_end.sum()),
+               DUPLICATE: int(len(rows) - len(kept))}
+    return [tuple(row) for row in constraints[kept].tolist()], removed
+
+def connected_components(num_wizards, constraints):
+    """
+    Split the wizards into groups that share no constraint, with union-find over
+    the constraint triples. The groups can be ordered independently and the
+    orderings concatenated in any order.
+
+    :param num_wizards: number of interned wizards
+    :param constraints: list of integer triples, see `src.instance`
+    :return: tuple (components, isolated) where components is a list of
+             (wizards, constraints) pairs, wizards being the sorted wizard ids of
+             the component and constraints its triples relabelled to indices into
+             wizards, and isolated lists the wizard ids in no constraint
+    """
+    parent = list(range(num_wizards))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    constrained = [False] * num_wizards
+    for a, b, c in constraints:
+        constrained[a] = constrained[b] = constrained[c] = True
+        ra = find(a)
+        for w in (b, c):
+            rw = find(w)
+            if rw != ra:
+                parent[rw] = ra
+
+    members = {}
+    isolated = []
+    for w in range(num_wizards):
+        if constrained[w]:
+            members.setdefault(find(w), []).append(w)
+        else:
+            isolated.append(w)
+
+    local = [0] * num_wizards
+    for wizards in members.values():
+        for i, w in enumerate(wizards):
+            local[w] = i
+    grouped = dict((root, []) for root in members)
+    for a, b, c in constraints:
+        grouped[find(a)].append((local[a], local[b], local[c]))
+
+    components = [(members[root], grouped[root]) for root in sorted(members, key=lambda r: members[r][0])]
+    return components, isolated
+
+def peel_constraints(num_wizards, constraints):
+    """
+    Peel off wizards that are only ever the middle of a constraint. Such a wizard
+    satisfies all of its constraints from either end of the ordering, so it and
+    its constraints can be removed, which may leave more wizards that are only
+    middles. Repeats until none is left.
+
+    Given an ordering of the kernel, `kernel_ordering + peeled[::-1]` satisfies
+    every peeled constraint: each peeled wizard lies outside all wizards that
+    remained when it was peeled.
+
+    :param num_wizards: number of interned wizards
+    :param constraints: list of integer triples, see `src.instance`
+    :return: tuple (kernel, peeled) where kernel lists the remaining constraints
+             in input order and peeled the removed wizard ids in peeling order
+    """
+    ends = [0] * num_wizards
+    middles = [[] for _ in range(num_wizards)]
+    for k, (a, b, c) in enumerate(constraints):
+        ends[a] += 1
+        ends[b] += 1
+        middles[c].append(k)
+
+    alive = [True] * len(constraints)
+    queue = [w for w in range(num_wizards) if not ends[w] and middles[w]]
+    peeled = []
+    while queue:
+        w = queue.pop()
+        peeled.append(w)
+        for k in middles[w]:
+            if not alive[k]:
+                continue
+            alive[k] = False
+            a, b, _ = constraints[k]
+            for x in (a, b):
+                ends[x] -= 1
+                if not ends[x] and middles[x]:
+                    queue.append(x)
+
+    kernel = [constraint for k, constraint in enumerate(constraints) if alive[k]]
+    return kernel, peeled
@@ -0,0 +1,154 @@
+import os
+import shlex
+
+DIMACS_BATCH = 4096         # Clauses formatted per write by write_dimacs.
+
+class SatBackendError(RuntimeError):
+    """
+    Raised when an external solver cannot be run or gives no readable answer.
+    """
+
+def cnf_size(cnf):
+    """
+    :param cnf: list of clauses, each a list of nonzero int literals
+    :return: tuple (number of variables, number of clauses)
+    """
+    num_variables = 0
+    for clause in cnf:
+        for literal in clause:
+            if abs(literal) > num_variables:
+                num_variables = abs(literal)
+    return num_variables, len(cnf)
+
+def write_dimacs(cnf, f, num_variables=None):
+    """
+    Write `cnf` to the text file `f` in DIMACS format, formatting DIMACS_BATCH
+    clauses at a time, so the text of the whole formula never exists at once.
+    :param cnf: list of clauses in Pycosat spec
+    :param num_variables: variable count for the header, found from `cnf` if None
+    """
+    if num_variables is None:
+        num_variables, _ = cnf_size(cnf)
+    f.write("p cnf {0} {1}\n".format(num_variables, len(cnf)))
+    batch = []
+    for clause in cnf:
+        batch.append(" ".join(map(str, clause)) + " 0\n")
+        if len(batch) == DIMACS_BATCH:
+            f.writelines(batch)
+            batch = []
+    f.writelines(batch)
+
+def parse_dimacs_output(text):
+    """
+    Read a solver answer, either in the SAT competition format ("s SATISFIABLE"
+    followed by "v" lines) or in the MiniSat result file format ("SAT" followed
+    by a line of literals). Comment lines are ignored.
+    :param text: solver output
+    :return: list of literals in Pycosat spec, "UNSAT", or "UNKNOWN"
+    """
+    status = None
+    model = []
+    for line in text.splitlines():
+        tokens = line.split()
+        if not tokens or tokens[0] == "c":
+            continue
+        if tokens[0] == "s" and len(tokens) > 1:
+            status = tokens[1]
+        elif tokens[0] == "v":
+            model.extend(int(t) for t in tokens[1:])
+        elif tokens[0] in ("SAT", "SATISFIABLE", "UNSAT", "UNSATISFIABLE", "INDET", "UNKNOWN"):
+            status = tokens[0]
+        elif status in ("SAT", "SATISFIABLE"):
+            try:
+                model.extend(int(t) for t in tokens)
+            except ValueError:
+                pass
+    if status in ("SAT", "SATISFIABLE"):
+        return [literal for literal in model if literal != 0]
+    if status in ("UNSAT", "UNSATISFIABLE"):
+        return "UNSAT"
+    return "UNKNOWN"
+
+class PycosatBackend(object):
+    """
+    Solves in this process with pycosat. Has no time limit.
+    """
+    name = "pycosat"
+
+    def solve(self, cnf):
+        """
+        :param cnf: list of clauses in Pycosat spec
+        :return: solution in Pycosat spec, or "UNSAT"
+        """
+        import pycosat
+        return pycosat.solve(cnf)
+
+class DimacsBackend(object):
+    """
+    Runs a local solver binary on a DIMACS file. In `command`, "{input}" stands for
+    the path of the formula and "{output}" for a file the solver writes its
+    answer to; without "{input}" the path is appended, and without "{output}"
+    the answer is read from standard output. A solver still running after
+    `timeout` seconds is killed and the answer is "UNKNOWN".
+
+    DimacsBackend("kissat -q", timeout=60)
+    DimacsBackend(["minisat", "{input}", "{output}"])
+    """
+    def __init__(self, command, timeout=None):
+        self.command = shlex.split(command) if isinstance(command, str) else list(command)
+        self.timeout = timeout
+        self.name = os.path.basename(self.command[0])
+
+    def solve(self, cnf):
+        """
+        :param cnf: list of clauses in Pycosat spec
+        :return: solution in Pycosat spec, "UNSAT", or "UNKNOWN" on timeout
+        :raises SatBackendError: if the solver cannot be run, or exits with an
+                                 error and no answer
+        """
+        import shutil
+        import subprocess
+        import tempfile
+
+        directory = tempfile.mkdtemp(prefix="dimacs")
+        try:
+            input_path = os.path.join(directory, "formula.cnf")
+            output_path = os.path.join(directory, "answer")
+            with open(input_path, "w") as f:
+                write_dimacs(cnf, f)
+            args = [arg.replace("{input}", input_path).replace("{output}", output_path)
+                    for arg in self.command]
+            if not any("{input}" in arg for arg in self.command):
+                args.append(input_path)
+
+            try:
+                result = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                        timeout=self.timeout, universal_newlines=True)
+            except subprocess.TimeoutExpired:
+                return "UNKNOWN"
+            except OSError as e:
+                raise SatBackendError("cannot run {0}: {1}".format(self.command[0], e))
+
+            text = result.stdout
+            if any("{output}" in arg for arg in self.command) and os.path.exists(output_path):
+                with open(output_path) as f:
+                    text = f.read()
+            answer = parse_dimacs_output(text)
+            # By convention 10 means satisfiable and 20 unsatisfiable.
+            if answer == "UNKNOWN" and result.returncode not in (0, 10, 20):
+                raise SatBackendError("{0} exited with status {1}".format(self.command[0],
+                                                                          result.returncode))
+            return answer
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+def get_backend(spec=None, timeout=None):
+    """
+    :param spec: "pycosat" or None for the in-process solver, else the command
+                 line of a DIMACS solver, see DimacsBackend
+    :param timeout: seconds an external solver may run
+    :return: backend object with a solve(cnf) method
+    """
+    if spec is None or spec == "pycosat":
+        return PycosatBackend()
+    return DimacsBackend(spec, timeout)
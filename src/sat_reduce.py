@@ -1,5 +1,7 @@
-from satispy import Variable, Cnf
-import pycosat as ps
+from array import array
+import numpy as np
+import src.dag_utils as dg
+import src.instrument as instrument
 
 # ====================
 # PycoSat Reduction
@@ -8,119 +10,130 @@ import pycosat as ps
 class LiteralTranslator(object):
     """
     A helper class for integration with PycoSat, allows for two-way translation
-    between string literal and its index representation. Example:
-
-    lt = LiteralTranslator()
-    key = lt.touch_literal("Harry < Hermione")
-    lt.translate(key)                       # "Harry < Hermione"
-    lt.touch_literal("Harry < Hermione")    # `key`
+    between a wizard pair (i, j), meaning "i < j", and its index representation.
+    Wizards are the dense integer ids produced by `src.instance.intern_constraints`,
+    so keys are computed arithmetically as i * n + j + 1. Example:
+
+    lt = LiteralTranslator(3)
+    key = lt.touch_literal(0, 2)    # "Harry < Dumbledore"
+    lt.translate(key)               # (0, 2)
+    lt.touch_literal(0, 2)          # `key`
     """
-    def __init__(self):
-        self.counter = 1
-        self.literal_to_key = {}
-        self.key_to_literal = {}
-
-    def __add_literal(self, literal):
-        assert(literal not in self.literal_to_key)
-
-        self.literal_to_key[literal] = self.counter
-        self.key_to_literal[self.counter] = literal
-        self.counter += 1
-        return self.literal_to_key[literal]
+    def __init__(self, num_wizards):
+        self.n = num_wizards
+        self.touched = bytearray(num_wizards * num_wizards + 1)
+        self.keys = array('i')      # Touched keys, in creation order.
 
-    def __add_literals(self, literals):
-        for literal in literals:
-            self.__add_literal(literal)
+    def key(self, i, j):
+        return i * self.n + j + 1
 
-    def touch_literal(self, literal):
+    def touch_literal(self, i, j):
         """
-        Add literal if it does not exist, then return its original or newly created key.
-        :param literal: literal of form "Snape < Dumbledore"
+        Mark literal "i < j" as used, then return its key.
+        :param i: id of the younger wizard
+        :param j: id of the older wizard
         :return: a positive integer signifying its index
         """
-        if literal in self.literal_to_key:
-            return self.literal_to_key[literal]
-
-        return self.__add_literal(literal)
-
-    def find_literal(self, literal):
-        if literal in self.literal_to_key:
-            return self.literal_to_key[literal]
+        key = i * self.n + j + 1
+        if not self.touched[key]:
+            self.touched[key] = 1
+            self.keys.append(key)
+        return key
+
+    def find_literal(self, i, j):
+        key = i * self.n + j + 1
+        if self.touched[key]:
+            return key
         return None
 
     def translate(self, key):
         """
-        :param key: index of string literal
-        :return: string literal corresponding to `key`
+        :param key: index of literal
+        :return: pair (i, j) corresponding to `key`
         """
-        if key not in self.key_to_literal:
-            return LookupError
-        return self.key_to_literal[key]
+        if key < 1 or key >= len(self.touched) or not self.touched[key]:
+            raise LookupError(key)
+        return divmod(key - 1, self.n)
 
     def literals(self):
-        return self.literal_to_key.keys()
+        """
+        :return: list of touched pairs (i, j), in creation order
+        """
+        n = self.n
+        return [divmod(key - 1, n) for key in self.keys]
 
 class LiteralTransitivityManager(object):
     """
-    Helper class to enforce dependencies based on constraints.
-    Keeps a list of wizards and literal dependencies. Needs a LiteralTranslator object.
+    Helper class to enforce transitivity between literals. For every triangle of
+    distinct wizards {i, j, k} it writes the six clauses [-(x < y), -(y < z), x < z]
+    over the orderings (x, y, z) of the triangle, so each clause is generated once.
+
+    With `constrained_only`, only triangles containing a pair used by some constraint
+    are written. This still rules out cycles of constraint literals: along a cycle
+    v1 < v2 < ... < vk < v1, the triangles (v1, vm, vm+1) force v1 < vk, which the
+    consistency clauses reject. Literals of other pairs are never touched, so
+    `translate_pycosat` only reports literals of constrained pairs.
 
     Ltm = LiteralTransitivityManager(L)
-    transitivity_constraints = Ltm.enforce()
+    transitivity_constraints = Ltm.constraints()
     cnf.extend(transitivity_constraints)
     """
-    def __init__(self, lt):
+    def __init__(self, lt, constrained_only=False):
         self.lt = lt
-        self.dependencies = {}
-        self.clauses = []           # Transitivity clauses to be added.
+        self.constrained_only = constrained_only
 
-    def __scan(self):
-        for lit in self.lt.literals():
-            x, y = lit.split(' < ')
-            self.__add_dependency(x, y)
-
-    def __add_dependency(self, x, y):
+    def __constrained_pairs(self):
         """
-        If x < y, add x as a dependency of y.
+        :return: sorted list of pair keys i * n + j, i < j, touched by the constraints
         """
-        if y not in self.dependencies:
-            self.dependencies[y] = set()
-        self.dependencies[y].add(x)
+        n = self.lt.n
+        return sorted(set(min(i, j) * n + max(i, j) for i, j in self.lt.literals()))
 
-    def __enforce_dependencies(self, literal):
+    def triangles(self):
         """
-        If z < x and y < z, then y < x for all y.
-        :param literal: string in form 'z < x'
-        :return: cnf clauses to enforce transitivity on literal
+        :return: list of triangles (i, j, k), with i < j < k, to enforce
         """
-        z, x = literal.split(' < ')
-        for y in self.dependencies[z]:
-            z_x = self.lt.touch_literal('%s < %s' % (z , x))
-            y_z = self.lt.touch_literal('%s < %s' % (y , z))
-            y_x = self.lt.touch_literal('%s < %s' % (y , x))
-            constraint = [-z_x, -y_z, y_x]
-
-            self.__add_dependency(y, x)
-            if constraint not in self.clauses:
-                self.clauses.append(constraint)
+        n = self.lt.n
+        if not self.constrained_only:
+            return [(i, j, k) for i in range(n) for j in range(i + 1, n) for k in range(j + 1, n)]
+
+        pairs = self.__constrained_pairs()
+        constrained = set(pairs)
+        triangles = []
+        for pair in pairs:
+            i, j = divmod(pair, n)
+            for k in range(n):
+                if k == i or k == j:
+                    continue
+                # Only the smallest constrained pair of a triangle writes it.
+                ik = min(i, k) * n + max(i, k)
+                jk = min(j, k) * n + max(j, k)
+                if (ik < pair and ik in constrained) or (jk < pair and jk in constrained):
+                    continue
+                triangles.append(tuple(sorted((i, j, k))))
+        return triangles
 
     def constraints(self):
         """
-        The dependency chain assures that transitivity constraints
-        are satisfied.
-        :return: cnf clauses to enforce transitivity for all literals
+        :return: cnf clauses to enforce transitivity on the selected triangles
         """
-        self.__scan()
-        size = -1
-
-        # Since __enforce_dependencies(lit) may alter the literal translator,
-        # we update until its size no longer changes.
-        while not len(self.clauses) == size:
-            size = len(self.clauses)
-            for literal in self.lt.literals():
-                self.__enforce_dependencies(literal)
+        n = self.lt.n
+        triangles = self.triangles()
+        clauses = [None] * (6 * len(triangles))
+        index = 0
+        for i, j, k in triangles:
+            ij = i * n + j + 1; ji = j * n + i + 1
+            ik = i * n + k + 1; ki = k * n + i + 1
+            jk = j * n + k + 1; kj = k * n + j + 1
+            clauses[index] = [-ij, -jk, ik]
+            clauses[index + 1] = [-ik, -kj, ij]
+            clauses[index + 2] = [-ji, -ik, jk]
+            clauses[index + 3] = [-jk, -ki, ji]
+            clauses[index + 4] = [-ki, -ij, kj]
+            clauses[index + 5] = [-kj, -ji, ki]
+            index += 6
 
-        return self.clauses
+        return clauses
 
 class LiteralConsistencyManager(object):
     def __init__(self, lt):
@@ -128,65 +141,407 @@ class LiteralConsistencyManager(object):
 
     def constraints(self):
         clauses = []
-        for lit in self.lt.literals():
-            z, x = lit.split(' < ')
-            negation = x + ' < ' + z
-            n = self.lt.find_literal(negation)
+        for z, x in self.lt.literals():
+            n = self.lt.find_literal(x, z)
             if not n:
                 continue
 
-            m = self.lt.find_literal(lit)
+            m = self.lt.find_literal(z, x)
             # Both cannot be true.
             constraint = [-n, -m]
             clauses.append(constraint)
 
         return clauses
 
-def reduce_pycosat(constraints, lt):
+def constraint_clauses(constraints, lt):
     """
-    :param constraints:
+    :param constraints: list of integer triples (a, b, c), see `src.instance`
     :param lt: a LiteralTranslator object
-    :return: normal form in Pycosat spec
+    :return: cnf clauses for "c not between a and b", without transitivity
     """
     cnf = []
     for constraint in constraints:
         a, b, c = constraint
-        x1 = lt.touch_literal('%s < %s' % (a, c))
-        x2 = lt.touch_literal('%s < %s' % (c, a))
-        x3 = lt.touch_literal('%s < %s' % (b, c))
-        x4 = lt.touch_literal('%s < %s' % (c, b))
+        x1 = lt.touch_literal(a, c)
+        x2 = lt.touch_literal(c, a)
+        x3 = lt.touch_literal(b, c)
+        x4 = lt.touch_literal(c, b)
         cnf.append([x1, x2])
         cnf.append([x3, x4])
         cnf.append([-x1, -x4])
         cnf.append([-x2, -x3])
+    return cnf
 
-    T = LiteralTransitivityManager(lt)
-    t_constraints = T.constraints()
-    cnf.extend(t_constraints)
-
-    C = LiteralConsistencyManager(lt)
-    c_constraints = C.constraints()
-    cnf.extend(c_constraints)
-
+def reduce_pycosat(constraints, lt, constrained_only=False, symmetry=False):
+    """
+    :param constraints: list of integer triples (a, b, c), see `src.instance`
+    :param lt: a LiteralTranslator object
+    :param constrained_only: only enforce transitivity on triangles touching a
+                             constrained pair, see LiteralTransitivityManager
+    :param symmetry: add symmetry-breaking unit clauses, see `symmetry_pairs`
+    :return: normal form in Pycosat spec
+    """
+    profiler = instrument.PROFILER
+    with profiler.phase("reduce.constraints"):
+        cnf = constraint_clauses(constraints, lt)
+        if symmetry:
+            cnf.extend(symmetry_clauses(constraints, lt))
+
+    with profiler.phase("reduce.transitivity"):
+        T = LiteralTransitivityManager(lt, constrained_only)
+        t_constraints = T.constraints()
+        cnf.extend(t_constraints)
+
+    with profiler.phase("reduce.consistency"):
+        C = LiteralConsistencyManager(lt)
+        c_constraints = C.constraints()
+        cnf.extend(c_constraints)
+
+    profiler.count("clauses", len(cnf))
+    profiler.count("literals_touched", len(lt.keys))
+    # Only touched literals appear in the formula, so they are its variables, as
+    # `reduce_pycosat_pairs` counts them.
+    profiler.count("variables", len(lt.keys))
     return cnf
 
-def solve_pycosat(cnf):
-    return ps.solve(cnf)
+def solve_pycosat(cnf, backend=None):
+    """
+    :param cnf: normal form in Pycosat spec
+    :param backend: optional solver from `src.sat_backend.get_backend`, pycosat if None
+    :return: solution in Pycosat spec, "UNSAT", or "UNKNOWN" if an external solver timed out
+    """
+    with instrument.PROFILER.phase("solve"):
+        if backend is not None:
+            return backend.solve(cnf)
+        import pycosat as ps
+        return ps.solve(cnf)
 
 def translate_pycosat(solution, lt):
     """
-    Returns a list of string literals, i.e. ["Harry < Hermione", "Hermione < Dumbledore"]
+    Returns a list of wizard id pairs, i.e. [(0, 1), (1, 2)] for "0 < 1" and "1 < 2".
     :param solution: solution in Pycosat spec
     :param lt: same LiteralTranslator object used for reduction
-    :return: list of string literals inequalities
+    :return: list of (younger, older) pairs
     """
+    n = lt.n
+    touched = lt.touched
     literals = []
+    for key in solution:
+        if key > 0 and touched[key]:
+            literals.append(divmod(key - 1, n))
+
+    return literals
+
+def ordering_pycosat(solution, lt):
+    """
+    Read the wizard ordering straight from the model, without listing literals.
+    :param solution: solution in Pycosat spec
+    :param lt: same LiteralTranslator object used for reduction
+    :return: list of all wizard ids, see `dg.linear_order`
+    :raises dg.CycleError: if the true literals contain a cycle
+    """
+    model = np.asarray(solution)
+    keys = model[model > 0]
+    keys = keys[np.frombuffer(lt.touched, dtype=np.uint8)[keys] != 0] - 1
+    return dg.linear_order(lt.n, keys // lt.n, keys % lt.n)
+
+# ====================
+# Symmetry Breaking
+# ====================
+
+def reversal_pair(constraints, exclude=()):
+    """
+    Every ordering satisfies the same constraints as its reverse, so the relative
+    order of any one pair of wizards can be fixed. Picks the pair that appears
+    together in the most constraints as an end and the middle, the pair the
+    solver is likely to branch on first.
+    :param constraints: list of triples (a, b, c)
+    :param exclude: wizards that may not appear in the pair
+    :return: pair (i, j) with i < j, or None if there is no such pair
+    """
+    counts = {}
+    for a, b, c in constraints:
+        for x in (a, b):
+            if x != c and x not in exclude and c not in exclude:
+                pair = (x, c) if x < c else (c, x)
+                counts[pair] = counts.get(pair, 0) + 1
+    if not counts:
+        return None
+    return max(sorted(counts), key=lambda pair: counts[pair])
+
+def interchangeable_pairs(constraints):
+    """
+    Find disjoint pairs of wizards whose exchange maps the constraint set onto
+    itself, i.e. wizards with identical roles. Candidates are grouped by their
+    number of appearances as an end and as the middle before the exchange is
+    checked constraint by constraint.
+    :param constraints: list of triples (a, b, c)
+    :return: list of pairs (u, v) with u < v, sharing no wizard
+    """
+    keys = set()
+    index = {}
+    signature = {}
+    for constraint in constraints:
+        a, b, c = constraint
+        key = (a, b, c) if a < b else (b, a, c)
+        keys.add(key)
+        for w in set(key):
+            index.setdefault(w, []).append(key)
+        for w in (a, b):
+            ends, middles = signature.get(w, (0, 0))
+            signature[w] = (ends + 1, middles)
+        ends, middles = signature.get(c, (0, 0))
+        signature[c] = (ends, middles + 1)
+
+    groups = {}
+    for w in sorted(signature):
+        groups.setdefault(signature[w], []).append(w)
+
+    def swapped(key, u, v):
+        a, b, c = [v if w == u else u if w == v else w for w in key]
+        return (a, b, c) if a < b else (b, a, c)
+
+    used = set()
+    pairs = []
+    for group in groups.values():
+        for i, u in enumerate(group):
+            if u in used:
+                continue
+            for v in group[i + 1:]:
+                if v in used:
+                    continue
+                if all(swapped(key, u, v) in keys for key in index[u] + index[v]):
+                    pairs.append((u, v))
+                    used.update((u, v))
+                    break
+    return pairs
+
+def symmetry_pairs(constraints):
+    """
+    Pairs (i, j) whose order "i < j" can be fixed together without losing
+    satisfiability: interchangeable pairs, disjoint from each other, and a
+    reversal pair disjoint from them all. Given any solution, reverse it if it
+    has the reversal pair out of order, then exchange each interchangeable pair
+    that is out of order; no exchange disturbs the other pairs.
+    :param constraints: list of triples (a, b, c)
+    :return: list of pairs (i, j), i < j, the reversal pair first
+    """
+    pairs = interchangeable_pairs(constraints)
+    pair = reversal_pair(constraints, exclude=set(w for p in pairs for w in p))
+    if pair is None:
+        # Every constrained pair touches an interchangeable wizard.
+        pair = reversal_pair(constraints)
+        return [] if pair is None else [pair]
+    return [pair] + pairs
+
+def symmetry_clauses(constraints, lt):
+    """
+    :param constraints: list of integer triples (a, b, c), see `src.instance`
+    :param lt: a LiteralTranslator object
+    :return: unit clauses fixing the order of `symmetry_pairs(constraints)`
+    """
+    clauses = []
+    for i, j in symmetry_pairs(constraints):
+        lt.touch_literal(j, i)
+        clauses.append([lt.touch_literal(i, j)])
+    return clauses
+
+# ====================
+# Lazy Refinement
+# ====================
+
+class RefinementLog(object):
+    """
+    Statistics of a `refine_pycosat` run: `rounds` is the number of SAT calls and
+    `clauses_added[r]` the number of transitivity clauses added after round r.
+    """
+    def __init__(self):
+        self.rounds = 0
+        self.clauses_added = []
+
+    def total_clauses_added(self):
+        return sum(self.clauses_added)
+
+def cycle_cuts(cycle, lt):
+    """
+    Transitivity clauses that rule out `cycle` v1 < v2 < ... < vk < v1: the fan of
+    triangles (v1, vm, vm+1) derives v1 < vk, which contradicts vk < v1.
+    :param cycle: list of wizard ids
+    :param lt: a LiteralTranslator object
+    :return: list of cnf clauses
+    """
+    n = lt.n
+    v1 = cycle[0]
+    clauses = []
+    for m in range(1, len(cycle) - 1):
+        vm, vn = cycle[m], cycle[m + 1]
+        clauses.append([-(v1 * n + vm + 1), -(vm * n + vn + 1), v1 * n + vn + 1])
+    return clauses
+
+def refine_pycosat(constraints, lt, max_rounds=None, log=None, symmetry=False, backend=None):
+    """
+    Solve the constraint and consistency clauses alone, then add transitivity
+    clauses only for the cycles found in the model, until the model is acyclic.
+    :param constraints: list of integer triples (a, b, c), see `src.instance`
+    :param lt: a LiteralTranslator object
+    :param max_rounds: give up after this many SAT calls, None for no limit
+    :param log: optional RefinementLog to fill in
+    :param symmetry: add symmetry-breaking unit clauses, see `symmetry_pairs`
+    :param backend: optional solver for each round, see `solve_pycosat`
+    :return: solution in Pycosat spec, "UNSAT", or "UNKNOWN" if out of rounds or time
+    """
+    if log is None:
+        log = RefinementLog()
+    profiler = instrument.PROFILER
+    with profiler.phase("reduce.constraints"):
+        cnf = constraint_clauses(constraints, lt)
+        if symmetry:
+            cnf.extend(symmetry_clauses(constraints, lt))
+    with profiler.phase("reduce.consistency"):
+        cnf.extend(LiteralConsistencyManager(lt).constraints())
+    added = set()
+
+    while max_rounds is None or log.rounds < max_rounds:
+        solution = solve_pycosat(cnf, backend)
+        log.rounds += 1
+        if solution in ("UNSAT", "UNKNOWN"):
+            break
+
+        with profiler.phase("refine.cycles"):
+            cycles = dg.find_cycles(lt.n, translate_pycosat(solution, lt))
+        if not cycles:
+            break
+
+        count = 0
+        for cycle in cycles:
+            for clause in cycle_cuts(cycle, lt):
+                key = tuple(clause)
+                if key not in added:
+                    added.add(key)
+                    cnf.append(clause)
+                    count += 1
+        log.clauses_added.append(count)
+    else:
+        solution = "UNKNOWN"
+
+    profiler.count("clauses", len(cnf))
+    profiler.count("literals_touched", len(lt.keys))
+    profiler.count("refine.rounds", log.rounds)
+    return solution
+
+# ====================
+# Pair Reduction
+# ====================
+
+class PairTranslator(object):
+    """
+    One variable per unordered wizard pair {i, j}. Variable v(i, j), i < j, is true
+    iff wizard i is younger than wizard j, so "j < i" is simply -v(i, j) and every
+    model is a tournament; transitivity clauses make it a total order. Example:
+
+    pt = PairTranslator(3)
+    pt.literal(0, 2)        # v(0, 2)
+    pt.literal(2, 0)        # -v(0, 2)
+    """
+    def __init__(self, num_wizards):
+        self.n = num_wizards
+
+    def num_variables(self):
+        return self.n * (self.n - 1) // 2
+
+    def variable(self, i, j):
+        """
+        :param i: smaller wizard id
+        :param j: larger wizard id
+        :return: positive index of the variable for pair {i, j}
+        """
+        return i * (2 * self.n - i - 1) // 2 + (j - i - 1) + 1
+
+    def literal(self, i, j):
+        """
+        :return: signed literal for "i < j"
+        """
+        if i < j:
+            return self.variable(i, j)
+        return -self.variable(j, i)
+
+def reduce_pycosat_pairs(constraints, pt, symmetry=False):
+    """
+    Pair encoding: c not between a and b iff "a < c" and "b < c" agree.
+    No consistency clauses are needed since "c < a" is the negation of "a < c".
+    :param constraints: list of integer triples (a, b, c), see `src.instance`
+    :param pt: a PairTranslator object
+    :param symmetry: add symmetry-breaking unit clauses, see `symmetry_pairs`
+    :return: normal form in Pycosat spec
+    """
+    profiler = instrument.PROFILER
+    cnf = []
+    with profiler.phase("reduce.constraints"):
+        if symmetry:
+            cnf.extend([pt.literal(i, j)] for i, j in symmetry_pairs(constraints))
+        for constraint in constraints:
+            a, b, c = constraint
+            if c == a or c == b:
+                continue    # Trivially satisfied, and "c < c" has no variable.
+            x1 = pt.literal(a, c)
+            x3 = pt.literal(b, c)
+            cnf.append([-x1, x3])
+            cnf.append([x1, -x3])
+
+    with profiler.phase("reduce.transitivity"):
+        n = pt.n
+        var = pt.variable
+        for i in range(n):
+            for j in range(i + 1, n):
+                ij = var(i, j)
+                for k in range(j + 1, n):
+                    jk = var(j, k)
+                    ik = var(i, k)
+                    cnf.append([-ij, -jk, ik])      # i < j < k
+                    cnf.append([ij, jk, -ik])       # k < j < i
+
+    profiler.count("clauses", len(cnf))
+    profiler.count("variables", pt.num_variables())
+    return cnf
+
+def translate_pycosat_pairs(solution, pt):
+    """
+    :param solution: solution in Pycosat spec
+    :param pt: same PairTranslator object used for reduction
+    :return: list of (younger, older) pairs, one per wizard pair
+    """
+    value = [False] * (pt.num_variables() + 1)
     for key in solution:
         if key > 0:
-            literals.append(lt.translate(key))
+            value[key] = True
+
+    literals = []
+    n = pt.n
+    for i in range(n):
+        for j in range(i + 1, n):
+            if value[pt.variable(i, j)]:
+                literals.append((i, j))
+            else:
+                literals.append((j, i))
 
     return literals
 
+def ordering_pycosat_pairs(solution, pt):
+    """
+    Read the wizard ordering straight from the model; every pair has exactly one
+    direction, so this is the in-degree sort of `dg.linear_order`.
+    :param solution: solution in Pycosat spec
+    :param pt: same PairTranslator object used for reduction
+    :return: list of all wizard ids
+    :raises dg.CycleError: if the model is not transitive
+    """
+    value = np.zeros(pt.num_variables() + 1, dtype=bool)
+    model = np.asarray(solution)
+    value[model[model > 0]] = True
+    i, j = np.triu_indices(pt.n, 1)     # Pair {i, j} has variable index + 1.
+    younger = value[1:]
+    return dg.linear_order(pt.n, np.where(younger, i, j), np.where(younger, j, i))
+
 # ====================
 # Satispy Reduction
 # ====================
@@ -198,6 +553,8 @@ def touch_variable(name, map):
     :param map: mapping of name to Variable
     :return: variable found or created
     """
+    from satispy import Variable
+
     if name in map:
         var = map[name]
     else:
@@ -211,6 +568,8 @@ def reduce_satispy(constraints):
     :param constraints: inputs from wizard problem
     :return: Cnf object
     """
+    from satispy import Cnf
+
     mapping = {}
     exp = Cnf()
     for constraint in constraints:
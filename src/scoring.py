@@ -0,0 +1,52 @@
+import numpy as np
+
+def constraint_array(constraints, index=None):
+    """
+    :param constraints: list of 3-element constraints
+    :param index: optional mapping from name to wizard id, for name constraints
+    :return: (m, 3) int32 array of wizard ids
+    """
+    if index is not None:
+        constraints = [(index[a], index[b], index[c]) for a, b, c in constraints]
+    return np.array(constraints, dtype=np.int32).reshape(-1, 3)
+
+def positions(orderings):
+    """
+    :param orderings: (k, n) array, orderings[r] lists wizard ids youngest first
+    :return: (k, n) array where result[r, w] is the position of wizard w in orderings[r]
+    """
+    orderings = np.atleast_2d(np.asarray(orderings))
+    k, n = orderings.shape
+    pos = np.empty((k, n), dtype=np.int32)
+    pos[np.arange(k)[:, None], orderings] = np.arange(n, dtype=np.int32)
+    return pos
+
+def score_positions(pos, constraints, masks=False):
+    """
+    :param pos: (k, n) position array, see `positions`
+    :param constraints: (m, 3) array from `constraint_array`
+    :param masks: also return the (k, m) boolean array of violated constraints
+    :return: (k,) array of satisfied counts, and the violation masks if `masks`
+    """
+    pa = pos[:, constraints[:, 0]]
+    pb = pos[:, constraints[:, 1]]
+    pc = pos[:, constraints[:, 2]]
+    violated = ((pa < pc) & (pc < pb)) | ((pb < pc) & (pc < pa))
+    counts = len(constraints) - np.count_nonzero(violated, axis=1)
+    if masks:
+        return counts, violated
+    return counts
+
+def score_orderings(orderings, constraints, masks=False):
+    """
+    Score k candidate orderings at once. Example:
+
+    C = constraint_array([(0, 1, 2)])
+    score_orderings([[0, 1, 2], [0, 2, 1]], C)    # array([1, 0])
+
+    :param orderings: (k, n) array of wizard ids, or a single ordering
+    :param constraints: (m, 3) array from `constraint_array`
+    :param masks: also return the (k, m) boolean array of violated constraints
+    :return: (k,) array of satisfied counts, and the violation masks if `masks`
+    """
+    return score_positions(positions(orderings), constraints, masks)
@@ -0,0 +1,189 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_QUEUE_SIZE = 64     # Instances read ahead of the workers before reading pauses.
+
+class ProtocolError(ValueError):
+    """
+    Raised when a stream does not follow the `.in` format.
+    """
+
+async def read_instance(reader):
+    """
+    Read one instance in the `.in` format: the number of wizards, the number of
+    constraints, then one constraint of three names per line. The counts make
+    instances self-delimiting, so a stream may hold any number of them; blank
+    lines between instances are skipped.
+    :param reader: object with a coroutine readline() returning bytes
+    :return: tuple (num_wizards, constraints), or None at the end of the stream
+    :raises ProtocolError: on a malformed or truncated instance
+    """
+    line = await reader.readline()
+    while line and not line.strip():
+        line = await reader.readline()
+    if not line:
+        return None
+    try:
+        num_wizards = int(line)
+        # At the end of the stream this is int(b""), also a ValueError.
+        num_constraints = int(await reader.readline())
+    except ValueError:
+        raise ProtocolError("expected the number of wizards and of constraints")
+
+    constraints = []
+    for _ in range(num_constraints):
+        line = await reader.readline()
+        try:
+            constraint = line.decode().split()
+        except UnicodeDecodeError:
+            raise ProtocolError("constraint is not UTF-8: {0!r}".format(line))
+        if len(constraint) != 3:
+            raise ProtocolError("expected 3 wizards per constraint, got {0!r}".format(line.decode()))
+        constraints.append(constraint)
+    return num_wizards, constraints
+
+def solve_instance(num_wizards, constraints, options):
+    """
+    Worker process body: solve one instance with `solver.solve`. Wizards are
+    interned in order of first appearance, so an instance always gets the same
+    ordering; the names must be exactly `num_wizards`, since a wizard in no
+    constraint has no name to answer with.
+    :return: response dict with the ordering and its score
+    :raises ValueError: if the constraints do not name `num_wizards` wizards
+    """
+    from solver import solve
+
+    start = time.time()
+    wizards = list(dict.fromkeys(w for constraint in constraints for w in constraint))
+    if len(wizards) != num_wizards:
+        raise ValueError("expected {0} wizards, the constraints name {1}".format(
+            num_wizards, len(wizards)))
+    stats = {}
+    ordering = solve(num_wizards, len(constraints), wizards, constraints, stats=stats, workers=1,
+                     **options)
+    return {'ordering': ordering, 'satisfied': stats['satisfied'], 'total': len(constraints),
+            'engine': stats['engine'], 'time': time.time() - start}
+
+class ThreadReader(object):
+    """
+    Blocking binary stream, i.e. stdin, read line by line on the default executor,
+    so it works for pipes and redirected files alike.
+    """
+    def __init__(self, stream):
+        self.stream = stream
+
+    async def readline(self):
+        return await asyncio.get_running_loop().run_in_executor(None, self.stream.readline)
+
+class SolverServer(object):
+    """
+    Reads instances from streams and solves them on a process pool. Every stream
+    feeds one bounded queue, drained by one task per worker: when the queue is
+    full, reading stops until a worker frees up, so a fast client cannot make the
+    server buffer without bound. Responses are JSON lines carrying the position
+    `id` of the instance in its stream, written as instances finish.
+
+    Workers are forked from a fork server that imports `preload` once, so they
+    start warm but do not inherit client sockets the way a fork of this process
+    would; an inherited socket would keep the client waiting for end of stream.
+
+    server = SolverServer(workers=4, options={'engine': 'backtrack'})
+    server.run()                    # Serve stdin until it is closed.
+    server.run("/tmp/solver.sock")  # Serve a Unix socket until interrupted.
+    """
+    def __init__(self, workers=None, queue_size=DEFAULT_QUEUE_SIZE, options=None, preload=()):
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.options = options or {}
+        self.preload = ['solver', 'src.server'] + list(preload)
+
+    async def __consume(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            id, instance, send, done = await self.queue.get()
+            try:
+                response = {'id': id}
+                response.update(await loop.run_in_executor(self.pool, solve_instance, instance[0],
+                                                           instance[1], self.options))
+            except Exception as e:
+                response = {'id': id, 'error': "{0}: {1}".format(type(e).__name__, e)}
+            try:
+                await send(response)
+            finally:
+                done.set_result(None)
+                self.queue.task_done()
+
+    async def handle(self, reader, send):
+        """
+        Queue every instance of one stream, then wait until all are answered.
+        :param reader: object with a coroutine readline() returning bytes
+        :param send: coroutine function writing one response dict
+        """
+        pending = []
+        id = 0
+        while True:
+            try:
+                instance = await read_instance(reader)
+            except ProtocolError as e:
+                # The stream cannot be resynchronized past a malformed instance.
+                await send({'id': id, 'error': "ProtocolError: {0}".format(e)})
+                break
+            if instance is None:
+                break
+            done = asyncio.get_running_loop().create_future()
+            pending.append(done)
+            await self.queue.put((id, instance, send, done))
+            id += 1
+        await asyncio.gather(*pending)
+
+    async def __client(self, reader, writer):
+        async def send(response):
+            writer.write((json.dumps(response) + "\n").encode())
+            await writer.drain()
+
+        try:
+            await self.handle(reader, send)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, path=None):
+        """
+        Serve the Unix socket at `path`, or stdin and stdout if `path` is None.
+        SIGTERM stops serving and shuts the pool down.
+        """
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        self.queue = asyncio.Queue(self.queue_size)
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(self.preload)
+        self.pool = ProcessPoolExecutor(self.workers, mp_context=context)
+        consumers = [asyncio.ensure_future(self.__consume()) for _ in range(self.workers)]
+        try:
+            if path is None:
+                async def send(response):
+                    sys.stdout.write(json.dumps(response) + "\n")
+                    sys.stdout.flush()
+                await self.handle(ThreadReader(sys.stdin.buffer), send)
+            else:
+                if os.path.exists(path):
+                    os.unlink(path)
+                server = await asyncio.start_unix_server(self.__client, path)
+                async with server:
+                    await server.serve_forever()
+        finally:
+            for consumer in consumers:
+                consumer.cancel()
+            self.pool.shutdown(cancel_futures=True)
+
+    def run(self, path=None):
+        try:
+            asyncio.run(self.serve(path))
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            pass
@@ -1,6 +1,8 @@
 import random
 import string
 
+CHUNK_ROWS = 1 << 18        # Constraints formatted per write by stream_to_file.
+
 def name_gen(constraints, n):
     """
     input: constraints - list of lists of [first, second, third] (all ints)
@@ -11,6 +13,7 @@ def name_gen(constraints, n):
 
     ascii_vals = "{0}{1}".format(string.ascii_letters, string.digits)
     names = []
+    seen = set()
     newNames = []
 
     while len(names) < n:
@@ -18,8 +21,9 @@ def name_gen(constraints, n):
         nameSize = random.randrange(1,11)
         for letter in range(nameSize):
             name.append(ascii_vals[random.randrange(len(ascii_vals))])
-        if("".join(name) not in names):
+        if("".join(name) not in seen):
             names.append("".join(name))
+            seen.add(names[-1])
 
     for c in constraints:
         newNames.append([names[c[0]], names[c[1]], names[c[2]]])
@@ -45,3 +49,26 @@ def output_to_file(ordering, constraints, filename):
 
         for c in constraints:
             f.write("{0} {1} {2}\n".format(c[0], c[1], c[2]))
+
+def stream_to_file(ordering, constraints, filename):
+    """
+    `output_to_file` for an (m, 3) array of positions in `ordering`, such as
+    `sample_constraints` returns. Lines are formatted and written CHUNK_ROWS
+    constraints at a time, so the text of the whole file never exists at once.
+    """
+    import numpy as np
+
+    # Each name with the separator that follows it, as ends and as middles.
+    ends = np.array(["{0} ".format(name) for name in ordering], dtype=object)
+    middles = np.array(["{0}\n".format(name) for name in ordering], dtype=object)
+    with open(filename, 'w') as f:
+        f.write("{0}\n".format(len(ordering)))
+        f.write("".join(ends.tolist()))
+        f.write("\n{0}\n".format(len(constraints)))
+
+        for start in range(0, len(constraints), CHUNK_ROWS):
+            chunk = constraints[start:start + CHUNK_ROWS]
+            tokens = np.empty(chunk.shape, dtype=object)
+            tokens[:, :2] = ends[chunk[:, :2]]
+            tokens[:, 2] = middles[chunk[:, 2]]
+            f.write("".join(tokens.ravel().tolist()))
@@ -0,0 +1,52 @@
+import unittest
+import random
+import sys
+import time
+import os.path
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+
+import src.annealing as sa
+
+def hidden_instance(n, m, seed):
+    rng = random.Random(seed)
+    hidden = rng.sample(range(n), n)
+    constraints = []
+    while len(constraints) < m:
+        a, b, c = sorted(rng.sample(range(n), 3))
+        constraints.append((hidden[a], hidden[b], hidden[c]) if rng.random() < 0.5 else
+                           (hidden[b], hidden[c], hidden[a]))
+    return constraints
+
+class TestAnnealing(unittest.TestCase):
+    def test_anneal(self):
+        constraints = hidden_instance(15, 80, 3)
+        ordering, satisfied = sa.anneal(15, constraints, iterations=100000, seed=1)
+        self.assertEqual(sorted(ordering), list(range(15)))
+        self.assertEqual(satisfied, len(constraints))
+
+    def test_parallel_anneal(self):
+        constraints = hidden_instance(15, 80, 4)
+        ordering, satisfied = sa.parallel_anneal(15, constraints, restarts=4, workers=2,
+                                                 time_limit=30)
+        self.assertEqual(sorted(ordering), list(range(15)))
+        self.assertEqual(satisfied, len(constraints))
+
+    def test_time_limit_covers_all_restarts(self):
+        # Unsatisfiable, so every run would use all the time it gets.
+        constraints = hidden_instance(15, 80, 5) + [(0, 1, 2), (1, 2, 0), (2, 0, 1)]
+        for workers, restarts in ((1, 3), (2, 6)):
+            start = time.time()
+            ordering, satisfied = sa.parallel_anneal(15, constraints, restarts=restarts,
+                                                     workers=workers, time_limit=1)
+            self.assertLess(time.time() - start, 2)
+            self.assertEqual(sorted(ordering), list(range(15)))
+            self.assertLess(satisfied, len(constraints))
+
+    def test_no_time(self):
+        ordering, satisfied = sa.anneal(15, hidden_instance(15, 80, 6), time_limit=0)
+        self.assertEqual(sorted(ordering), list(range(15)))
+
+
+if __name__ == '__main__':
+    unittest.main()
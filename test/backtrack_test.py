@@ -0,0 +1,60 @@
+import unittest
+import itertools
+import os
+import random
+import sys
+import os.path
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+
+from src.backtrack import BacktrackSearch
+from src.instance import intern_constraints
+from solver import read_input
+from sat_test import check
+
+class BacktrackTest(unittest.TestCase):
+    DIR_INPUTS_20 = "phase2_inputs/inputs20"
+
+    def test_hidden_ordering(self):
+        rng = random.Random(11)
+        hidden = rng.sample(range(20), 20)
+        constraints = []
+        while len(constraints) < 150:
+            a, b, c = sorted(rng.sample(range(20), 3))
+            constraints.append((hidden[a], hidden[b], hidden[c]) if rng.random() < 0.5 else
+                               (hidden[c], hidden[b], hidden[a]))
+        ordering = BacktrackSearch(20, constraints).solve()
+        self.assertEqual(sorted(ordering), list(range(20)))
+        self.assertTrue(check(constraints, ordering))
+
+    def test_unsat(self):
+        search = BacktrackSearch(4, [(0, 1, 2), (0, 2, 1), (1, 2, 0)])
+        self.assertIsNone(search.solve())
+        self.assertFalse(search.exhausted)
+
+    def test_matches_brute_force(self):
+        rng = random.Random(12)
+        for _ in range(100):
+            n = rng.randint(3, 6)
+            constraints = [tuple(rng.sample(range(n), 3)) for _ in range(rng.randint(1, 3 * n))]
+            satisfiable = any(check(constraints, list(p)) for p in itertools.permutations(range(n)))
+            ordering = BacktrackSearch(n, constraints, seed=rng.randrange(100)).solve()
+            self.assertEqual(ordering is not None, satisfiable)
+            if ordering is not None:
+                self.assertTrue(check(constraints, ordering))
+
+    def test_node_limit(self):
+        search = BacktrackSearch(4, [(0, 1, 2), (0, 2, 1), (1, 2, 0)], node_limit=1)
+        self.assertIsNone(search.solve())
+        self.assertTrue(search.exhausted)
+
+    def test_inputs20(self):
+        for file in sorted(os.listdir(self.DIR_INPUTS_20)):
+            _, _, wizards, constraints = read_input(os.path.join(self.DIR_INPUTS_20, file))
+            names, int_constraints = intern_constraints(constraints, wizards)
+            ordering = BacktrackSearch(len(names), int_constraints).solve()
+            self.assertTrue(check(int_constraints, ordering), file)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import json
+import os
+import shutil
+import sys
+import tempfile
+import os.path
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+
+import run_batch
+
+class BatchTest(unittest.TestCase):
+    DIR_INPUTS_20 = "phase2_inputs/inputs20"
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.inputs = os.path.join(self.tmp, "inputs")
+        self.outputs = os.path.join(self.tmp, "outputs")
+        os.makedirs(os.path.join(self.inputs, "inputs20"))
+        for file in ["input20_0.in", "input20_1.in"]:
+            shutil.copy(os.path.join(self.DIR_INPUTS_20, file),
+                        os.path.join(self.inputs, "inputs20", file))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_output_path(self):
+        self.assertEqual(run_batch.output_path("phase2_inputs", "phase2_outputs",
+                                               "phase2_inputs/inputs20/input20_0.in"),
+                         os.path.join("phase2_outputs", "outputs20", "output20_0.out"))
+        self.assertEqual(run_batch.output_path("in", "out", "in/inputs/my_input/input_x_input.in"),
+                         os.path.join("out", "outputs", "my_input", "output_x_input.out"))
+
+    def test_run_and_resume(self):
+        records = run_batch.run_batch(self.inputs, self.outputs, workers=2)
+        self.assertEqual([r['status'] for r in records], ['ok', 'ok'])
+        for r in records:
+            self.assertEqual(r['satisfied'], r['total'])
+            self.assertTrue(os.path.exists(r['output']))
+
+        # A resumed run finds nothing left to do and writes no new journal lines.
+        journal = os.path.join(self.outputs, run_batch.JOURNAL)
+        with open(journal) as f:
+            lines = f.readlines()
+        resumed = run_batch.run_batch(self.inputs, self.outputs, resume=True)
+        self.assertEqual(resumed, records)
+        with open(journal) as f:
+            self.assertEqual(f.readlines(), lines)
+        self.assertEqual(len([json.loads(l) for l in lines]), 2)
+
+    def test_fresh_run_restarts_journal(self):
+        run_batch.run_batch(self.inputs, self.outputs)
+        os.remove(os.path.join(self.inputs, "inputs20", "input20_1.in"))
+        run_batch.run_batch(self.inputs, self.outputs)
+        journal = run_batch.read_journal(os.path.join(self.outputs, run_batch.JOURNAL))
+        self.assertEqual(sorted(os.path.basename(path) for path in journal), ["input20_0.in"])
+
+    def test_options_forwarded(self):
+        def solve_ids(num_wizards, constraints, *args, **kwargs):
+            ordering = original(num_wizards, constraints, *args, **kwargs)
+            # The engine is the one field of the record the worker fills from stats.
+            kwargs['stats']['engine'] = json.dumps(
+                [num_wizards] + [kwargs[key] for key in ("constrained_only", "symmetry", "iterations")])
+            return ordering
+
+        original = run_batch.solve_ids
+        run_batch.solve_ids = solve_ids
+        try:
+            records = run_batch.run_batch(self.inputs, self.outputs, options={
+                'constrained_only': True, 'symmetry': True, 'iterations': 7})
+        finally:
+            run_batch.solve_ids = original
+        for record in records:
+            self.assertEqual(json.loads(record['engine']), [20, True, True, 7])
+
+    def test_unnamed_wizards(self):
+        path = os.path.join(self.inputs, "inputs20", "input20_0.in")
+        with open(path) as f:
+            lines = f.readlines()
+        with open(path, "w") as f:
+            f.writelines(["21\n"] + lines[1:])
+        records = run_batch.run_batch(self.inputs, self.outputs)
+        self.assertEqual([r['status'] for r in records], ['error', 'ok'])
+        self.assertIn("21 wizards", records[0]['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
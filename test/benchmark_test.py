@@ -0,0 +1,44 @@
+import unittest
+import os
+import sys
+import os.path
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir, "bench")))
+
+import benchmark
+from solver import num_constraints_satisfied
+
+class BenchmarkTest(unittest.TestCase):
+    def test_synthetic_instance(self):
+        constraints = benchmark.synthetic_instance(30, 300, seed=1)
+        self.assertEqual(len(constraints), 300)
+        self.assertEqual(constraints, benchmark.synthetic_instance(30, 300, seed=1))
+        result = benchmark.run_isolated(30, constraints, {'engine': 'sat'}, timeout=60)
+        self.assertEqual(result['status'], 'ok')
+        self.assertEqual(result['satisfied'], 300)
+        self.assertGreater(result['clauses'], 0)
+        self.assertGreater(result['rss'], 0)
+
+    def test_timeout(self):
+        constraints = benchmark.synthetic_instance(60, 600, seed=1)
+        result = benchmark.run_isolated(60, constraints, {'engine': 'local', 'iterations': 10 ** 9},
+                                        timeout=0.5)
+        self.assertEqual(result['status'], 'timeout')
+
+    def test_compare(self):
+        old = {'time': 1.0, 'rss': 50.0, 'clauses': 1000, 'ratio': 1.0, 'status': 'ok'}
+        baseline = {'a/sat': old, 'b/sat': old, 'c/sat': old}
+        rows = {'a/sat': dict(old, time=1.1, rss=55.0),
+                'b/sat': dict(old, time=2.0, clauses=2000, ratio=0.9),
+                'c/sat': dict(old, status='timeout'),
+                'd/sat': dict(old, time=100.0)}
+        self.assertEqual([key for key, _ in benchmark.compare(rows, baseline)],
+                         ['b/sat', 'b/sat', 'b/sat', 'c/sat'])
+        self.assertEqual(benchmark.compare(rows, baseline, threshold=1.5),
+                         [('b/sat', "satisfied ratio 0.9000, was 1.0000"),
+                          ('c/sat', "status timeout, was ok")])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import os.path
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+
+from src.cache import canonical_hash, ResultCache
+from src.instance import intern_constraints
+from solver import read_input, solve_ids, num_constraints_satisfied
+
+def shuffled_copy(num_wizards, constraints, seed):
+    """
+    :return: tuple (constraints with wizards relabelled, ends swapped and lines shuffled, relabelling)
+    """
+    rng = random.Random(seed)
+    perm = list(range(num_wizards))
+    rng.shuffle(perm)
+    copy = [(perm[b], perm[a], perm[c]) if rng.random() < 0.5 else (perm[a], perm[b], perm[c])
+            for a, b, c in constraints]
+    rng.shuffle(copy)
+    return copy, perm
+
+class SlowReadCache(ResultCache):
+    def read(self, key):
+        entry = ResultCache.read(self, key)
+        time.sleep(0.1)     # Stale by the time it is compared.
+        return entry
+
+class CanonicalHashTest(unittest.TestCase):
+    def setUp(self):
+        _, _, _, constraints = read_input("phase2_inputs/inputs35/input35_0.in")
+        self.names, self.constraints = intern_constraints(constraints)
+        self.n = len(self.names)
+
+    def test_renaming_invariant(self):
+        key, labels = canonical_hash(self.n, self.constraints)
+        self.assertEqual(sorted(labels), list(range(self.n)))
+        for seed in range(3):
+            copy, _ = shuffled_copy(self.n, self.constraints, seed)
+            self.assertEqual(canonical_hash(self.n, copy)[0], key)
+
+    def test_distinguishes_instances(self):
+        key, _ = canonical_hash(self.n, self.constraints)
+        self.assertNotEqual(canonical_hash(self.n, self.constraints[1:])[0], key)
+        a, b, c = self.constraints[0]
+        self.assertNotEqual(canonical_hash(self.n, [(a, c, b)] + self.constraints[1:])[0], key)
+
+class ResultCacheTest(unittest.TestCase):
+    INPUT = "phase2_inputs/inputs20/input20_0.in"
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cache = ResultCache(os.path.join(self.tmp, "cache"), max_entries=2)
+        _, _, _, constraints = read_input(self.INPUT)
+        self.names, self.constraints = intern_constraints(constraints)
+        self.n = len(self.names)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_hit_on_renamed_copy(self):
+        stats = {}
+        ordering = solve_ids(self.n, self.constraints, stats=stats, cache=self.cache)
+        self.assertEqual(stats['cache'], 'miss')
+        self.assertEqual(stats['satisfied'], len(self.constraints))
+
+        copy, _ = shuffled_copy(self.n, self.constraints, 0)
+        stats = {}
+        ordering = solve_ids(self.n, copy, stats=stats, cache=self.cache)
+        self.assertEqual((stats['cache'], stats['engine']), ('hit', 'cache'))
+        self.assertEqual(num_constraints_satisfied(self.n, copy, ordering), len(copy))
+
+    def test_warm_start(self):
+        key, labels = canonical_hash(self.n, self.constraints)
+        partial = list(range(self.n))
+        satisfied = num_constraints_satisfied(self.n, self.constraints, partial)
+        self.assertLess(satisfied, len(self.constraints))
+        self.assertTrue(self.cache.store(key, labels, partial, satisfied, len(self.constraints)))
+        self.assertEqual(self.cache.load(key, labels), partial)
+        self.assertFalse(self.cache.store(key, labels, partial, satisfied - 1, len(self.constraints)))
+
+        stats = {}
+        solve_ids(self.n, self.constraints, stats=stats, engine='local', iterations=100000,
+                  cache=self.cache)
+        self.assertEqual(stats['cache'], 'warm')
+        self.assertGreaterEqual(stats['satisfied'], satisfied)
+        self.assertEqual(self.cache.read(key)['satisfied'], stats['satisfied'])
+
+    def test_lru_eviction(self):
+        labels = list(range(3))
+        for key in ["a", "b"]:
+            self.cache.store(key, labels, [0, 1, 2], 1, 1)
+        past = time.time() - 100
+        os.utime(self.cache.path("a"), (past, past))
+        os.utime(self.cache.path("b"), (past - 1, past - 1))
+        self.assertIsNotNone(self.cache.load("b", labels))     # Now the most recently used.
+        self.cache.store("c", labels, [0, 1, 2], 1, 1)
+        self.assertEqual(sorted(name for name in os.listdir(self.cache.directory)
+                                if name.endswith(".json")), ["b.json", "c.json"])
+
+    def test_concurrent_stores(self):
+        # Every writer would see no entry unless they take turns.
+        cache = SlowReadCache(self.cache.directory)
+        labels = list(range(3))
+        context = multiprocessing.get_context("fork")
+        processes = [context.Process(target=cache.store, args=("a", labels, [0, 1, 2], s, 8))
+                     for s in reversed(range(8))]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.assertEqual(cache.read("a")['satisfied'], 7)
+
+    def test_unreadable_entry(self):
+        os.makedirs(self.cache.directory)
+        with open(self.cache.path("a"), "w") as f:
+            f.write("{")
+        self.assertIsNone(self.cache.load("a", [0, 1, 2]))
+        self.assertTrue(self.cache.store("a", [0, 1, 2], [2, 1, 0], 1, 1))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,13 +9,13 @@ import src.dag_utils as dg
 class TestDagMethods(unittest.TestCase):
 
     def test_linearize_basic(self):
-        G = dg.build_dag(["Hermione < Dumbledore", "Harry < Dumbledore", "Hermione < Snape",
-                          "Hermione < Harry", "Snape < Dumbledore"])
+        G = dg.build_dag([("Hermione", "Dumbledore"), ("Harry", "Dumbledore"), ("Hermione", "Snape"),
+                          ("Hermione", "Harry"), ("Snape", "Dumbledore")])
         result = dg.linearize(G)
         self.assertEqual(result, ["Hermione", "Harry", "Snape", "Dumbledore"])
 
     def test_linearize_multiple_source(self):
-        G = dg.build_dag(["Hermione < Dumbledore", "Snape < Dumbledore", "Harry < Snape"])
+        G = dg.build_dag([("Hermione", "Dumbledore"), ("Snape", "Dumbledore"), ("Harry", "Snape")])
         result = dg.linearize(G)
         valid = (result == ["Hermione", "Harry", "Snape", "Dumbledore"]) | \
                 (result == ["Harry", "Snape", "Hermione", "Dumbledore"]) | \
@@ -23,12 +23,33 @@ class TestDagMethods(unittest.TestCase):
         self.assertTrue(valid)
 
     def test_linearize_multiple_sink(self):
-        G = dg.build_dag(["Harry < Dumbledore", "Harry < Snape", "Hermione < Harry"])
+        G = dg.build_dag([("Harry", "Dumbledore"), ("Harry", "Snape"), ("Hermione", "Harry")])
         result = dg.linearize(G)
         valid = (result == ["Hermione", "Harry", "Snape", "Dumbledore"]) | \
                 (result == ["Hermione", "Harry", "Dumbledore", "Snape"])
         self.assertTrue(valid)
 
+    def test_find_cycles(self):
+        self.assertEqual(dg.find_cycles(3, [(0, 1), (1, 2), (0, 2)]), [])
+        self.assertEqual(dg.find_cycles(4, [(0, 1), (1, 2), (2, 3), (3, 1)]), [[1, 2, 3]])
+
+    def test_cycle_error(self):
+        G = dg.build_dag([("Harry", "Snape"), ("Snape", "Dumbledore"), ("Dumbledore", "Harry")])
+        with self.assertRaises(dg.CycleError) as context:
+            dg.linearize(G)
+        self.assertEqual(sorted(context.exception.cycle), ["Dumbledore", "Harry", "Snape"])
+        self.assertTrue(isinstance(context.exception, ValueError))
+
+    def test_linear_order(self):
+        # Total order 2 < 0 < 3 < 1, as every pair.
+        edges = [(2, 0), (2, 3), (2, 1), (0, 3), (0, 1), (3, 1)]
+        before, after = zip(*edges)
+        self.assertEqual(dg.linear_order(4, before, after), [2, 0, 3, 1])
+        # Partial order: in-degrees alone would put 3 before 1.
+        self.assertEqual(dg.linear_order(4, [0, 1, 2], [1, 2, 3]), [0, 1, 2, 3])
+        with self.assertRaises(dg.CycleError):
+            dg.linear_order(3, [0, 1, 2], [1, 2, 0])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+import random
+import sys
+import os.path
+import shutil
+import tempfile
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+
+import numpy as np
+
+import src.utils as utils
+from src.all_constraints import (generate_all_constraints, insert_duplicates,
+                                 sample_constraints, sample_duplicates)
+from src.instance import read_instance
+from instance_validator import processLargeInput
+
+class SampleConstraintsTest(unittest.TestCase):
+    def check(self, n, constraints):
+        for a, b, c in constraints.tolist():
+            self.assertEqual(len(set((a, b, c))), 3)
+            self.assertFalse(min(a, b) < c < max(a, b))
+
+    def test_valid_distinct_and_covering(self):
+        rng = np.random.default_rng(0)
+        for n, m in ((3, 2), (10, 200), (20, 500), (50, 500), (101, 40)):
+            constraints = sample_constraints(n, m, rng)
+            self.assertEqual(constraints.shape, (m, 3))
+            self.check(n, constraints)
+            self.assertEqual(len(set(map(tuple, constraints.tolist()))), m)
+            self.assertEqual(set(constraints.ravel().tolist()), set(range(n)))
+
+    def test_every_constraint_when_all_are_asked_for(self):
+        n = 7
+        constraints = sample_constraints(n, n * (n - 1) * (n - 2) // 3, np.random.default_rng(1))
+        found = set((min(a, b), max(a, b), c) for a, b, c in constraints.tolist())
+        expected = set((min(a, b), max(a, b), c) for a, b, c in generate_all_constraints(list(range(n))))
+        self.assertEqual(found, expected)
+
+    def test_seeded(self):
+        first = sample_constraints(30, 300, np.random.default_rng(5))
+        second = sample_constraints(30, 300, np.random.default_rng(5))
+        self.assertTrue((first == second).all())
+
+    def test_impossible(self):
+        rng = np.random.default_rng(0)
+        self.assertRaises(ValueError, sample_constraints, 2, 1, rng)
+        self.assertRaises(ValueError, sample_constraints, 30, 9, rng)
+        self.assertRaises(ValueError, sample_constraints, 5, 21, rng)
+
+class DuplicatesTest(unittest.TestCase):
+    def test_sample_duplicates(self):
+        rng = np.random.default_rng(0)
+        constraints = sample_constraints(20, 100, rng)
+        result = sample_duplicates(constraints, 10, rng)
+        self.assertEqual(result.shape, (110, 3))
+        degenerate = [c for c in result.tolist() if len(set(c)) < 3]
+        self.assertEqual(len(degenerate), 10)
+        self.assertEqual([c for c in result.tolist() if len(set(c)) == 3], constraints.tolist())
+
+    def test_insert_duplicates(self):
+        random.seed(0)
+        constraints = [(0, 1, 2), (3, 4, 5), (6, 7, 8)]
+        result = insert_duplicates(constraints, 4)
+        self.assertEqual(len(result), 7)
+        self.assertEqual([c for c in result if len(set(c)) == 3], constraints)
+
+class StreamToFileTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_matches_output_to_file(self):
+        random.seed(2)
+        rng = np.random.default_rng(2)
+        names, _ = utils.name_gen([], 25)
+        constraints = sample_duplicates(sample_constraints(25, 300, rng), 6, rng)
+        streamed = os.path.join(self.tmp, "streamed.in")
+        written = os.path.join(self.tmp, "written.in")
+        old_rows = utils.CHUNK_ROWS
+        utils.CHUNK_ROWS = 64
+        try:
+            utils.stream_to_file(names, constraints, streamed)
+        finally:
+            utils.CHUNK_ROWS = old_rows
+        utils.output_to_file(names, [[names[w] for w in c] for c in constraints.tolist()], written)
+        with open(streamed) as f, open(written) as g:
+            self.assertEqual(f.read(), g.read())
+
+        num_wizards, read_names, read_constraints = read_instance(streamed, with_ordering=True)
+        self.assertEqual(num_wizards, 25)
+        self.assertEqual(len(read_constraints), 306)
+        self.assertEqual(processLargeInput(streamed), "Success!")
+
+if __name__ == '__main__':
+    unittest.main()
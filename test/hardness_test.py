@@ -0,0 +1,77 @@
+import unittest
+import random
+import sys
+import os.path
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+
+import src.hardness as hardness
+
+class PlantedInstanceTest(unittest.TestCase):
+    def test_valid_distinct_and_covering(self):
+        rng = random.Random(0)
+        for n, m in ((3, 1), (10, 4), (20, 100), (31, 200)):
+            constraints = hardness.planted_instance(n, m, rng)
+            self.assertEqual(len(constraints), m)
+            self.assertEqual(len(set((min(a, b), max(a, b), c) for a, b, c in constraints)), m)
+            self.assertEqual(set(w for c in constraints for w in c), set(range(n)))
+            for a, b, c in constraints:
+                self.assertEqual(len(set((a, b, c))), 3)
+                self.assertFalse(min(a, b) < c < max(a, b))
+
+    def test_impossible(self):
+        rng = random.Random(0)
+        self.assertRaises(ValueError, hardness.planted_instance, 30, 9, rng)
+        self.assertRaises(ValueError, hardness.planted_instance, 5, 21, rng)
+
+class HardenTest(unittest.TestCase):
+    def test_never_easier(self):
+        rng = random.Random(1)
+        start = hardness.planted_instance(20, 80, rng)
+        initial = hardness.measure(20, start, engines=['backtrack'])
+        improvements = []
+        constraints, metrics = hardness.harden(20, start, rng, 10, node_limit=5000,
+                                               log=lambda step, m: improvements.append(m['nodes']),
+                                               engines=['backtrack'])
+        self.assertEqual(len(constraints), 80)
+        self.assertGreaterEqual(metrics['nodes'], initial['nodes'])
+        self.assertEqual(improvements, sorted(improvements))
+        self.assertEqual(set(w for c in constraints for w in c), set(range(20)))
+        for a, b, c in constraints:
+            self.assertFalse(min(a, b) < c < max(a, b))
+
+class MeasureTest(unittest.TestCase):
+    def test_engines(self):
+        constraints = hardness.planted_instance(12, 60, random.Random(3))
+        metrics = hardness.measure(12, constraints)
+        self.assertEqual(sorted(metrics['engines']), sorted(hardness.ENGINES))
+        self.assertAlmostEqual(metrics['time'], sum(metrics['engines'].values()))
+        self.assertGreater(metrics['nodes'], 0)
+        metrics = hardness.measure(12, constraints, engines=['local'])
+        self.assertEqual(list(metrics['engines']), ['local'])
+        self.assertEqual(metrics['nodes'], 0)
+
+class UniquenessTest(unittest.TestCase):
+    def test_checker(self):
+        checker = hardness.UniquenessChecker([0, 1, 2, 3])
+        constraints = [(1, 2, 0), (1, 2, 3)]
+        other = checker.other(constraints)
+        self.assertNotIn(other, ([0, 1, 2, 3], [3, 2, 1, 0]))
+        position = {w: i for i, w in enumerate(other)}
+        for a, b, c in constraints:
+            self.assertFalse(min(position[a], position[b]) < position[c] <
+                             max(position[a], position[b]))
+        everything = [(p, q, r) for p in range(4) for q in range(p + 1, 4) for r in range(q + 1, 4)]
+        self.assertIsNone(checker.other(everything + [(q, r, p) for p, q, r in everything]))
+
+    def test_pin_down_is_minimal(self):
+        rng = random.Random(2)
+        n = 12
+        constraints = hardness.pin_down(n, hardness.planted_instance(n, n, rng), rng)
+        checker = hardness.UniquenessChecker(range(n))
+        self.assertIsNone(checker.other(constraints))
+        for k in range(len(constraints)):
+            self.assertIsNotNone(checker.other(constraints[:k] + constraints[k + 1:]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+import random
+import sys
+import os.path
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+
+import src.hardness as hardness
+from src.incremental import IncrementalSolver, best_insert
+from src.local_search import OrderingState
+from solver import num_constraints_satisfied
+
+class BestInsertTest(unittest.TestCase):
+    def test_matches_every_insert(self):
+        rng = random.Random(3)
+        for _ in range(200):
+            n = rng.randint(3, 12)
+            constraints = [tuple(rng.randrange(n) for _ in range(3))
+                           for _ in range(rng.randint(1, 30))]
+            ordering = list(range(n))
+            rng.shuffle(ordering)
+            state = OrderingState(n, constraints, ordering)
+            w = rng.randrange(n)
+            q, delta = best_insert(state, w, rng)
+            deltas = [state.insert_delta(w, p) for p in range(n)]
+            self.assertEqual(delta, max(deltas))
+            self.assertEqual(deltas[q], delta)
+
+class IncrementalSolverTest(unittest.TestCase):
+    def test_single_move(self):
+        solver = IncrementalSolver(["A", "B", "C"], seed=0)
+        self.assertTrue(solver.add_constraint("A", "B", "C"))
+        self.assertEqual(solver.ordering(), ["A", "B", "C"])
+        self.assertTrue(solver.add_constraint("A", "C", "B"))
+        self.assertEqual(num_constraints_satisfied(3, [["A", "B", "C"], ["A", "C", "B"]],
+                                                   solver.ordering()), 2)
+        self.assertEqual(solver.stats['held'], 1)
+        self.assertEqual(solver.stats['moved'], 1)
+
+    def test_new_wizards(self):
+        solver = IncrementalSolver(seed=0)
+        self.assertTrue(solver.add_constraint("A", "B", "C"))
+        self.assertTrue(solver.add_constraint("D", "C", "A"))
+        self.assertEqual(sorted(solver.ordering()), ["A", "B", "C", "D"])
+        self.assertEqual(solver.satisfied(), (2, 2))
+
+    def test_stream(self):
+        rng = random.Random(4)
+        n = 30
+        hidden = list(range(n))
+        rng.shuffle(hidden)
+        constraints = [tuple(hidden[w] for w in c)
+                       for c in hardness.planted_instance(n, 200, rng)]
+        solver = IncrementalSolver(range(n), seed=0)
+        for k, constraint in enumerate(constraints):
+            self.assertTrue(solver.add_constraint(*constraint))
+            self.assertEqual(num_constraints_satisfied(n, constraints[:k + 1], solver.ordering()),
+                             k + 1)
+        stats = solver.stats
+        self.assertEqual(stats['held'] + stats['moved'] + stats['repaired'] + stats['resolved'],
+                         len(constraints))
+        self.assertLess(stats['resolved'], stats['held'])
+
+    def test_hardness_peak(self):
+        # Five constraints per wizard, where backtracking is slowest.
+        rng = random.Random(5)
+        n, m = 50, 250
+        constraints = hardness.planted_instance(n, m, rng)
+        solver = IncrementalSolver(range(n), seed=0)
+        for constraint in constraints:
+            solver.add_constraint(*constraint)
+        self.assertLessEqual(solver.stats['resolved'], 5)
+        self.assertEqual(num_constraints_satisfied(n, constraints, solver.ordering()),
+                         solver.satisfied()[0])
+        self.assertGreater(solver.satisfied()[0], 0.95 * m)
+
+    def test_initial_constraints(self):
+        constraints = [(0, 1, 2), (2, 3, 0), (1, 3, 2)]
+        solver = IncrementalSolver(range(4), constraints)
+        self.assertEqual(solver.stats['resolved'], 1)
+        self.assertEqual(solver.satisfied(), (3, 3))
+        solver = IncrementalSolver(range(4), constraints, ordering=[3, 2, 1, 0])
+        self.assertEqual(solver.stats['resolved'], 0)
+        self.assertEqual(solver.ordering(), [3, 2, 1, 0])
+
+    def test_unsatisfiable(self):
+        solver = IncrementalSolver(range(3), seed=0, engine='local', iterations=100)
+        self.assertTrue(solver.add_constraint(0, 1, 2))
+        self.assertTrue(solver.add_constraint(1, 2, 0))
+        # Every ordering has one of the three in the middle.
+        self.assertFalse(solver.add_constraint(0, 2, 1))
+        resolved = solver.stats['resolved']
+        self.assertFalse(solver.add_constraint(1, 0, 2))
+        self.assertEqual(solver.stats['resolved'], resolved)
+        self.assertGreaterEqual(solver.stats['unsatisfied'], 1)
+        self.assertEqual(solver.satisfied(), (3, 4))
+
+if __name__ == '__main__':
+    unittest.main()
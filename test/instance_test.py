@@ -0,0 +1,113 @@
+import unittest
+import sys
+import os.path
+import shutil
+import tempfile
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+
+import src.instance as instance
+from instance_validator import processLargeInput
+from solver import read_input, solve_ids, num_constraints_satisfied
+
+class ParseInstanceTest(unittest.TestCase):
+    INPUT = "phase2_inputs/inputs20/input20_0.in"
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def write(self, text):
+        path = os.path.join(self.tmp, "instance.in")
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_matches_intern_constraints(self):
+        _, _, _, constraints = read_input(self.INPUT)
+        names, int_constraints = instance.intern_constraints(constraints)
+        for use_mmap in (False, True):
+            num_wizards, parsed_names, C = instance.read_instance(self.INPUT, use_mmap)
+            self.assertEqual(num_wizards, 20)
+            self.assertEqual(parsed_names, names)
+            self.assertEqual([tuple(c) for c in C.tolist()], int_constraints)
+
+    def test_small_chunks(self):
+        with open(self.INPUT, "rb") as f:
+            data = f.read()
+        expected = instance.parse_instance(data)
+        chunk_bytes = instance.CHUNK_BYTES
+        instance.CHUNK_BYTES = 16
+        try:
+            num_wizards, names, C = instance.parse_instance(data)
+        finally:
+            instance.CHUNK_BYTES = chunk_bytes
+        self.assertEqual(names, expected[1])
+        self.assertEqual(C.tolist(), expected[2].tolist())
+
+    def test_malformed(self):
+        for text in ["3\n2\nA B C\n", "3\n1\nA B C\nA C B\n", "3\n1\nA B\n", "x\n1\nA B C\n", ""]:
+            with self.assertRaises(instance.InstanceError):
+                instance.read_instance(self.write(text), use_mmap=True)
+
+    def test_names_per_line(self):
+        # Six names in all, but not three to a line.
+        for text, line in (("3\n2\nA B\nC A B C\n", "line 3"), ("3\n2\nA B C\n\nA B C D\n", "line 5")):
+            with self.assertRaises(instance.InstanceError) as context:
+                instance.parse_instance(text.encode())
+            self.assertIn(line, str(context.exception))
+        chunk_bytes = instance.CHUNK_BYTES
+        instance.CHUNK_BYTES = 8
+        try:
+            with self.assertRaises(instance.InstanceError) as context:
+                instance.parse_instance(b"3\n3\nA B C\nB C A\nC A\nB\n")
+            self.assertIn("line 5", str(context.exception))
+            self.assertEqual(instance.parse_instance(b"3\n2\nA B C\n\n  B C A \r\n")[2].tolist(),
+                             [[0, 1, 2], [1, 2, 0]])
+        finally:
+            instance.CHUNK_BYTES = chunk_bytes
+
+    def test_with_ordering(self):
+        path = self.write("3\nC A B\n2\nA B C\nB C A\n")
+        num_wizards, names, C = instance.read_instance(path, with_ordering=True)
+        self.assertEqual(names, ["C", "A", "B"])
+        self.assertEqual(C.tolist(), [[1, 2, 0], [2, 0, 1]])
+        with self.assertRaises(instance.InstanceError):
+            instance.read_instance(self.write("3\nC A C\n1\nA B C\n"), with_ordering=True)
+
+    def test_solve_ids(self):
+        num_wizards, names, C = instance.read_instance(self.INPUT)
+        ordering = solve_ids(len(names), C)
+        self.assertEqual(sorted(ordering), list(range(len(names))))
+        constraints = [[names[w] for w in c] for c in C.tolist()]
+        self.assertEqual(num_constraints_satisfied(num_wizards, constraints,
+                                                   instance.name_ordering(ordering, names)),
+                         len(constraints))
+
+class LargeInstanceValidatorTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def validate(self, text):
+        path = os.path.join(self.tmp, "instance.in")
+        with open(path, "w") as f:
+            f.write(text)
+        return processLargeInput(path)
+
+    def test_valid(self):
+        self.assertEqual(self.validate("3\nA B C\n2\nA B C\nB C A\n"), "Success!")
+
+    def test_violations(self):
+        self.assertIn("line 5", self.validate("3\nA B C\n2\nA B C\nA C B\n"))
+        self.assertIn("line 4", self.validate("3\nA B C\n1\nA D C\n"))
+        self.assertIn("alphanumeric", self.validate("2\nA B_\n1\nA B A\n"))
+        self.assertIn("Invalid instance", self.validate("3\nA B C\n2\nA B C\n"))
+        self.assertIn("line 4", self.validate("3\nA B C\n2\nA B\nC A B C\n"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import os
+import sys
+import os.path
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+
+import src.instrument as instrument
+from solver import read_input, solve, ENCODINGS
+
+class ProfilerTest(unittest.TestCase):
+    def tearDown(self):
+        instrument.disable()
+
+    def test_disabled_by_default(self):
+        self.assertFalse(instrument.PROFILER.enabled)
+        with instrument.PROFILER.phase("nothing"):
+            instrument.PROFILER.count("nothing")
+
+    def test_nested_phases(self):
+        profiler = instrument.enable()
+        for _ in range(2):
+            with instrument.PROFILER.phase("outer"):
+                with instrument.PROFILER.phase("inner"):
+                    block = bytearray(1 << 20)
+                    del block
+                instrument.PROFILER.count("rounds")
+        self.assertIs(instrument.disable(), profiler)
+        self.assertFalse(instrument.PROFILER.enabled)
+
+        record = profiler.record(input="x")
+        self.assertEqual(record['input'], "x")
+        self.assertEqual(record['counters'], {'rounds': 2})
+        self.assertEqual(record['phases']['outer']['calls'], 2)
+        self.assertGreaterEqual(record['phases']['outer']['time'], record['phases']['inner']['time'])
+        self.assertGreaterEqual(record['phases']['inner']['peak'], 1 << 20)
+        self.assertGreaterEqual(record['phases']['outer']['peak'], 1 << 20)
+
+    def test_keeps_outside_tracing(self):
+        import tracemalloc
+        tracemalloc.start()
+        try:
+            instrument.enable()
+            instrument.disable()
+            self.assertTrue(tracemalloc.is_tracing())
+        finally:
+            tracemalloc.stop()
+        instrument.enable()
+        instrument.disable()
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_solve_phases(self):
+        num_wizards, num_constraints, wizards, constraints = read_input("phase2_inputs/inputs20/input20_0.in")
+        profiler = instrument.enable(memory=False)
+        solve(num_wizards, num_constraints, wizards, constraints)
+        instrument.disable()
+        record = profiler.record()
+        for name in ["preprocess", "reduce.constraints", "reduce.transitivity",
+                     "reduce.consistency", "solve", "ordering"]:
+            self.assertEqual(record['phases'][name]['calls'], 1)
+        self.assertEqual(record['counters']['constraints'], num_constraints)
+        self.assertGreater(record['counters']['clauses'], 0)
+        self.assertGreater(record['counters']['literals_touched'], 0)
+        self.assertEqual(record['counters']['variables'], record['counters']['literals_touched'])
+
+    def test_variables_per_encoding(self):
+        num_wizards, num_constraints, wizards, constraints = read_input("phase2_inputs/inputs20/input20_0.in")
+        for encoding in ENCODINGS:
+            profiler = instrument.enable(memory=False)
+            solve(num_wizards, num_constraints, wizards, constraints, encoding=encoding)
+            instrument.disable()
+            self.assertGreater(profiler.counters['variables'], 0, encoding)
+
+    def test_aggregate(self):
+        records = [{'phases': {'solve': {'time': 1.0, 'peak': 10, 'calls': 1}},
+                    'counters': {'clauses': 5}},
+                   {'phases': {'solve': {'time': 2.0, 'peak': 5, 'calls': 2}},
+                    'counters': {'clauses': 7}}]
+        self.assertEqual(instrument.aggregate(records),
+                         {'instances': 2, 'counters': {'clauses': 12},
+                          'phases': {'solve': {'time': 3.0, 'max_time': 2.0, 'peak': 10, 'calls': 3}}})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import random
+import sys
+import os.path
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+
+import src.local_search as ls
+from solver import solve, num_constraints_satisfied
+
+class TestOrderingState(unittest.TestCase):
+    def test_deltas_match_recount(self):
+        rng = random.Random(170)
+        n = 10
+        constraints = [tuple(rng.sample(range(n), 3)) for _ in range(60)]
+        state = ls.OrderingState(n, constraints, rng.sample(range(n), n))
+        for _ in range(300):
+            u, v = rng.randrange(n), rng.randrange(n)
+            if rng.random() < 0.5:
+                delta = state.insert_delta(u, v)
+                self.assertEqual(state.apply_insert(u, v), delta)
+            else:
+                delta = state.swap_delta(u, v)
+                self.assertEqual(state.apply_swap(u, v), delta)
+            self.assertEqual(sorted(state.order), list(range(n)))
+            self.assertEqual([state.order[p] for p in state.pos], list(range(n)))
+            self.assertEqual(state.satisfied, len(constraints) - len(state.violated()))
+
+    def test_local_search(self):
+        rng = random.Random(61)
+        hidden = rng.sample(range(15), 15)
+        constraints = []
+        while len(constraints) < 80:
+            a, b, c = sorted(rng.sample(range(15), 3))
+            constraints.append((hidden[a], hidden[b], hidden[c]))
+        ordering, satisfied = ls.local_search(15, constraints, time_limit=5, seed=1)
+        self.assertEqual(sorted(ordering), list(range(15)))
+        self.assertEqual(satisfied, len(constraints))
+
+    def test_unsat_falls_back(self):
+        constraints = [["A", "B", "C"], ["A", "C", "B"], ["B", "C", "A"]]
+        stats = {}
+        solution = solve(3, 3, ["A", "B", "C"], constraints, stats=stats, iterations=100)
+        self.assertEqual(stats['engine'], 'local')
+        self.assertEqual(stats['satisfied'], 2)
+        self.assertEqual(num_constraints_satisfied(3, constraints, solution), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
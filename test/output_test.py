@@ -48,5 +48,27 @@ class OutputTest(unittest.TestCase):
             self.assertTrue(test_passed_input(files, self.DIR_INPUTS_50))
             print ('\n' + file + ' passed.')
 
+class EncodingTest(unittest.TestCase):
+    DIRS = ["phase2_inputs/inputs20", "phase2_inputs/inputs35"]
+
+    def test_pair_encoding_matches_literal(self):
+        for dir in self.DIRS:
+            for file in sorted(os.listdir(dir), key=str.lower):
+                num_wizards, num_constraints, wizards, constraints = read_input(os.path.join(dir, file))
+                literal = solve(num_wizards, num_constraints, wizards, constraints, encoding='literal')
+                pair = solve(num_wizards, num_constraints, wizards, constraints, encoding='pair')
+                self.assertEqual(sorted(pair), sorted(literal))
+                self.assertTrue(check(constraints, literal), file)
+                self.assertTrue(check(constraints, pair), file)
+
+    def test_symmetry_breaking(self):
+        for dir in self.DIRS:
+            for file in sorted(os.listdir(dir), key=str.lower):
+                num_wizards, num_constraints, wizards, constraints = read_input(os.path.join(dir, file))
+                for encoding in ['literal', 'pair']:
+                    solution = solve(num_wizards, num_constraints, wizards, constraints,
+                                     encoding=encoding, symmetry=True)
+                    self.assertTrue(check(constraints, solution), file)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+import time
+import sys
+import os.path
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+
+import src.instrument as instrument
+import src.portfolio as portfolio
+from solver import read_input, solve, num_constraints_satisfied
+
+CONSTRAINTS = [(0, 1, 2), (1, 2, 0)]
+
+def partial(n, constraints, time_limit):
+    return [2, 0, 1]       # Satisfies only (1, 2, 0).
+
+def complete(n, constraints, time_limit):
+    time.sleep(0.2)
+    return [0, 1, 2]
+
+def hang(n, constraints, time_limit):
+    time.sleep(60)
+
+def give_up(n, constraints, time_limit):
+    return None
+
+def slow_give_up(n, constraints, time_limit):
+    time.sleep(0.8)
+
+def large(n, constraints, time_limit):
+    return list(range(n))   # Pickles to far more than a pipe buffer.
+
+def unprofiled(n, constraints, time_limit):
+    import tracemalloc
+    if not instrument.PROFILER.enabled and not tracemalloc.is_tracing():
+        return [0, 1, 2]
+
+class PortfolioTest(unittest.TestCase):
+    def test_first_complete_wins(self):
+        start = time.time()
+        name, ordering, satisfied = portfolio.race(
+            [('partial', partial), ('complete', complete), ('hang', hang)], 3, CONSTRAINTS, 30)
+        self.assertEqual((name, ordering, satisfied), ('complete', [0, 1, 2], 2))
+        self.assertLess(time.time() - start, 10)
+
+    def test_deadline_keeps_best_partial(self):
+        name, ordering, satisfied = portfolio.race(
+            [('partial', partial), ('none', give_up), ('hang', hang)], 3, CONSTRAINTS, 0.5)
+        self.assertEqual((name, satisfied), ('partial', 1))
+
+    def test_children_not_profiled(self):
+        instrument.enable()
+        try:
+            name, ordering, satisfied = portfolio.race([('unprofiled', unprofiled)], 3,
+                                                       CONSTRAINTS, 10)
+        finally:
+            instrument.disable()
+        self.assertEqual((name, satisfied), ('unprofiled', 2))
+
+    def test_large_answer(self):
+        start = time.time()
+        name, ordering, satisfied = portfolio.race([('large', large), ('hang', hang)],
+                                                   200000, [(0, 1, 2)], 30)
+        self.assertEqual((name, satisfied), ('large', 1))
+        self.assertLess(time.time() - start, 10)
+
+    def test_fallback_uses_remaining_time(self):
+        import solver
+        strategies = solver.PORTFOLIO
+        solver.PORTFOLIO = [('slow', slow_give_up)]
+        try:
+            start = time.time()
+            # Unsatisfiable, so the fallback local search runs out its time.
+            ordering, engine = solver.solve_component(3, [(0, 1, 2), (1, 2, 0), (0, 2, 1)],
+                                                      engine='portfolio', time_limit=1)
+        finally:
+            solver.PORTFOLIO = strategies
+        self.assertEqual(engine, 'local')
+        self.assertEqual(sorted(ordering), [0, 1, 2])
+        self.assertLess(time.time() - start, 1.5)
+
+    def test_solve_portfolio(self):
+        num_wizards, num_constraints, wizards, constraints = read_input("phase2_inputs/inputs20/input20_0.in")
+        stats = {}
+        solution = solve(num_wizards, num_constraints, wizards, constraints, stats=stats,
+                         engine='portfolio', time_limit=20)
+        self.assertTrue(stats['engine'].startswith('portfolio:'))
+        self.assertEqual(num_constraints_satisfied(num_wizards, constraints, solution), num_constraints)
+
+
+if __name__ == '__main__':
+    unittest.main()
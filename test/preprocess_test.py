@@ -0,0 +1,104 @@
+import unittest
+import random
+import sys
+import time
+import os.path
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+
+import src.preprocess as pp
+from solver import solve, solve_ids, num_constraints_satisfied
+
+class TestCanonicalize(unittest.TestCase):
+    def test_categories(self):
+        constraints = [("Harry", "Snape", "Dumbledore"), ("Snape", "Harry", "Dumbledore"),
+                       ("Harry", "Harry", "Snape"), ("Harry", "Snape", "Harry"),
+                       ("Harry", "Snape", "Snape"), ("Harry", "Harry", "Harry"),
+                       ("Harry", "Snape", "Dumbledore"), ("Harry", "Dumbledore", "Snape")]
+        kept, removed = pp.canonicalize_constraints(constraints)
+        self.assertEqual(kept, [("Harry", "Snape", "Dumbledore"), ("Harry", "Dumbledore", "Snape")])
+        self.assertEqual(removed, {pp.SAME_PAIR: 2, pp.MIDDLE_IS_END: 2, pp.DUPLICATE: 2})
+
+    def test_array_matches_list(self):
+        import numpy as np
+
+        rng = random.Random(0)
+        for _ in range(100):
+            n = rng.randint(1, 6)
+            constraints = [tuple(rng.randrange(n) for _ in range(3))
+                           for _ in range(rng.randint(0, 30))]
+            array = np.array(constraints, dtype=np.int32).reshape(-1, 3)
+            self.assertEqual(pp.canonicalize_array(array), pp.canonicalize_constraints(constraints))
+
+    def test_array_with_large_ids(self):
+        import numpy as np
+
+        # Packed as (lo * n + hi) * n + c with n = 2 ** 22, the first two collide in int64.
+        constraints = [(2 ** 20, 2 ** 21, 7), (0, 2 ** 21, 7), (2 ** 22 - 1, 1, 2),
+                       (2 ** 21, 0, 7), (0, 0, 1)]
+        array = np.array(constraints, dtype=np.int64)
+        self.assertEqual(pp.canonicalize_array(array), pp.canonicalize_constraints(constraints))
+        self.assertEqual(len(pp.canonicalize_array(array)[0]), 3)
+
+    def test_solve_with_degenerate_constraints(self):
+        constraints = [["Harry", "Snape", "Dumbledore"], ["Harry", "Snape", "Harry"],
+                       ["Hermione", "Hermione", "Snape"]]
+        wizards = ["Harry", "Snape", "Dumbledore", "Hermione"]
+        stats = {}
+        solution = solve(4, 3, wizards, constraints, stats=stats)
+        self.assertEqual(sorted(solution), sorted(wizards))
+        self.assertEqual(num_constraints_satisfied(4, constraints, solution), 3)
+        self.assertEqual(stats['removed'][pp.MIDDLE_IS_END], 1)
+
+class TestComponents(unittest.TestCase):
+    def test_split(self):
+        constraints = [(0, 1, 2), (5, 6, 7), (2, 3, 1), (7, 8, 5)]
+        components, isolated = pp.connected_components(10, constraints)
+        self.assertEqual(components, [([0, 1, 2, 3], [(0, 1, 2), (2, 3, 1)]),
+                                      ([5, 6, 7, 8], [(0, 1, 2), (2, 3, 0)])])
+        self.assertEqual(isolated, [4, 9])
+
+    def test_solve_components(self):
+        constraints = [["Harry", "Snape", "Dumbledore"], ["Ron", "Hermione", "Ginny"],
+                       ["Snape", "Dumbledore", "Harry"], ["Hermione", "Ginny", "Ron"]]
+        wizards = ["Harry", "Snape", "Dumbledore", "Hermione", "Ron", "Ginny", "Neville"]
+        stats = {}
+        solution = solve(7, 4, wizards, constraints, stats=stats)
+        self.assertEqual(sorted(solution), sorted(wizards))
+        self.assertEqual(num_constraints_satisfied(7, constraints, solution), 4)
+        self.assertEqual(sorted(stats['components']), [3, 3])
+        self.assertEqual(solution[-1], "Neville")
+
+    def test_shared_budget(self):
+        # Five components no ordering satisfies, so each would use all it gets.
+        constraints = [(a + 3 * k, b + 3 * k, c + 3 * k) for k in range(5)
+                       for a, b, c in ((0, 1, 2), (1, 2, 0), (2, 0, 1))]
+        stats = {}
+        start = time.time()
+        ordering = solve_ids(15, constraints, stats=stats, engine='local', time_limit=1)
+        self.assertLess(time.time() - start, 2)
+        self.assertEqual(stats['components'], [3] * 5)
+        self.assertEqual(stats['satisfied'], 10)
+        self.assertEqual(sorted(ordering), list(range(15)))
+
+class TestPeel(unittest.TestCase):
+    def test_chain(self):
+        # 3 is only a middle; once it is gone, so is 2.
+        constraints = [(0, 1, 2), (1, 2, 3), (0, 2, 3), (0, 1, 4), (4, 0, 1)]
+        kernel, peeled = pp.peel_constraints(5, constraints)
+        self.assertEqual(peeled, [3, 2])
+        self.assertEqual(kernel, [(0, 1, 4), (4, 0, 1)])
+
+    def test_solve_peeled(self):
+        constraints = [["A", "B", "C"], ["B", "C", "D"], ["A", "C", "D"], ["A", "B", "E"],
+                       ["E", "A", "B"], ["C", "E", "D"]]
+        wizards = ["A", "B", "C", "D", "E"]
+        stats = {}
+        solution = solve(5, 6, wizards, constraints, stats=stats)
+        self.assertEqual(num_constraints_satisfied(5, constraints, solution), 6)
+        self.assertEqual(solution[-2:], ["C", "D"])
+        self.assertEqual(stats['kernel'], {'wizards': (5, 3), 'constraints': (6, 2)})
+
+
+if __name__ == '__main__':
+    unittest.main()
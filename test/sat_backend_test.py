@@ -0,0 +1,103 @@
+import unittest
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+import os.path
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+
+import src.sat_backend as sb
+import src.sat_reduce as sat
+from src.instance import intern_constraints
+from solver import read_input, sat_ordering, num_constraints_satisfied
+
+# Stands in for a solver binary: reads DIMACS, answers in the SAT competition
+# format on stdout, or in the MiniSat format if given an output path.
+FAKE_SOLVER = """
+import sys
+import pycosat
+cnf = []
+for line in open(sys.argv[1]):
+    tokens = line.split()
+    if tokens and tokens[0] not in ("c", "p"):
+        cnf.append([int(t) for t in tokens[:-1]])
+solution = pycosat.solve(cnf)
+if len(sys.argv) > 2:
+    with open(sys.argv[2], "w") as f:
+        f.write("UNSAT\\n" if solution == "UNSAT" else "SAT\\n" + " ".join(map(str, solution)) + " 0\\n")
+elif solution == "UNSAT":
+    print("s UNSATISFIABLE")
+    sys.exit(20)
+else:
+    print("c fake solver")
+    print("s SATISFIABLE")
+    for i in range(0, len(solution), 10):
+        print("v " + " ".join(map(str, solution[i:i + 10])))
+    print("v 0")
+    sys.exit(10)
+"""
+
+class DimacsTest(unittest.TestCase):
+    def test_write_dimacs(self):
+        f = io.StringIO()
+        batch = sb.DIMACS_BATCH
+        sb.DIMACS_BATCH = 2
+        try:
+            sb.write_dimacs([[1, -3], [2], [-1, -2, 3]], f)
+        finally:
+            sb.DIMACS_BATCH = batch
+        self.assertEqual(f.getvalue(), "p cnf 3 3\n1 -3 0\n2 0\n-1 -2 3 0\n")
+
+    def test_parse_dimacs_output(self):
+        self.assertEqual(sb.parse_dimacs_output("c hi\ns SATISFIABLE\nv 1 -2\nv 3 0\n"), [1, -2, 3])
+        self.assertEqual(sb.parse_dimacs_output("SAT\n-1 2 0\n"), [-1, 2])
+        self.assertEqual(sb.parse_dimacs_output("s UNSATISFIABLE\n"), "UNSAT")
+        self.assertEqual(sb.parse_dimacs_output("UNSAT\n"), "UNSAT")
+        self.assertEqual(sb.parse_dimacs_output("INDET\n"), "UNKNOWN")
+        self.assertEqual(sb.parse_dimacs_output(""), "UNKNOWN")
+
+class DimacsBackendTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.script = os.path.join(self.tmp, "fake_solver.py")
+        with open(self.script, "w") as f:
+            f.write(FAKE_SOLVER)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_agrees_with_pycosat(self):
+        _, _, _, constraints = read_input("phase2_inputs/inputs20/input20_0.in")
+        names, int_constraints = intern_constraints(constraints)
+        stdout = sb.get_backend('"{0}" "{1}"'.format(sys.executable, self.script))
+        result_file = sb.DimacsBackend([sys.executable, self.script, "{input}", "{output}"])
+        for backend in (stdout, result_file):
+            for encoding in ('literal', 'pair'):
+                ordering = sat_ordering(len(names), int_constraints, encoding, backend=backend)
+                self.assertEqual(num_constraints_satisfied(len(names), int_constraints, ordering),
+                                 len(int_constraints))
+            L = sat.LiteralTranslator(3)
+            cnf = sat.reduce_pycosat([(0, 1, 2), (0, 2, 1), (1, 2, 0)], L)
+            self.assertEqual(sat.solve_pycosat(cnf, backend), "UNSAT")
+
+    def test_timeout(self):
+        sleeper = os.path.join(self.tmp, "sleeper.py")
+        with open(sleeper, "w") as f:
+            f.write("import time\ntime.sleep(30)\n")
+        backend = sb.DimacsBackend([sys.executable, sleeper], timeout=0.5)
+        start = time.time()
+        self.assertEqual(backend.solve([[1, 2], [-1]]), "UNKNOWN")
+        self.assertLess(time.time() - start, 10)
+        self.assertIsNone(sat_ordering(3, [(0, 1, 2)], backend=backend))
+
+    def test_errors(self):
+        with self.assertRaises(sb.SatBackendError):
+            sb.DimacsBackend([os.path.join(self.tmp, "missing")]).solve([[1]])
+        with self.assertRaises(sb.SatBackendError):
+            sb.DimacsBackend([sys.executable, "-c", "import sys; sys.exit(3)"]).solve([[1]])
+
+if __name__ == '__main__':
+    unittest.main()
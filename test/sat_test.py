@@ -6,6 +6,7 @@ sys.path.append(
 
 import src.sat_reduce as sat
 import src.dag_utils as dag
+from src.instance import intern_constraints, name_ordering
 from satispy import Variable, Cnf
 from satispy.solver import Minisat
 
@@ -28,18 +29,143 @@ def check(constraints, solution):
     return True
 
 class TestPycosatReduction(unittest.TestCase):
+    def test_literal_translator(self):
+        L = sat.LiteralTranslator(3)
+        key = L.touch_literal(0, 2)
+        self.assertEqual(L.translate(key), (0, 2))
+        self.assertEqual(L.touch_literal(0, 2), key)
+        self.assertIsNone(L.find_literal(2, 0))
+        self.assertEqual(L.literals(), [(0, 2)])
+        self.assertEqual(sat.translate_pycosat([key, -L.key(2, 0), L.key(1, 0)], L), [(0, 2)])
+
     def test_reduce_pycosat(self):
         constraints = [("Hermione", "Harry", "Dumbledore"), ("Hermione", "Dumbledore", "Harry")]
 
-        L = sat.LiteralTranslator()
-        cnf = sat.reduce_pycosat([("Hermione", "Harry", "Dumbledore"), ("Hermione", "Dumbledore", "Harry")], L)
+        names, int_constraints = intern_constraints(constraints)
+        L = sat.LiteralTranslator(len(names))
+        cnf = sat.reduce_pycosat(int_constraints, L)
         solution = sat.solve_pycosat(cnf)
         literals = sat.translate_pycosat(solution, L)
         G = dag.build_dag(literals)
-        wizard_ordering = dag.linearize(G)
+        wizard_ordering = name_ordering(dag.linearize(G), names)
+
+        self.assertTrue(check(constraints, wizard_ordering))
+
+    def test_old_encoding(self):
+        from solver import old_encoding_ordering, pycosatSolve
+
+        constraints = [(0, 1, 2), (1, 3, 0), (2, 3, 4), (4, 0, 3)]
+        for model in pycosatSolve(constraints, 10):
+            for x, y in model:
+                self.assertIsInstance(x, int)
+                self.assertIsInstance(y, int)
+        ordering = old_encoding_ordering(5, constraints)
+        self.assertEqual(sorted(ordering), list(range(5)))
+        self.assertTrue(check(constraints, ordering))
+
+    def test_ordering_pycosat(self):
+        constraints = [(0, 1, 2), (1, 3, 0), (2, 3, 4), (4, 0, 3)]
+        L = sat.LiteralTranslator(6)
+        solution = sat.solve_pycosat(sat.reduce_pycosat(constraints, L))
+        ordering = sat.ordering_pycosat(solution, L)
+        self.assertEqual(sorted(ordering), list(range(6)))
+        self.assertTrue(check(constraints, ordering))
+
+        P = sat.PairTranslator(6)
+        solution = sat.solve_pycosat(sat.reduce_pycosat_pairs(constraints, P))
+        ordering = sat.ordering_pycosat_pairs(solution, P)
+        self.assertEqual(sorted(ordering), list(range(6)))
+        self.assertTrue(check(constraints, ordering))
+
+class TestTransitivity(unittest.TestCase):
+    def test_all_triangles(self):
+        L = sat.LiteralTranslator(5)
+        clauses = sat.LiteralTransitivityManager(L).constraints()
+        self.assertEqual(len(clauses), 5 * 4 * 3)
+        self.assertEqual(len(set(tuple(c) for c in clauses)), len(clauses))
+
+    def test_constrained_triangles(self):
+        L = sat.LiteralTranslator(6)
+        sat.reduce_pycosat([(0, 1, 2), (3, 4, 5)], L)
+        constrained = set(frozenset(p) for p in L.literals())
+        triangles = sat.LiteralTransitivityManager(L, constrained_only=True).triangles()
+        self.assertEqual(len(set(triangles)), len(triangles))
+        for i, j, k in triangles:
+            touching = set([frozenset((i, j)), frozenset((i, k)), frozenset((j, k))]) & constrained
+            self.assertTrue(touching)
+
+    def test_constrained_only_solution(self):
+        constraints = [(0, 1, 2), (1, 2, 0), (2, 3, 1), (3, 0, 2)]
+        L = sat.LiteralTranslator(4)
+        cnf = sat.reduce_pycosat(constraints, L, constrained_only=True)
+        literals = sat.translate_pycosat(sat.solve_pycosat(cnf), L)
+        wizard_ordering = dag.linearize(dag.build_dag(literals))
+        self.assertTrue(check(constraints, wizard_ordering))
+
+class TestLazyRefinement(unittest.TestCase):
+    def test_refine_pycosat(self):
+        constraints = [(0, 1, 2), (1, 2, 0), (2, 3, 1), (3, 0, 2), (4, 0, 3), (1, 4, 0)]
+        L = sat.LiteralTranslator(5)
+        log = sat.RefinementLog()
+        solution = sat.refine_pycosat(constraints, L, log=log)
+        literals = sat.translate_pycosat(solution, L)
+        self.assertEqual(dag.find_cycles(5, literals), [])
+        self.assertTrue(check(constraints, dag.linearize(dag.build_dag(literals))))
+        self.assertEqual(len(log.clauses_added), log.rounds - 1)
+
+    def test_refine_pycosat_unsat(self):
+        # Some wizard of three must be in the middle.
+        constraints = [(0, 1, 2), (0, 2, 1), (1, 2, 0)]
+        L = sat.LiteralTranslator(3)
+        self.assertEqual(sat.refine_pycosat(constraints, L), "UNSAT")
+
+class TestPairReduction(unittest.TestCase):
+    def test_pair_translator(self):
+        P = sat.PairTranslator(4)
+        variables = [P.variable(i, j) for i in range(4) for j in range(i + 1, 4)]
+        self.assertEqual(variables, list(range(1, P.num_variables() + 1)))
+        self.assertEqual(P.literal(3, 1), -P.literal(1, 3))
+
+    def test_reduce_pycosat_pairs(self):
+        constraints = [("Hermione", "Harry", "Dumbledore"), ("Hermione", "Dumbledore", "Harry")]
+
+        names, int_constraints = intern_constraints(constraints)
+        P = sat.PairTranslator(len(names))
+        cnf = sat.reduce_pycosat_pairs(int_constraints, P)
+        solution = sat.solve_pycosat(cnf)
+        literals = sat.translate_pycosat_pairs(solution, P)
+        self.assertEqual(len(literals), 3)
+        G = dag.build_dag(literals)
+        wizard_ordering = name_ordering(dag.linearize(G), names)
 
         self.assertTrue(check(constraints, wizard_ordering))
 
+class TestSymmetryBreaking(unittest.TestCase):
+    CONSTRAINTS = [(0, 1, 2), (0, 1, 3), (2, 3, 4), (4, 5, 0)]
+
+    def test_symmetry_pairs(self):
+        self.assertEqual(sat.interchangeable_pairs(self.CONSTRAINTS), [(2, 3)])
+        self.assertEqual(sat.symmetry_pairs(self.CONSTRAINTS), [(0, 4), (2, 3)])
+
+    def test_reduce_with_symmetry(self):
+        for i, j in [(0, 4), (2, 3)]:
+            L = sat.LiteralTranslator(6)
+            solution = sat.solve_pycosat(sat.reduce_pycosat(self.CONSTRAINTS, L, symmetry=True))
+            ordering = dag.linearize(dag.build_dag(sat.translate_pycosat(solution, L)))
+            self.assertTrue(check(self.CONSTRAINTS, ordering))
+            self.assertLess(ordering.index(i), ordering.index(j))
+
+            P = sat.PairTranslator(6)
+            solution = sat.solve_pycosat(sat.reduce_pycosat_pairs(self.CONSTRAINTS, P, symmetry=True))
+            ordering = dag.linearize(dag.build_dag(sat.translate_pycosat_pairs(solution, P)))
+            self.assertTrue(check(self.CONSTRAINTS, ordering))
+            self.assertLess(ordering.index(i), ordering.index(j))
+
+    def test_unsat_with_symmetry(self):
+        constraints = [(0, 1, 2), (0, 2, 1), (1, 2, 0)]
+        L = sat.LiteralTranslator(3)
+        self.assertEqual(sat.solve_pycosat(sat.reduce_pycosat(constraints, L, symmetry=True)), "UNSAT")
+
 class TestSatispyReduction(unittest.TestCase):
     def setUp(self):
         self.skipTest('deprecated') # Skips whole test module.
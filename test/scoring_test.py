@@ -0,0 +1,40 @@
+import unittest
+import random
+import sys
+import os.path
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+
+import numpy as np
+import src.scoring as scoring
+
+def satisfied(constraints, ordering):
+    pos = {w: i for i, w in enumerate(ordering)}
+    return sum(1 for a, b, c in constraints
+               if not (pos[a] < pos[c] < pos[b] or pos[b] < pos[c] < pos[a]))
+
+class TestScoring(unittest.TestCase):
+    def test_score_orderings(self):
+        C = scoring.constraint_array([(0, 1, 2)])
+        self.assertEqual(list(scoring.score_orderings([[0, 1, 2], [0, 2, 1]], C)), [1, 0])
+
+    def test_matches_loop(self):
+        rng = random.Random(170)
+        n = 12
+        constraints = [tuple(rng.sample(range(n), 3)) for _ in range(80)]
+        orderings = [rng.sample(range(n), n) for _ in range(30)]
+        C = scoring.constraint_array(constraints)
+        counts, violated = scoring.score_orderings(np.array(orderings), C, masks=True)
+        for r, ordering in enumerate(orderings):
+            self.assertEqual(counts[r], satisfied(constraints, ordering))
+            self.assertEqual(counts[r] + violated[r].sum(), len(constraints))
+
+    def test_names(self):
+        index = {"Harry": 0, "Snape": 1, "Dumbledore": 2}
+        C = scoring.constraint_array([["Harry", "Dumbledore", "Snape"]], index)
+        self.assertEqual(C.shape, (1, 3))
+        self.assertEqual(scoring.score_orderings([0, 1, 2], C)[0], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
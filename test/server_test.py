@@ -0,0 +1,149 @@
+import unittest
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import os.path
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+
+from src.server import read_instance, solve_instance, ProtocolError
+from solver import num_constraints_satisfied, read_input
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir))
+
+def stream(data):
+    reader = asyncio.StreamReader()
+    reader.feed_data(data.encode())
+    reader.feed_eof()
+    return reader
+
+class ReadInstanceTest(unittest.TestCase):
+    def read_all(self, data):
+        async def read():
+            reader = stream(data)
+            instances = []
+            instance = await read_instance(reader)
+            while instance is not None:
+                instances.append(instance)
+                instance = await read_instance(reader)
+            return instances
+        return asyncio.run(read())
+
+    def test_stream(self):
+        instances = self.read_all("3\n1\nA B C\n\n\n4\n2\nA B C\nD A B\n")
+        self.assertEqual(instances, [(3, [["A", "B", "C"]]),
+                                     (4, [["A", "B", "C"], ["D", "A", "B"]])])
+
+    def test_truncated(self):
+        with self.assertRaises(ProtocolError):
+            self.read_all("3\n2\nA B C\n")
+        with self.assertRaises(ProtocolError):
+            self.read_all("three\n")
+        with self.assertRaises(ProtocolError):
+            self.read_all("3\n")
+
+    def test_invalid_bytes(self):
+        async def read():
+            reader = asyncio.StreamReader()
+            reader.feed_data(b"3\n1\nA \xff C\n")
+            reader.feed_eof()
+            return await read_instance(reader)
+        with self.assertRaises(ProtocolError):
+            asyncio.run(read())
+
+class SolveInstanceTest(unittest.TestCase):
+    def test_deterministic(self):
+        constraints = [["D", "A", "B"], ["A", "B", "C"], ["C", "D", "E"]]
+        first = solve_instance(5, constraints, {})
+        self.assertEqual(len(first['ordering']), 5)
+        self.assertEqual(first['satisfied'], 3)
+        # A fresh interpreter hashes strings differently.
+        script = ("import json; from src.server import solve_instance; "
+                  "print(json.dumps(solve_instance(5, {0!r}, {{}})['ordering']))".format(constraints))
+        for seed in ("1", "2"):
+            result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, check=True,
+                                    env=dict(os.environ, PYTHONHASHSEED=seed),
+                                    stdout=subprocess.PIPE, universal_newlines=True)
+            self.assertEqual(json.loads(result.stdout), first['ordering'])
+
+    def test_wizard_count(self):
+        with self.assertRaises(ValueError):
+            solve_instance(4, [["A", "B", "C"]], {})
+
+class ServeTest(unittest.TestCase):
+    FILES = ["phase2_inputs/inputs20/input20_0.in", "phase2_inputs/inputs20/input20_1.in"]
+
+    def payload(self):
+        data = ""
+        for file in self.FILES:
+            with open(os.path.join(ROOT, file)) as f:
+                data += f.read() + "\n"
+        return data
+
+    def check_responses(self, lines):
+        responses = sorted((json.loads(line) for line in lines), key=lambda r: r['id'])
+        self.assertEqual([r['id'] for r in responses], [0, 1])
+        for file, response in zip(self.FILES, responses):
+            num_wizards, num_constraints, _, constraints = read_input(os.path.join(ROOT, file))
+            self.assertEqual(response['satisfied'], num_constraints)
+            self.assertEqual(num_constraints_satisfied(num_wizards, constraints, response['ordering']),
+                             num_constraints)
+
+    def test_stdin(self):
+        result = subprocess.run([sys.executable, "solver.py", "--serve", "--workers", "2"], cwd=ROOT,
+                                input=self.payload(), stdout=subprocess.PIPE,
+                                universal_newlines=True, check=True)
+        self.check_responses(result.stdout.splitlines())
+
+    def test_protocol_error(self):
+        result = subprocess.run([sys.executable, "solver.py", "--serve", "--workers", "1"], cwd=ROOT,
+                                input="3\n1\nA B C\nnot a number\n", stdout=subprocess.PIPE,
+                                universal_newlines=True, check=True)
+        responses = sorted((json.loads(line) for line in result.stdout.splitlines()),
+                           key=lambda r: r['id'])
+        self.assertEqual(responses[0]['satisfied'], 1)
+        self.assertTrue(responses[1]['error'].startswith("ProtocolError"))
+
+    def test_invalid_bytes(self):
+        result = subprocess.run([sys.executable, "solver.py", "--serve", "--workers", "1"], cwd=ROOT,
+                                input=b"3\n1\nA B C\n3\n1\nA \xff C\n", stdout=subprocess.PIPE,
+                                check=True)
+        responses = sorted((json.loads(line) for line in result.stdout.decode().splitlines()),
+                           key=lambda r: r['id'])
+        self.assertEqual(responses[0]['satisfied'], 1)
+        self.assertTrue(responses[1]['error'].startswith("ProtocolError"))
+
+    def test_socket(self):
+        path = os.path.join(tempfile.mkdtemp(), "solver.sock")
+        server = subprocess.Popen([sys.executable, "solver.py", "--serve", path, "--workers", "2"],
+                                  cwd=ROOT)
+        try:
+            for _ in range(100):
+                if os.path.exists(path):
+                    break
+                time.sleep(0.05)
+            client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            client.connect(path)
+            client.sendall(self.payload().encode())
+            client.shutdown(socket.SHUT_WR)
+            received = b""
+            chunk = client.recv(65536)
+            while chunk:
+                received += chunk
+                chunk = client.recv(65536)
+            client.close()
+            self.check_responses(received.decode().splitlines())
+        finally:
+            server.terminate()
+            server.wait()
+            os.unlink(path)
+            os.rmdir(os.path.dirname(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
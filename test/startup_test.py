@@ -0,0 +1,34 @@
+import unittest
+import subprocess
+import sys
+import os.path
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
+
+from bench.startup_benchmark import ROOT, import_times
+
+class StartupTest(unittest.TestCase):
+    # `import solver` over `import argparse` in the same cold start, so the check
+    # follows the machine's speed: ~1.5 with lazy engines, ~10 importing numpy alone.
+    STARTUP_RATIO = 5
+    ENGINE_ONLY = ["numpy", "pycosat", "satispy", "networkx", "multiprocessing",
+                   "concurrent.futures"]
+
+    def test_engines_not_imported(self):
+        result = subprocess.run([sys.executable, "-c", "import solver, sys; print(' '.join(sys.modules))"],
+                                cwd=ROOT, stdout=subprocess.PIPE, universal_newlines=True, check=True)
+        modules = set(result.stdout.split())
+        for module in self.ENGINE_ONLY:
+            self.assertNotIn(module, modules)
+
+    def test_cold_start_budget(self):
+        ratios = []
+        for _ in range(3):
+            times = dict((module, cumulative) for module, _, cumulative
+                         in import_times("import argparse, solver"))
+            ratios.append(float(times["solver"]) / times["argparse"])
+        self.assertLess(min(ratios), self.STARTUP_RATIO)
+
+
+if __name__ == '__main__':
+    unittest.main()